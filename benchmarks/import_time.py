@@ -0,0 +1,148 @@
+"""
+Measures how long importing the plugin takes, on top of the modules that the LMS has already imported
+
+Python 2 has no "-X importtime", so each run imports the plugin in a fresh interpreter with a timing import hook,
+and the report uses the same layout: each module that was loaded, with the time spent importing it ("self") and
+including the modules it imported ("cumulative"), indented by nesting depth. Times are the median across runs.
+
+Usage (from the repository root):
+
+    PYTHONPATH=src:. python benchmarks/import_time.py
+    PYTHONPATH=src:. python benchmarks/import_time.py --runs 10 --modules edx_video_api.urls --tree
+"""
+from __future__ import print_function
+
+import __builtin__
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import timeit
+
+# Modules that the LMS imports whether or not the plugin is installed, so they're loaded before timing starts. Modules
+# that the plugin imports itself (e.g.: edxval.models, requests) aren't preloaded, so their cost is counted.
+DEFAULT_PRELOAD = (
+    "rest_framework.views",
+)
+# What the LMS imports from the plugin: its URLconf, and the signal receivers that the app config connects (connecting
+# them imports the CourseOverview and access token models, so that's timed too)
+DEFAULT_MODULES = ("edx_video_api.urls", "edx_video_api.signals")
+
+
+def time_imports(modules):
+    """
+    Imports modules with a hook that times each import that loads a new module. If the plugin's signals module is one
+    of them, its receivers are connected too, like the app config does when the app is ready.
+
+    Args:
+        modules (iterable of str): The modules to import
+    Returns:
+        list of tuple: The depth, name, self time and cumulative time (in microseconds) of each module that was
+            loaded, in the order that their imports finished
+    """
+    original_import = __builtin__.__import__
+    stack = []
+    records = []
+
+    def timed_import(name, globals=None, locals=None, fromlist=None, level=-1):  # pylint: disable=redefined-builtin
+        """Times an import, and records it if it loaded a new module"""
+        loaded_count = len(sys.modules)
+        stack.append(0.0)
+        start = timeit.default_timer()
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = timeit.default_timer() - start
+            child_time = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            if len(sys.modules) > loaded_count:
+                package = (globals or {}).get("__package__") or ""
+                # Python 2 tries implicit relative imports first, and marks the ones that fail with None
+                full_name = "{}.{}".format(package, name) if package and level != 0 else name
+                if sys.modules.get(full_name) is None:
+                    full_name = name
+                if sys.modules.get(full_name) is not None:
+                    records.append((len(stack), full_name, (elapsed - child_time) * 1e6, elapsed * 1e6))
+
+    __builtin__.__import__ = timed_import
+    try:
+        for module in modules:
+            imported_module = importlib.import_module(module)
+            if module == "edx_video_api.signals":
+                imported_module.connect_signals()
+    finally:
+        __builtin__.__import__ = original_import
+    return records
+
+
+def run_child(args):
+    """Sets up Django, preloads the LMS's modules, and prints the timed imports of the plugin's modules as JSON"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    import django
+    django.setup()
+    for module in args.preload:
+        importlib.import_module(module)
+    json.dump(time_imports(args.modules), sys.stdout)
+
+
+def median(values):
+    """Returns the median of a non-empty list of numbers"""
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+
+
+def run_parent(args):
+    """Runs the children and prints the report"""
+    command = [sys.executable, os.path.abspath(__file__), "--child"]
+    command += ["--preload"] + list(args.preload) + ["--modules"] + list(args.modules)
+    runs = [json.loads(subprocess.check_output(command)) for _ in range(args.runs)]
+
+    # The same modules are loaded in the same order in every run, so rows are matched up by position
+    rows = []
+    for index, (depth, name, _, _) in enumerate(runs[0]):
+        self_times = [run[index][2] for run in runs if index < len(run) and run[index][1] == name]
+        cumulative_times = [run[index][3] for run in runs if index < len(run) and run[index][1] == name]
+        rows.append((depth, name, median(self_times), median(cumulative_times)))
+
+    if args.tree:
+        print("import time: self [us] | cumulative | imported package")
+        for depth, name, self_time, cumulative_time in rows:
+            print(u"import time: {:>9.0f} | {:>10.0f} | {}{}".format(self_time, cumulative_time, "  " * depth, name))
+        print()
+
+    total = sum(cumulative_time for depth, _, _, cumulative_time in rows if depth == 0)
+    plugin_rows = [row for row in rows if row[1].startswith("edx_video_api")]
+    other_rows = [row for row in rows if not row[1].startswith("edx_video_api")]
+    print(u"Modules loaded: {} ({} from the plugin)".format(len(rows), len(plugin_rows)))
+    print(u"Total import time added to startup: {:.1f} ms (median of {} runs)".format(total / 1000, args.runs))
+    print(u"Time in the plugin's own modules: {:.1f} ms".format(sum(row[2] for row in plugin_rows) / 1000))
+    print()
+    print("Slowest dependencies loaded by the plugin (self time):")
+    for _, name, self_time, _ in sorted(other_rows, key=lambda row: -row[2])[:args.top]:
+        print(u"  {:>8.1f} ms  {}".format(self_time / 1000, name))
+
+
+def main():
+    """Parses the command line and runs the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="The number of fresh interpreters to time")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="The plugin modules to import")
+    parser.add_argument(
+        "--preload", nargs="*", default=DEFAULT_PRELOAD, help="Modules imported before timing starts"
+    )
+    parser.add_argument("--top", type=int, default=10, help="The number of slowest dependencies to list")
+    parser.add_argument("--tree", action="store_true", help="Print every module that was loaded")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args)
+    else:
+        run_parent(args)
+
+
+if __name__ == "__main__":
+    main()
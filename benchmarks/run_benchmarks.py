@@ -0,0 +1,360 @@
+"""
+Benchmarks for the course video list and create endpoints
+
+The views run against a real edxval schema in a fresh SQLite database, seeded with one course per requested size.
+HLS manifests are served by a local threaded HTTP server with a configurable delay. For each scenario, the latency
+percentiles, throughput and the process's peak memory use are reported.
+
+Usage (from the repository root):
+
+    PYTHONPATH=src:. python benchmarks/run_benchmarks.py --sizes 10,1000,50000
+    PYTHONPATH=src:. python benchmarks/run_benchmarks.py --save-baseline
+    PYTHONPATH=src:. python benchmarks/run_benchmarks.py --compare --tolerance 0.25
+
+Peak memory is the process's maximum resident set size so far, so it only ever grows; scenarios are run from the
+smallest course to the largest so that each reading reflects the largest course seen.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from uuid import uuid4
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+django.setup()
+
+# pylint: disable=wrong-import-position
+from django.core.cache import caches
+from django.core.management import call_command
+from edxval.models import CourseVideo, EncodedVideo, Profile, Video
+from rest_framework.test import APIRequestFactory
+
+from edx_video_api import courses, hls
+from edx_video_api.views import CourseVideoListView
+
+DEFAULT_SIZES = (10, 1000, 50000)
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+MANIFEST = b"""#EXTM3U
+#EXT-X-STREAM-INF:PROGRAM-ID=1,BANDWIDTH=2149280,CODECS="mp4a.40.2,avc1.64001f",RESOLUTION=1280x720
+video_720.m3u8
+#EXT-X-STREAM-INF:PROGRAM-ID=1,BANDWIDTH=246440,CODECS="mp4a.40.5,avc1.42000d",RESOLUTION=320x184
+video_184.m3u8
+"""
+SEED_BATCH_SIZE = 500
+# edxval serializes each video in a plain listing with several queries of its own, so plain listings of the largest
+# courses take minutes per call (and the cached scenario needs one to fill the cache). By default they're only run up
+# to this size.
+DEFAULT_FULL_LIST_MAX_SIZE = 10000
+
+
+class ManifestRequestHandler(BaseHTTPRequestHandler):
+    """Serves the same HLS master playlist for every path, after the server's configured delay"""
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Responds to a GET request"""
+        time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.apple.mpegurl")
+        self.send_header("Content-Length", str(len(MANIFEST)))
+        self.end_headers()
+        self.wfile.write(MANIFEST)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Keeps request logs out of the benchmark output"""
+
+
+class ManifestServer(ThreadingMixIn, HTTPServer):
+    """A local threaded HTTP server that stands in for a CDN serving HLS manifests"""
+    daemon_threads = True
+
+    def __init__(self, latency):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), ManifestRequestHandler)
+        self.latency = latency
+
+    @property
+    def base_url(self):
+        """Returns the URL that the server is listening on"""
+        return "http://127.0.0.1:{}".format(self.server_address[1])
+
+
+def seed_course(course_id, size):
+    """
+    Creates a course with the given number of HLS videos, using bulk inserts
+
+    Args:
+        course_id (str): A course id
+        size (int): The number of videos
+    """
+    profile, _ = Profile.objects.get_or_create(profile_name="hls")
+    prefix = uuid4().hex
+    Video.objects.bulk_create(
+        (
+            Video(
+                edx_video_id=u"{}-{}".format(prefix, index),
+                client_video_id=u"Video {}".format(index),
+                duration=0,
+                status=u"file_complete",
+            )
+            for index in range(size)
+        ),
+        batch_size=SEED_BATCH_SIZE,
+    )
+    video_ids = list(Video.objects.filter(edx_video_id__startswith=prefix).values_list("id", "edx_video_id"))
+    EncodedVideo.objects.bulk_create(
+        (
+            EncodedVideo(
+                video_id=video_id,
+                profile=profile,
+                url=u"https://example.com/{}.m3u8".format(edx_video_id),
+                file_size=0,
+                bitrate=0,
+            )
+            for video_id, edx_video_id in video_ids
+        ),
+        batch_size=SEED_BATCH_SIZE,
+    )
+    CourseVideo.objects.bulk_create(
+        (CourseVideo(course_id=course_id, video_id=video_id) for video_id, _ in video_ids),
+        batch_size=SEED_BATCH_SIZE,
+    )
+
+
+def clear_caches():
+    """Clears every cache, so that a request does all of its work"""
+    caches["default"].clear()
+    courses.course_cache.local.clear()
+    hls.validation_cache.local.clear()
+
+
+def get_peak_memory():
+    """Returns the process's peak resident set size in megabytes"""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return max_rss / (1024.0 * 1024.0) if sys.platform == "darwin" else max_rss / 1024.0
+
+
+def percentile(durations, percent):
+    """Returns a percentile of a list of durations, using the nearest-rank method"""
+    ordered = sorted(durations)
+    rank = max(int(round(percent / 100.0 * len(ordered))), 1)
+    return ordered[rank - 1]
+
+
+def call_view(request, course_id):
+    """Calls the course video view and reads the whole response body, as a client would"""
+    response = CourseVideoListView.as_view()(request, course_id=course_id)
+    if getattr(response, "streaming", False):
+        for _ in response.streaming_content:
+            pass
+    elif hasattr(response, "render"):
+        response.render()
+    if response.status_code >= 300:
+        raise RuntimeError(u"Request failed with status {}: {}".format(response.status_code, response.content))
+    return response
+
+
+def measure(run, iterations, setup=None):
+    """
+    Calls a function repeatedly and summarizes how long it took
+
+    Args:
+        run (callable): The function to measure
+        iterations (int): The number of calls
+        setup (callable): A function called before each call, which isn't timed
+    Returns:
+        dict: Latency percentiles in milliseconds, calls per second, and peak memory use in megabytes
+    """
+    durations = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        start = time.time()
+        run()
+        durations.append(time.time() - start)
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(durations, 50) * 1000, 3),
+        "p99_ms": round(percentile(durations, 99) * 1000, 3),
+        "throughput_per_s": round(iterations / sum(durations), 3),
+        "peak_memory_mb": round(get_peak_memory(), 1),
+    }
+
+
+def get_scenarios(course_id, manifest_server, include_full_list=True):
+    """
+    Returns the scenarios to run for a course, as (name, function, setup function) tuples
+
+    Args:
+        course_id (str): The course id
+        manifest_server (ManifestServer): The server that the created videos' manifests are fetched from
+        include_full_list (bool): Whether to include the plain listing scenarios
+    """
+    factory = APIRequestFactory()
+    base_path = "/api/course_videos/{}/".format(course_id)
+
+    def list_request(query_string=""):
+        """Returns a function that lists the course's videos"""
+        return lambda: call_view(factory.get(base_path + query_string), course_id)
+
+    def create():
+        """Creates a video, with a manifest URL that hasn't been validated before"""
+        request = factory.post(
+            base_path,
+            {"filename": "Benchmark video", "hls_url": "{}/{}.m3u8".format(manifest_server.base_url, uuid4().hex)},
+            format="json",
+        )
+        call_view(request, course_id)
+
+    full_list_scenarios = [
+        ("list", list_request(), clear_caches),
+        ("list_cached", list_request(), None),
+    ]
+    return (full_list_scenarios if include_full_list else []) + [
+        ("list_page", list_request("?page_size=100"), clear_caches),
+        ("list_stream", list_request("?stream=ndjson"), clear_caches),
+        ("list_fields", list_request("?fields=edx_video_id,status"), clear_caches),
+        ("create", create, None),
+    ]
+
+
+def run_benchmarks(sizes, iterations, manifest_latency, full_list_max_size=DEFAULT_FULL_LIST_MAX_SIZE):
+    """
+    Seeds a course for each size and runs every scenario against it
+
+    Returns:
+        dict: The results for each scenario, keyed by "<scenario>/<size>"
+    """
+    call_command("migrate", verbosity=0, interactive=False)
+    manifest_server = ManifestServer(manifest_latency)
+    server_thread = threading.Thread(target=manifest_server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+
+    results = {}
+    try:
+        for size in sorted(sizes):
+            course_id = "course-v1:Benchmark+Size{}+Run".format(size)
+            seed_course(course_id, size)
+            scenario_iterations = iterations or max(5, min(50, 200000 // size))
+            scenarios = get_scenarios(course_id, manifest_server, include_full_list=size <= full_list_max_size)
+            for name, run, setup in scenarios:
+                # One untimed call warms up imports, connections and (for list_cached) the cache
+                run()
+                result = measure(run, scenario_iterations, setup=setup)
+                results["{}/{}".format(name, size)] = result
+                print(format_result("{}/{}".format(name, size), result))
+    finally:
+        manifest_server.shutdown()
+        manifest_server.server_close()
+    return results
+
+
+def format_result(key, result):
+    """Formats one scenario's result as a line of output"""
+    return u"{:<20} p50 {:>10.2f} ms   p99 {:>10.2f} ms   {:>9.2f}/s   peak memory {:>8.1f} MB".format(
+        key, result["p50_ms"], result["p99_ms"], result["throughput_per_s"], result["peak_memory_mb"]
+    )
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Compares results to a baseline
+
+    Args:
+        results (dict): Results from run_benchmarks
+        baseline (dict): Earlier results from run_benchmarks
+        tolerance (float): The fraction that a latency may grow by before it counts as a regression
+    Returns:
+        list of str: A description of each regression
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key not in baseline:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            limit = baseline[key][metric] * (1 + tolerance)
+            if result[metric] > limit:
+                regressions.append(u"{} {}: {:.2f} ms (baseline {:.2f} ms, limit {:.2f} ms)".format(
+                    key, metric, result[metric], baseline[key][metric], limit
+                ))
+    return regressions
+
+
+def main():
+    """Runs the benchmarks from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help=u"Comma-separated numbers of videos to seed a course with (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=0,
+        help="Timed calls per scenario (default: between 5 and 50, depending on the course size)",
+    )
+    parser.add_argument(
+        "--manifest-latency",
+        type=float,
+        default=0.05,
+        help=u"Seconds that the local HLS server waits before responding (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--full-list-max-size",
+        type=int,
+        default=DEFAULT_FULL_LIST_MAX_SIZE,
+        help=u"The largest course to run the plain listing scenarios for (default: %(default)s)",
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help=u"Baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="Fail if results regressed from the baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help=u"Allowed latency growth over the baseline, as a fraction (default: %(default)s)",
+    )
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+    # Baselines depend on the machine, so none is committed; this fails before the (slow) benchmarks run
+    if args.compare and not args.save_baseline and not os.path.exists(args.baseline):
+        parser.error(
+            u"There is no baseline at {}. Run the benchmarks with --save-baseline first (on the same machine), "
+            u"or pass --baseline.".format(args.baseline)
+        )
+
+    results = run_benchmarks(
+        [int(size) for size in args.sizes.split(",") if size.strip()],
+        args.iterations,
+        args.manifest_latency,
+        full_list_max_size=args.full_list_max_size,
+    )
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        print(u"Saved baseline to {}".format(args.baseline))
+    if args.compare:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_to_baseline(results, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print(u"Regressions compared to {}:".format(args.baseline))
+            for regression in regressions:
+                print("  " + regression)
+            sys.exit(1)
+        print(u"No regressions compared to {}".format(args.baseline))
+
+
+if __name__ == "__main__":
+    main()
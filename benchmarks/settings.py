@@ -0,0 +1,27 @@
+"""Settings for the benchmark suite, which runs against a real edxval schema in a fresh SQLite database"""
+import os
+import tempfile
+
+VIDEO_API = dict(
+    AUTHENTICATION_CLASS="edx_video_api.utils.DummyOAuth2Authentication",
+    API_KEY_PERMISSION_CLASS="edx_video_api.utils.DummyApiKeyHeaderPermission",
+    COURSE_OVERVIEW="edx_video_api.utils.DummyCourseOverview"
+)
+
+SECRET_KEY = "edx_video_api"
+INSTALLED_APPS = [
+    "edxval",
+    "edx_video_api",
+]
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get(
+            "BENCHMARK_DATABASE",
+            os.path.join(tempfile.mkdtemp(prefix="edx_video_api_benchmarks"), "benchmarks.db")
+        ),
+    }
+}
+ROOT_URLCONF = "test_urls"
+USE_TZ = True
+ALLOWED_HOSTS = ["*"]
@@ -68,5 +68,8 @@ setup(
         "lms.djangoapp": [
             "edx_video_api = edx_video_api.apps:EdxVideoApiAppConfig"
         ],
+        "cms.djangoapp": [
+            "edx_video_api = edx_video_api.apps:EdxVideoApiAppConfig"
+        ],
     }
 )
@@ -17,7 +17,8 @@ class EdxVideoApiAppConfig(AppConfig):
 
     # NOTE: Studio is where users can upload videos via UI when edxval is installed, but these new endpoints are
     # being added to LMS. This is because LMS is configured to accept an API key ("EDX_API_KEY" in LMS settings) and
-    # Studio is not.
+    # Studio is not. The app is also installed in Studio (without URLs) so that courses being published or deleted
+    # there invalidate the cached course lookups that LMS uses.
     plugin_app = {
         PluginURLs.CONFIG: {
             ProjectType.LMS: {
@@ -31,6 +32,15 @@ class EdxVideoApiAppConfig(AppConfig):
                 SettingsType.COMMON: {
                     PluginSettings.RELATIVE_PATH: u'settings'
                 },
-            }
+            },
+            ProjectType.CMS: {
+                SettingsType.COMMON: {
+                    PluginSettings.RELATIVE_PATH: u'settings'
+                },
+            },
         }
     }
+
+    def ready(self):
+        from edx_video_api.signals import connect_signals
+        connect_signals()
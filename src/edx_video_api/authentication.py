@@ -0,0 +1,94 @@
+"""
+Caching the results of OAuth2 bearer token authentication
+"""
+import datetime
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+# Token models whose changes (e.g.: a token being revoked, which deletes it) remove cached results for their tokens.
+# Models that aren't installed are skipped.
+AUTHENTICATION_CACHE_TOKEN_MODELS = (
+    "oauth2_provider.models.AccessToken",
+    "provider.oauth2.models.AccessToken",
+)
+
+
+def get_authentication_cache():
+    """Returns the Django cache used for authentication results"""
+    return caches[settings.VIDEO_API.get("AUTHENTICATION_CACHE_ALIAS", "default")]
+
+
+def token_cache_key(token):
+    """Returns the cache key for a token's authentication result. The token itself is never stored."""
+    if isinstance(token, unicode):
+        token = token.encode("utf-8")
+    return "edx_video_api.authentication:{}".format(hashlib.sha256(token).hexdigest())
+
+
+def get_bearer_token(request):
+    """Returns the token from a request's "Authorization: Bearer <token>" header, or None"""
+    header = get_authorization_header(request).split()
+    if len(header) == 2 and header[0].lower() == b"bearer":
+        return header[1]
+    return None
+
+
+def invalidate_token(token):
+    """Removes the cached authentication result for a token"""
+    get_authentication_cache().delete(token_cache_key(token))
+
+
+class CachedTokenAuthentication(BaseAuthentication):
+    """
+    Wraps an authenticator, and caches the user and token that it returns for a bearer token, so that repeated
+    requests with the same token don't look it up in the database. Results are kept for at most the given number of
+    seconds, and never past the token's expiry. Requests without a bearer token are passed straight through.
+
+    Since the user is cached too, changes to the user (e.g.: losing staff access) can take as long as the timeout to
+    take effect. Changes to the token itself remove its cached result (see AUTHENTICATION_CACHE_TOKEN_MODELS).
+    """
+    def __init__(self, authenticator, timeout):
+        """
+        Args:
+            authenticator (BaseAuthentication): The authenticator to wrap
+            timeout (int): The most seconds that a result is cached for
+        """
+        self.authenticator = authenticator
+        self.timeout = timeout
+
+    def authenticate(self, request):
+        token = get_bearer_token(request)
+        if token is None:
+            return self.authenticator.authenticate(request)
+        cache = get_authentication_cache()
+        cache_key = token_cache_key(token)
+        cached = cache.get(cache_key)
+        # Some cache backends round timeouts up to whole seconds, so the expiry is checked here too
+        if cached is not None and cached[2] > time.time():
+            return cached[0], cached[1]
+
+        result = self.authenticator.authenticate(request)
+        if result is not None:
+            timeout = self.get_timeout(result[1])
+            if timeout > 0:
+                cache.set(cache_key, (result[0], result[1], time.time() + timeout), timeout)
+        return result
+
+    def get_timeout(self, auth):
+        """
+        Returns the number of seconds to cache a result for: the configured timeout, or less if the token expires
+        sooner. Results for tokens without a known expiry aren't cached.
+        """
+        expires = getattr(auth, "expires", None)
+        if not isinstance(expires, datetime.datetime):
+            return 0
+        now = timezone.now() if timezone.is_aware(expires) else datetime.datetime.now()
+        return int(min(self.timeout, (expires - now).total_seconds()))
+
+    def authenticate_header(self, request):
+        return self.authenticator.authenticate_header(request)
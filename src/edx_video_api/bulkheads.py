@@ -0,0 +1,174 @@
+"""
+Per-host limits for outbound manifest fetches, so that one slow or failing host can't tie up every worker
+"""
+import logging
+import threading
+import time
+from enum import Enum
+
+from edx_video_api.caching import LRUCache
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class CircuitState(Enum):
+    """The state of a host's circuit breaker"""
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class Rejection(Enum):
+    """Reasons why a fetch from a host wasn't started"""
+    host_busy = "host_busy"
+    host_unavailable = "host_unavailable"
+
+
+class HostBulkhead(object):
+    """
+    Limits the fetches from one host: at most max_concurrent can run at the same time, and a circuit breaker rejects
+    every fetch for reset_timeout seconds once failure_threshold fetches in a row have failed. After that, a single
+    trial fetch is let through, which closes the breaker if it succeeds or opens it again if it fails. While the
+    breaker isn't closed, only the trial fetch's result changes its state, not those of fetches that were already
+    running when it opened. A fetch must be acquired and released on the same thread, which is how the trial fetch is
+    told apart from the others.
+    """
+    def __init__(self, max_concurrent, failure_threshold, reset_timeout):
+        """
+        Args:
+            max_concurrent (int): The most fetches that can run at the same time, or None for no limit
+            failure_threshold (int): The number of failures in a row that opens the breaker
+            reset_timeout (float): Seconds that the breaker stays open before a trial fetch is let through
+        """
+        self.max_concurrent = max_concurrent
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.closed
+        self.active = 0
+        self.consecutive_failures = 0
+        self.opened_at = None
+        # The id of the thread running the trial fetch, if one is running
+        self.trial_thread = None
+        self.rejections = {rejection.value: 0 for rejection in Rejection}
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Starts a fetch if the host's limits allow it. Every fetch that's started must be finished with release().
+
+        Returns:
+            Rejection: The reason the fetch can't be started, or None if it was started
+        """
+        with self._lock:
+            if self.state is CircuitState.open:
+                if time.time() < self.opened_at + self.reset_timeout:
+                    return self._reject(Rejection.host_unavailable)
+                self.state = CircuitState.half_open
+            if self.state is CircuitState.half_open and self.trial_thread is not None:
+                return self._reject(Rejection.host_unavailable)
+            if self.max_concurrent and self.active >= self.max_concurrent:
+                return self._reject(Rejection.host_busy)
+            if self.state is CircuitState.half_open:
+                self.trial_thread = threading.current_thread().ident
+            self.active += 1
+            return None
+
+    def _reject(self, rejection):
+        """Counts a rejected fetch and returns the rejection"""
+        self.rejections[rejection.value] += 1
+        return rejection
+
+    def release(self, failed, host=None):
+        """
+        Finishes a fetch that was started with acquire()
+
+        Args:
+            failed (bool): Whether the fetch failed because of the host (e.g.: timed out or got a server error)
+            host (str): The host's name, for logging
+        """
+        with self._lock:
+            self.active -= 1
+            if self.state is not CircuitState.closed:
+                if self.trial_thread is None or self.trial_thread != threading.current_thread().ident:
+                    # The fetch started before the breaker opened, so it says nothing about whether the host is back
+                    return
+                self.trial_thread = None
+            if not failed:
+                if self.state is not CircuitState.closed:
+                    log.info(u"Closing the circuit breaker for manifest fetches from %s", host)
+                self.state = CircuitState.closed
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.state is CircuitState.half_open or (
+                    self.state is CircuitState.closed and self.consecutive_failures >= self.failure_threshold
+            ):
+                log.warning(
+                    u"Opening the circuit breaker for manifest fetches from %s after %d failures in a row",
+                    host,
+                    self.consecutive_failures,
+                )
+                self.state = CircuitState.open
+                self.opened_at = time.time()
+
+    @property
+    def idle(self):
+        """Returns True if no fetches are running and the host has no failures on record"""
+        return self.active == 0 and self.consecutive_failures == 0
+
+    def stats(self):
+        """Returns the breaker state, the number of running fetches and failures, and the rejection counts"""
+        with self._lock:
+            return {
+                "state": self.state.value,
+                "active": self.active,
+                "consecutive_failures": self.consecutive_failures,
+                "rejections": dict(self.rejections),
+            }
+
+
+class HostBulkheads(object):
+    """
+    The HostBulkhead for each host fetched from, for up to max_hosts hosts without running fetches (least recently
+    used first out)
+    """
+    def __init__(self, max_concurrent, failure_threshold, reset_timeout, max_hosts):
+        """
+        Args:
+            max_concurrent (int): The most fetches that can run at the same time per host, or None for no limit
+            failure_threshold (int): The number of failures in a row that opens a host's breaker
+            reset_timeout (float): Seconds that a host's breaker stays open before a trial fetch is let through
+            max_hosts (int): The most hosts to keep track of
+        """
+        self.max_concurrent = max_concurrent
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        # A host with running fetches isn't evicted, since a new HostBulkhead for it wouldn't count them
+        self.bulkheads = LRUCache(max_hosts, can_evict=lambda bulkhead: bulkhead.active == 0)
+        self._lock = threading.Lock()
+
+    def get(self, host):
+        """Returns the HostBulkhead for a host, creating it if needed"""
+        with self._lock:
+            bulkhead = self.bulkheads.get(host)
+            if bulkhead is None:
+                bulkhead = HostBulkhead(self.max_concurrent, self.failure_threshold, self.reset_timeout)
+                self.bulkheads.set(host, bulkhead)
+            return bulkhead
+
+    def clear(self):
+        """Forgets every host's limits and stats"""
+        self.bulkheads.clear()
+
+    def stats(self):
+        """
+        Returns the stats of every host that has running fetches, failures or rejections on record
+
+        Returns:
+            dict: The HostBulkhead.stats() for each host name
+        """
+        return {
+            host: bulkhead.stats()
+            for host, bulkhead in self.bulkheads.items()
+            if not bulkhead.idle or any(bulkhead.rejections.values())
+        }
@@ -0,0 +1,237 @@
+"""
+In-process and shared caches
+"""
+import hashlib
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from uuid import uuid4
+
+from django.core.cache import caches
+
+# The largest value stored under one key in a shared cache, a little under memcached's default 1MB item limit (a
+# larger value is dropped without an error)
+MAX_CACHE_ITEM_SIZE = 1000 * 1000
+
+
+class LRUCache(object):
+    """A thread-safe, size-bounded dict that evicts the least recently used entries first"""
+    def __init__(self, max_size, can_evict=None):
+        """
+        Args:
+            max_size (int): The most entries to keep
+            can_evict (callable): If given, only entries whose value it returns True for are evicted. The cache can
+                grow past max_size while none can be.
+        """
+        self.max_size = max_size
+        self.can_evict = can_evict
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """Returns the value for a key and marks it as the most recently used"""
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        """Sets the value for a key, evicting the least recently used entry if the cache is full"""
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.max_size:
+                if self.can_evict is None:
+                    self._data.popitem(last=False)
+                    continue
+                # The entry that was just set is kept, even if it could be evicted
+                evicted_key = next(
+                    (
+                        entry_key for entry_key, entry_value in self._data.iteritems()
+                        if entry_key != key and self.can_evict(entry_value)
+                    ),
+                    None,
+                )
+                if evicted_key is None:
+                    break
+                del self._data[evicted_key]
+
+    def items(self):
+        """Returns a list of the keys and values, least recently used first"""
+        with self._lock:
+            return list(self._data.items())
+
+    def delete(self, key):
+        """Removes a key if it exists"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Removes all keys"""
+        with self._lock:
+            self._data.clear()
+
+
+class TieredCache(object):
+    """
+    A cache with a per-process LRU tier in front of an optional Django cache backend that is shared between processes
+    """
+    def __init__(self, key_prefix, max_size, cache_alias=None, local_timeout=None):
+        """
+        Args:
+            key_prefix (str): A prefix for keys stored in the shared tier
+            max_size (int): The maximum number of entries in the per-process tier
+            cache_alias (str): The alias of the Django cache to use as the shared tier, or None for no shared tier
+            local_timeout (int): If set, the per-process tier keeps entries for at most this many seconds, so that
+                changes made to the shared tier by other processes are seen
+        """
+        self.key_prefix = key_prefix
+        self.local = LRUCache(max_size)
+        self.cache_alias = cache_alias
+        self.local_timeout = local_timeout
+
+    @property
+    def shared(self):
+        """Returns the Django cache used as the shared tier, or None"""
+        return caches[self.cache_alias] if self.cache_alias else None
+
+    def shared_key(self, key):
+        """Returns the key used for the shared tier (hashed, since keys may be arbitrarily long URLs)"""
+        return "{}:{}".format(self.key_prefix, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def set_local(self, key, value, expires):
+        """Sets the value for a key in the per-process tier, to expire at the given time"""
+        if self.local_timeout is not None:
+            expires = min(expires, time.time() + self.local_timeout)
+        self.local.set(key, (value, expires))
+
+    def get(self, key):
+        """Returns the value for a key from the first tier that has it, or None"""
+        local_entry = self.local.get(key)
+        if local_entry is not None:
+            value, expires = local_entry
+            if expires > time.time():
+                return value
+            self.local.delete(key)
+        if self.shared is None:
+            return None
+        shared_entry = self.shared.get(self.shared_key(key))
+        if shared_entry is None:
+            return None
+        value, expires = shared_entry
+        self.set_local(key, value, expires)
+        return value
+
+    def get_many(self, keys):
+        """
+        Returns the values for several keys, fetching the ones that aren't in the per-process tier from the shared
+        tier in a single round trip
+
+        Args:
+            keys (iterable of unicode): The keys
+        Returns:
+            dict: The value for each key that either tier has
+        """
+        values = {}
+        missing_keys = []
+        now = time.time()
+        for key in keys:
+            local_entry = self.local.get(key)
+            if local_entry is not None and local_entry[1] > now:
+                values[key] = local_entry[0]
+            else:
+                missing_keys.append(key)
+        if missing_keys and self.shared is not None:
+            keys_by_shared_key = {self.shared_key(key): key for key in missing_keys}
+            for shared_key, (value, expires) in self.shared.get_many(list(keys_by_shared_key)).items():
+                key = keys_by_shared_key[shared_key]
+                self.set_local(key, value, expires)
+                values[key] = value
+        return values
+
+    def set(self, key, value, timeout):
+        """
+        Sets the value for a key in both tiers
+
+        Args:
+            key (unicode): The key
+            value: The value, which must be picklable if there is a shared tier
+            timeout (int): The number of seconds to keep the value
+        """
+        # The expiry time is stored alongside the value so that the per-process tier can expire a value that it
+        # copied from the shared tier at the same time as the shared tier does
+        expires = time.time() + timeout
+        self.set_local(key, value, expires)
+        if self.shared is not None:
+            self.shared.set(self.shared_key(key), (value, expires), timeout)
+
+    def delete(self, key):
+        """Removes a key from both tiers"""
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(self.shared_key(key))
+
+
+def pickled_size(value):
+    """Returns the size in bytes of a value once it's pickled (as Django's cache backends do)"""
+    return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+def chunk_cache_keys(key, write_id, chunk_count):
+    """Returns the keys of the chunks of a value stored with set_chunked"""
+    return ["{}:{}:{}".format(key, write_id, number) for number in range(chunk_count)]
+
+
+def set_chunked(cache, key, value, timeout, chunk_size=MAX_CACHE_ITEM_SIZE):
+    """
+    Stores a value that may be too large for a single cache item, pickled and compressed and split across as many
+    keys as needed. Chunks are stored before the key that lists them, and under keys unique to this write, so a reader
+    never sees a mix of two writes. The previous write's chunks are deleted afterwards.
+
+    Args:
+        cache (BaseCache): A Django cache
+        key (str): The key
+        value: A picklable value
+        timeout (int): The number of seconds to keep the value
+        chunk_size (int): The largest chunk stored under one key
+    """
+    data = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    write_id = uuid4().hex
+    offsets = range(0, len(data), chunk_size)
+    chunk_keys = chunk_cache_keys(key, write_id, len(offsets))
+    previous_index = cache.get(key)
+    cache.set_many(
+        {chunk_key: data[offset:offset + chunk_size] for chunk_key, offset in zip(chunk_keys, offsets)}, timeout
+    )
+    cache.set(key, (write_id, len(chunk_keys)), timeout)
+    if previous_index is not None:
+        cache.delete_many(chunk_cache_keys(key, *previous_index))
+
+
+def get_chunked(cache, key):
+    """
+    Fetches a value stored with set_chunked
+
+    Args:
+        cache (BaseCache): A Django cache
+        key (str): The key
+    Returns:
+        The value, or None if it (or any of its chunks) isn't in the cache
+    """
+    index = cache.get(key)
+    if index is None:
+        return None
+    write_id, chunk_count = index
+    chunk_keys = chunk_cache_keys(key, write_id, chunk_count)
+    chunks = cache.get_many(chunk_keys)
+    if len(chunks) != chunk_count:
+        return None
+    return pickle.loads(zlib.decompress(b"".join(chunks[chunk_key] for chunk_key in chunk_keys)))
@@ -0,0 +1,209 @@
+"""
+Tracking changes to the videos in a course
+"""
+import hashlib
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Max
+from django.dispatch import Signal
+from django.utils import timezone
+
+from edx_video_api.models import VideoChange
+
+CHANGE_TOKEN_SETTLE_TIME = 10
+CHANGE_RETENTION = 60 * 60 * 24 * 30
+CHANGE_PRUNE_BATCH_SIZE = 1000
+READ_REPLICA_STICKY_TIMEOUT = 10
+
+# Sent with the ids of the courses whose videos changed, e.g. to rebuild their snapshots (see edx_video_api.signals)
+course_videos_changed_signal = Signal(providing_args=["course_ids"])
+
+
+def get_video_cache():
+    """Returns the Django cache used for data about course videos"""
+    return caches[settings.VIDEO_API.get("VIDEO_CACHE_ALIAS", "default")]
+
+
+def course_version_key(course_id):
+    """Returns the cache key for a course's video version"""
+    return "edx_video_api.course_version:{}".format(hashlib.sha1(unicode(course_id).encode("utf-8")).hexdigest())
+
+
+def course_recently_changed_key(course_id):
+    """Returns the cache key that marks a course's videos as recently changed"""
+    return "edx_video_api.course_recently_changed:{}".format(
+        hashlib.sha1(unicode(course_id).encode("utf-8")).hexdigest()
+    )
+
+
+def get_course_version(course_id):
+    """
+    Returns a token that changes whenever any of a course's videos change
+
+    Args:
+        course_id (unicode): A course id
+    Returns:
+        str: The course's current version token
+    """
+    cache = get_video_cache()
+    key = course_version_key(course_id)
+    version = cache.get(key)
+    if version is None:
+        # If the version was evicted, a new one is as good as a change; add() keeps concurrent requests consistent
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def course_videos_changed(course_ids):
+    """
+    Records that videos in some courses have changed, by giving those courses new version tokens, and sends
+    course_videos_changed_signal
+
+    Args:
+        course_ids (iterable of unicode): Course ids
+    """
+    course_ids = set(course_ids)
+    if not course_ids:
+        return
+    cache = get_video_cache()
+    cache.set_many({course_version_key(course_id): uuid4().hex for course_id in course_ids}, None)
+    # Reads of these courses' videos stay on the primary database for a while, since a replica may not have the
+    # changes yet (see edx_video_api.routing)
+    sticky_timeout = settings.VIDEO_API.get("READ_REPLICA_STICKY_TIMEOUT", READ_REPLICA_STICKY_TIMEOUT)
+    if sticky_timeout:
+        cache.set_many({course_recently_changed_key(course_id): True for course_id in course_ids}, sticky_timeout)
+    course_videos_changed_signal.send(sender=None, course_ids=course_ids)
+
+
+def courses_changed_recently(course_ids):
+    """
+    Returns True if the videos in any of some courses changed in the last READ_REPLICA_STICKY_TIMEOUT seconds
+
+    Args:
+        course_ids (iterable of unicode): Course ids
+    Returns:
+        bool: Whether any of the courses changed recently
+    """
+    keys = [course_recently_changed_key(course_id) for course_id in set(course_ids)]
+    return bool(keys) and bool(get_video_cache().get_many(keys))
+
+
+def video_changed(edx_video_id, course_ids):
+    """
+    Records that a video has been added to, changed in, or removed from some courses, in each course's change feed
+
+    Args:
+        edx_video_id (unicode): The video's id
+        course_ids (iterable of unicode): Course ids
+    """
+    course_ids = set(course_ids)
+    VideoChange.objects.bulk_create(
+        VideoChange(course_id=course_id, edx_video_id=edx_video_id) for course_id in course_ids
+    )
+    course_videos_changed(course_ids)
+
+
+def videos_changed(course_video_ids):
+    """
+    Records that several videos have changed, in their courses' change feeds, with a single insert
+
+    Args:
+        course_video_ids (iterable of tuple): The course id and edx_video_id of each video in each of its courses
+    """
+    course_video_ids = set(course_video_ids)
+    VideoChange.objects.bulk_create(
+        VideoChange(course_id=course_id, edx_video_id=edx_video_id) for course_id, edx_video_id in course_video_ids
+    )
+    course_videos_changed(course_id for course_id, _ in course_video_ids)
+
+
+def get_change_token(course_id, previous_token=0):
+    """
+    Returns a course's current change token. Changes recorded after the token was issued have greater ids.
+
+    A change that's still being committed can be given a smaller id than one that has already been committed, so the
+    token only covers changes older than the CHANGE_TOKEN_SETTLE_TIME setting. More recent changes are reported
+    again by the next request, so clients see every change at least once.
+
+    Args:
+        course_id (unicode): A course id
+        previous_token (int): The token that the client sent, which the returned token will never be less than
+    Returns:
+        int: The change token
+    """
+    settled = timezone.now() - timedelta(
+        seconds=settings.VIDEO_API.get("CHANGE_TOKEN_SETTLE_TIME", CHANGE_TOKEN_SETTLE_TIME)
+    )
+    latest_id = VideoChange.objects.filter(
+        course_id=course_id, id__gt=previous_token, changed__lte=settled
+    ).aggregate(latest_id=Max("id"))["latest_id"]
+    return max(latest_id or 0, previous_token)
+
+
+def get_change_retention():
+    """Returns the number of seconds for which changes are kept in the change feeds"""
+    return settings.VIDEO_API.get("CHANGE_RETENTION", CHANGE_RETENTION)
+
+
+def get_oldest_change_token():
+    """
+    Returns the oldest change token that the change feeds still cover: the id just before the oldest recorded change.
+    Changes with smaller ids have been pruned (or never existed), so a client with an older token has to resync.
+
+    Returns:
+        int: The oldest change token
+    """
+    settled = timezone.now() - timedelta(
+        seconds=settings.VIDEO_API.get("CHANGE_TOKEN_SETTLE_TIME", CHANGE_TOKEN_SETTLE_TIME)
+    )
+    oldest_change = VideoChange.objects.order_by("id").values_list("id", "changed").first()
+    # A change that's still being committed could have a smaller id than the oldest one, until it settles
+    if oldest_change is None or oldest_change[1] > settled:
+        return 0
+    return oldest_change[0] - 1
+
+
+def is_change_feed_expired(oldest_change_token, change_token=None, modified_since=None):
+    """
+    Returns True if changes made after a change token or a time may have been pruned from the change feeds
+
+    Args:
+        oldest_change_token (int): The token returned by get_oldest_change_token
+        change_token (int): A change token sent by a client
+        modified_since (datetime): A time sent by a client
+    Returns:
+        bool: Whether the client has to list all of a course's videos again
+    """
+    if change_token is not None and change_token < oldest_change_token:
+        return True
+    return modified_since is not None and modified_since < timezone.now() - timedelta(seconds=get_change_retention())
+
+
+def prune_video_changes(batch_size=CHANGE_PRUNE_BATCH_SIZE):
+    """
+    Deletes the changes recorded more than CHANGE_RETENTION seconds ago, a batch at a time. The most recent change is
+    always kept, so that the oldest change token that's still covered can be found.
+
+    Args:
+        batch_size (int): The number of changes deleted per query
+    Returns:
+        int: The number of changes deleted
+    """
+    cutoff = timezone.now() - timedelta(seconds=get_change_retention())
+    last_id = VideoChange.objects.filter(changed__lt=cutoff).aggregate(last_id=Max("id"))["last_id"]
+    if last_id is None:
+        return 0
+    # Changes are deleted by id, so that every change up to the oldest covered token is gone
+    last_id = min(last_id, VideoChange.objects.aggregate(latest_id=Max("id"))["latest_id"] - 1)
+    deleted = 0
+    while True:
+        ids = list(
+            VideoChange.objects.filter(id__lte=last_id).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += VideoChange.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,118 @@
+"""
+Course lookups
+"""
+from enum import Enum
+
+from django.conf import settings
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from edx_video_api.caching import TieredCache
+from edx_video_api.resolvers import resolve_setting
+
+COURSE_CACHE_SIZE = 1024
+COURSE_CACHE_LOCAL_TIMEOUT = 30
+COURSE_EXISTS_TIMEOUT = 60 * 5
+COURSE_NOT_FOUND_TIMEOUT = 30
+
+
+class CourseStatus(Enum):
+    """Whether a course id refers to an existing course"""
+    exists = "exists"
+    not_found = "not_found"
+    invalid_key = "invalid_key"
+
+
+course_cache = TieredCache(  # pylint: disable=invalid-name
+    "edx_video_api.courses",
+    settings.VIDEO_API.get("COURSE_CACHE_SIZE", COURSE_CACHE_SIZE),
+    cache_alias=settings.VIDEO_API.get("COURSE_CACHE_ALIAS", "default"),
+    local_timeout=settings.VIDEO_API.get("COURSE_CACHE_LOCAL_TIMEOUT", COURSE_CACHE_LOCAL_TIMEOUT),
+)
+
+
+def lookup_course_status(course_id):
+    """
+    Parses a course id and checks whether a CourseOverview exists for it
+
+    Args:
+        course_id (unicode): A course id
+    Returns:
+        CourseStatus: The course's status
+    """
+    try:
+        course_key = CourseKey.from_string(course_id)
+    except InvalidKeyError:
+        return CourseStatus.invalid_key
+    if resolve_setting("COURSE_OVERVIEW").get_from_id_if_exists(course_key) is None:
+        return CourseStatus.not_found
+    return CourseStatus.exists
+
+
+def cache_course_status(course_id, course_status):
+    """
+    Caches a course's status. Statuses for courses that don't exist are kept for less time than the others.
+
+    Args:
+        course_id (unicode): A course id
+        course_status (CourseStatus): The course's status
+    """
+    if course_status == CourseStatus.not_found:
+        timeout = settings.VIDEO_API.get("COURSE_NOT_FOUND_TIMEOUT", COURSE_NOT_FOUND_TIMEOUT)
+    else:
+        timeout = settings.VIDEO_API.get("COURSE_EXISTS_TIMEOUT", COURSE_EXISTS_TIMEOUT)
+    course_cache.set(course_id, course_status, timeout)
+
+
+def get_course_status(course_id):
+    """
+    Returns whether a course id refers to an existing course. Results are cached; results for courses that don't
+    exist are kept for less time than results for courses that do.
+
+    Args:
+        course_id (unicode): A course id
+    Returns:
+        CourseStatus: The course's status
+    """
+    course_status = course_cache.get(course_id)
+    if course_status is None:
+        course_status = lookup_course_status(course_id)
+        cache_course_status(course_id, course_status)
+    return course_status
+
+
+def get_course_statuses(course_ids):
+    """
+    Returns whether each of several course ids refers to an existing course. Cached results are read in one round
+    trip, and the courses that aren't cached are looked up with a single CourseOverview query.
+
+    Args:
+        course_ids (iterable of unicode): Course ids
+    Returns:
+        dict: The CourseStatus for each course id
+    """
+    course_statuses = course_cache.get_many(set(course_ids))
+    course_keys = {}
+    for course_id in set(course_ids) - set(course_statuses):
+        try:
+            course_keys[course_id] = CourseKey.from_string(course_id)
+        except InvalidKeyError:
+            course_statuses[course_id] = CourseStatus.invalid_key
+            cache_course_status(course_id, CourseStatus.invalid_key)
+    if course_keys:
+        course_overviews = resolve_setting("COURSE_OVERVIEW").get_from_ids_if_exists(list(course_keys.values()))
+        for course_id, course_key in course_keys.items():
+            course_status = CourseStatus.exists if course_overviews.get(course_key) else CourseStatus.not_found
+            course_statuses[course_id] = course_status
+            cache_course_status(course_id, course_status)
+    return course_statuses
+
+
+def invalidate_course_status(course_key):
+    """
+    Removes the cached status for a course
+
+    Args:
+        course_key (CourseKey or unicode): The course's key or id
+    """
+    course_cache.delete(unicode(course_key))
@@ -0,0 +1,465 @@
+"""
+HLS manifest validation
+"""
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from enum import Enum
+from urlparse import urljoin, urlparse
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from rest_framework import status
+
+from edx_video_api.bulkheads import HostBulkheads
+from edx_video_api.caching import TieredCache
+
+VALIDATION_CACHE_SIZE = 1024
+VALID_RESULT_TIMEOUT = 60 * 60
+INVALID_RESULT_TIMEOUT = 60
+VALIDATION_CACHE_RETENTION = 60 * 60 * 24
+MANIFEST_CONNECT_TIMEOUT = 3.05
+MANIFEST_READ_TIMEOUT = 5
+MANIFEST_FETCH_DEADLINE = 15
+MANIFEST_MAX_BYTES = 1024 * 1024
+# Playlists are read in chunks of this many bytes, so the size limit and deadline are checked even without newlines
+MANIFEST_CHUNK_SIZE = 16 * 1024
+MANIFEST_POOL_SIZE = 10
+MANIFEST_VARIANT_WORKERS = 4
+MANIFEST_MAX_VARIANTS = 10
+MANIFEST_HOST_MAX_CONCURRENT = 10
+MANIFEST_HOST_FAILURE_THRESHOLD = 5
+MANIFEST_HOST_RESET_TIMEOUT = 30
+MANIFEST_MAX_HOSTS = 1024
+MANIFEST_HEADER = b"#EXTM3U"
+# Either of these tags is enough to show that a manifest is a master playlist with at least one rendition
+MANIFEST_VARIANT_TAGS = (b"#EXT-X-STREAM-INF", b"#EXT-X-MEDIA")
+STREAM_INF_TAG = b"#EXT-X-STREAM-INF"
+SEGMENT_TAG = b"#EXTINF"
+END_LIST_TAG = b"#EXT-X-ENDLIST"
+# Attribute values can be quoted strings containing commas (e.g.: CODECS), so BANDWIDTH is matched at the start of
+# the attribute list or after a comma
+BANDWIDTH_PATTERN = re.compile(br"(?:^|,)BANDWIDTH=(\d+)")
+
+
+class ManifestFailure(Enum):
+    """Reasons why a URL does not point to a valid HLS manifest"""
+    timeout = "timeout"
+    connection_error = "connection_error"
+    invalid_url = "invalid_url"
+    http_error = "http_error"
+    too_large = "too_large"
+    not_a_manifest = "not_a_manifest"
+    no_variants = "no_variants"
+    host_busy = "host_busy"
+    host_unavailable = "host_unavailable"
+
+
+# Failures that say nothing about the manifest itself, because it wasn't fetched: the host already had as many
+# fetches running as it's allowed, or its circuit breaker was open
+REJECTED_FAILURES = (ManifestFailure.host_busy, ManifestFailure.host_unavailable)
+
+
+class ManifestReadError(Exception):
+    """Raised when a playlist can't be read within the fetcher's limits"""
+    def __init__(self, failure):
+        super(ManifestReadError, self).__init__(failure.value)
+        self.failure = failure
+
+
+class ManifestResult(namedtuple("ManifestResult", ["failure", "etag", "last_modified", "duration", "bitrate"])):
+    """
+    The result of validating an HLS manifest URL
+
+    Attributes:
+        failure (ManifestFailure): The reason the manifest is invalid, or None if it's valid
+        etag (str): The manifest's ETag response header, if any
+        last_modified (str): The manifest's Last-Modified response header, if any
+        duration (float): The video's duration in seconds (the sum of a variant playlist's segment durations), if
+            known
+        bitrate (int): The highest BANDWIDTH of the manifest's variants in bits per second, if known
+    """
+    __slots__ = ()
+
+    def __new__(cls, failure=None, etag=None, last_modified=None, duration=None, bitrate=None):
+        return super(ManifestResult, cls).__new__(cls, failure, etag, last_modified, duration, bitrate)
+
+    @property
+    def valid(self):
+        """Returns True if the manifest is valid"""
+        return self.failure is None
+
+    @property
+    def rejected(self):
+        """Returns True if the manifest wasn't fetched because of its host's limits"""
+        return self.failure in REJECTED_FAILURES
+
+    @property
+    def conditional_headers(self):
+        """Returns the request headers needed to revalidate the manifest"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ManifestFetcher(object):
+    """
+    Fetches HLS manifests over a pooled keep-alive HTTP session, with fetches bounded by timeouts and a maximum body
+    size. Manifests are streamed; without metadata extraction, they're only read until a variant tag shows they're
+    valid. With metadata extraction, the whole master playlist is read for its variants' bitrates, and the variant
+    playlists are fetched concurrently to work out the video's duration.
+
+    Fetches can be limited per host by HostBulkheads, which reject fetches from a host that already has too many
+    running or that keeps failing.
+    """
+    def __init__(  # pylint: disable=too-many-arguments
+            self, connect_timeout, read_timeout, deadline, max_bytes, pool_size,
+            extract_metadata=False, variant_workers=MANIFEST_VARIANT_WORKERS, max_variants=MANIFEST_MAX_VARIANTS,
+            bulkheads=None,
+    ):
+        """
+        Args:
+            connect_timeout (float): Seconds to wait for a connection
+            read_timeout (float): Seconds to wait for each read from the socket
+            deadline (float): Seconds to wait for the whole fetch, including any variant playlists
+            max_bytes (int): The largest playlist that will be read
+            pool_size (int): The number of keep-alive connections kept per host
+            extract_metadata (bool): Whether to work out the video's duration and bitrate
+            variant_workers (int): The maximum number of variant playlists fetched at the same time
+            max_variants (int): The maximum number of variant playlists fetched per manifest
+            bulkheads (HostBulkheads): The limits for fetches from each host, or None for no limits
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.deadline = deadline
+        self.max_bytes = max_bytes
+        self.extract_metadata = extract_metadata
+        self.variant_workers = variant_workers
+        self.max_variants = max_variants
+        self.bulkheads = bulkheads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def from_settings(cls):
+        """Returns a ManifestFetcher configured by settings.VIDEO_API"""
+        video_api_settings = settings.VIDEO_API
+        return cls(
+            connect_timeout=video_api_settings.get("MANIFEST_CONNECT_TIMEOUT", MANIFEST_CONNECT_TIMEOUT),
+            read_timeout=video_api_settings.get("MANIFEST_READ_TIMEOUT", MANIFEST_READ_TIMEOUT),
+            deadline=video_api_settings.get("MANIFEST_FETCH_DEADLINE", MANIFEST_FETCH_DEADLINE),
+            max_bytes=video_api_settings.get("MANIFEST_MAX_BYTES", MANIFEST_MAX_BYTES),
+            pool_size=video_api_settings.get("MANIFEST_POOL_SIZE", MANIFEST_POOL_SIZE),
+            extract_metadata=video_api_settings.get("HLS_EXTRACT_METADATA", False),
+            variant_workers=video_api_settings.get("MANIFEST_VARIANT_WORKERS", MANIFEST_VARIANT_WORKERS),
+            max_variants=video_api_settings.get("MANIFEST_MAX_VARIANTS", MANIFEST_MAX_VARIANTS),
+            bulkheads=HostBulkheads(
+                max_concurrent=video_api_settings.get("MANIFEST_HOST_MAX_CONCURRENT", MANIFEST_HOST_MAX_CONCURRENT),
+                failure_threshold=video_api_settings.get(
+                    "MANIFEST_HOST_FAILURE_THRESHOLD", MANIFEST_HOST_FAILURE_THRESHOLD
+                ),
+                reset_timeout=video_api_settings.get("MANIFEST_HOST_RESET_TIMEOUT", MANIFEST_HOST_RESET_TIMEOUT),
+                max_hosts=video_api_settings.get("MANIFEST_MAX_HOSTS", MANIFEST_MAX_HOSTS),
+            ),
+        )
+
+    def fetch(self, hls_url, previous_result=None):
+        """
+        Fetches a manifest and checks whether it's a valid HLS master playlist, unless its host's limits reject the
+        fetch. Timeouts, connection errors and server errors count as failures for the host's circuit breaker; any
+        other result (e.g.: a 404, an invalid URL, or a file that isn't a manifest) counts as a success.
+
+        Args:
+            hls_url (str): The manifest URL
+            previous_result (ManifestResult): An earlier result for the same URL. If given, the manifest is requested
+                conditionally, and that result is returned if the server says the manifest hasn't changed.
+        Returns:
+            ManifestResult: The result
+        """
+        if self.bulkheads is None:
+            return self.fetch_manifest(hls_url, previous_result)[0]
+        host = urlparse(hls_url).netloc.lower()
+        bulkhead = self.bulkheads.get(host)
+        rejection = bulkhead.acquire()
+        if rejection is not None:
+            return ManifestResult(ManifestFailure(rejection.value))
+        host_failed = False
+        try:
+            result, host_failed = self.fetch_manifest(hls_url, previous_result)
+            return result
+        finally:
+            bulkhead.release(host_failed, host=host)
+
+    def fetch_manifest(self, hls_url, previous_result=None):
+        """
+        Fetches a manifest and checks whether it's a valid HLS master playlist, without any per-host limits
+
+        Args:
+            hls_url (str): The manifest URL
+            previous_result (ManifestResult): An earlier result for the same URL, to request the manifest conditionally
+        Returns:
+            tuple: The ManifestResult, and whether the fetch failed because of the host (it timed out, couldn't
+                connect, or got a server error) rather than because of the manifest
+        """
+        deadline = time.time() + self.deadline
+        headers = previous_result.conditional_headers if previous_result else {}
+        try:
+            response = self.session.get(hls_url, headers=headers, timeout=self.timeout, stream=True)
+            with closing(response):
+                if response.status_code == status.HTTP_304_NOT_MODIFIED and previous_result:
+                    return previous_result, False
+                if response.status_code != status.HTTP_200_OK:
+                    return ManifestResult(ManifestFailure.http_error), status.is_server_error(response.status_code)
+                failure, variant_urls, bitrate = self.read_manifest(response, deadline)
+                result = ManifestResult(
+                    failure,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    bitrate=bitrate,
+                )
+        except requests.Timeout:
+            return ManifestResult(ManifestFailure.timeout), True
+        except (requests.exceptions.MissingSchema, requests.exceptions.InvalidSchema, requests.exceptions.InvalidURL):
+            # The URL can't be fetched from any host, so this isn't the host's failure
+            return ManifestResult(ManifestFailure.invalid_url), False
+        except requests.RequestException:
+            return ManifestResult(ManifestFailure.connection_error), True
+        if result.valid and variant_urls:
+            result = result._replace(duration=self.fetch_duration(
+                [urljoin(response.url or hls_url, variant_url) for variant_url in variant_urls],
+                deadline,
+            ))
+        return result, result.failure is ManifestFailure.timeout
+
+    def iter_playlist_lines(self, response, deadline):
+        """
+        Yields the non-blank lines of a streamed playlist response. The body is read in chunks of MANIFEST_CHUNK_SIZE
+        bytes, and the size limit and deadline are checked after each one, so a body without newlines can't be read
+        past either of them.
+
+        Args:
+            response (requests.Response): A response opened with stream=True
+            deadline (float): The time by which reading must be finished
+        Raises:
+            ManifestReadError: If the playlist is too large, or reading it takes too long
+        """
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            raise ManifestReadError(ManifestFailure.too_large)
+
+        bytes_read = 0
+        partial_line = b""
+        for chunk in response.iter_content(MANIFEST_CHUNK_SIZE):
+            bytes_read += len(chunk)
+            if bytes_read > self.max_bytes:
+                raise ManifestReadError(ManifestFailure.too_large)
+            if time.time() > deadline:
+                raise ManifestReadError(ManifestFailure.timeout)
+            lines = (partial_line + chunk).split(b"\n")
+            # The chunk's last line may continue in the next chunk
+            partial_line = lines.pop()
+            for line in lines:
+                # Stripping also removes the carriage return of CRLF line endings
+                line = line.strip()
+                if line:
+                    yield line
+        partial_line = partial_line.strip()
+        if partial_line:
+            yield partial_line
+
+    def read_manifest(self, response, deadline):
+        """
+        Reads a streamed master playlist response, until it's known to be valid or invalid (or to the end, when
+        extracting metadata)
+
+        Args:
+            response (requests.Response): A response opened with stream=True
+            deadline (float): The time by which reading must be finished
+        Returns:
+            tuple: The reason the manifest is invalid (or None if it's valid), the URLs of up to max_variants variant
+                playlists (only when extracting metadata), and the highest variant BANDWIDTH (or None)
+        """
+        seen_header = False
+        seen_variant = False
+        variant_urls = []
+        bitrate = None
+        expecting_variant_url = False
+        try:
+            for line in self.iter_playlist_lines(response, deadline):
+                if not seen_header:
+                    # The header must be the first line; a leading UTF-8 BOM is tolerated
+                    if line.lstrip(b"\xef\xbb\xbf") != MANIFEST_HEADER:
+                        return ManifestFailure.not_a_manifest, [], None
+                    seen_header = True
+                    continue
+                tag = line.split(b":", 1)[0]
+                if tag in MANIFEST_VARIANT_TAGS:
+                    seen_variant = True
+                    if not self.extract_metadata:
+                        break
+                if tag == STREAM_INF_TAG:
+                    bandwidth = BANDWIDTH_PATTERN.search(line.split(b":", 1)[-1])
+                    if bandwidth:
+                        variant_bitrate = int(bandwidth.group(1))
+                        bitrate = variant_bitrate if bitrate is None else max(bitrate, variant_bitrate)
+                    expecting_variant_url = True
+                elif expecting_variant_url and not line.startswith(b"#"):
+                    if len(variant_urls) < self.max_variants:
+                        try:
+                            variant_urls.append(line.decode("utf-8"))
+                        except UnicodeDecodeError:
+                            return ManifestFailure.not_a_manifest, [], None
+                    expecting_variant_url = False
+        except ManifestReadError as exc:
+            # Once a variant has been seen the manifest is known to be valid, even if the rest can't be read
+            if not seen_variant:
+                return exc.failure, [], None
+        if not seen_variant:
+            return (ManifestFailure.no_variants if seen_header else ManifestFailure.not_a_manifest), [], None
+        return None, variant_urls, bitrate
+
+    def fetch_duration(self, variant_urls, deadline):
+        """
+        Fetches variant playlists concurrently and returns the video's duration
+
+        Args:
+            variant_urls (list of str): Variant playlist URLs
+            deadline (float): The time by which every playlist must have been read
+        Returns:
+            float: The longest of the variants' durations in seconds, or None if none of them could be read
+        """
+        with ThreadPoolExecutor(max_workers=min(self.variant_workers, len(variant_urls))) as executor:
+            durations = [
+                duration for duration in executor.map(
+                    lambda variant_url: self.fetch_media_duration(variant_url, deadline), variant_urls
+                )
+                if duration is not None
+            ]
+        return max(durations) if durations else None
+
+    def fetch_media_duration(self, media_url, deadline):
+        """
+        Fetches a media playlist and adds up its segment durations
+
+        Args:
+            media_url (str): The media playlist URL
+            deadline (float): The time by which the playlist must have been read
+        Returns:
+            float: The playlist's duration in seconds, or None if it couldn't be read or has no segments
+        """
+        duration = None
+        try:
+            response = self.session.get(media_url, timeout=self.timeout, stream=True)
+            with closing(response):
+                if response.status_code != status.HTTP_200_OK:
+                    return None
+                lines = self.iter_playlist_lines(response, deadline)
+                if next(lines, b"").lstrip(b"\xef\xbb\xbf") != MANIFEST_HEADER:
+                    return None
+                for line in lines:
+                    if line.startswith(SEGMENT_TAG + b":"):
+                        # e.g.: #EXTINF:9.009,Segment title
+                        duration = (duration or 0) + float(line[len(SEGMENT_TAG) + 1:].split(b",", 1)[0])
+                    elif line == END_LIST_TAG:
+                        break
+        except (requests.RequestException, ManifestReadError, ValueError):
+            return None
+        return duration
+
+
+_manifest_fetcher = None  # pylint: disable=invalid-name
+_manifest_fetcher_lock = threading.Lock()  # pylint: disable=invalid-name
+
+
+def get_manifest_fetcher():
+    """Returns the ManifestFetcher that validation uses, which is created (with its session) on first use"""
+    global _manifest_fetcher  # pylint: disable=global-statement
+    with _manifest_fetcher_lock:
+        if _manifest_fetcher is None:
+            _manifest_fetcher = ManifestFetcher.from_settings()
+        return _manifest_fetcher
+
+
+def get_manifest_host_stats():
+    """
+    Returns the circuit breaker state and rejection counts for each manifest host that has running fetches, failures
+    or rejections on record in this process (see HostBulkheads.stats)
+    """
+    bulkheads = get_manifest_fetcher().bulkheads
+    return bulkheads.stats() if bulkheads is not None else {}
+
+
+validation_cache = TieredCache(  # pylint: disable=invalid-name
+    "edx_video_api.hls",
+    settings.VIDEO_API.get("HLS_VALIDATION_CACHE_SIZE", VALIDATION_CACHE_SIZE),
+    cache_alias=settings.VIDEO_API.get("HLS_VALIDATION_CACHE_ALIAS"),
+)
+
+
+def validate_hls_url(hls_url):
+    """
+    Checks if a given URL points to a valid HLS manifest. Results are cached (valid and invalid results for
+    different lengths of time), and expired results are revalidated with a conditional request. Results for fetches
+    rejected by the host's limits aren't cached.
+
+    Args:
+        hls_url (str): The manifest URL
+    Returns:
+        ManifestResult: The result
+    """
+    cached = validation_cache.get(hls_url)
+    now = time.time()
+    if cached is not None:
+        cached_result, expires = cached
+        if expires > now:
+            return cached_result
+    else:
+        cached_result = None
+
+    result = get_manifest_fetcher().fetch(hls_url, previous_result=cached_result)
+    if result.rejected:
+        # The manifest wasn't fetched, so there's nothing to cache
+        return result
+    if result.valid:
+        timeout = settings.VIDEO_API.get("HLS_VALID_RESULT_TIMEOUT", VALID_RESULT_TIMEOUT)
+    else:
+        timeout = settings.VIDEO_API.get("HLS_INVALID_RESULT_TIMEOUT", INVALID_RESULT_TIMEOUT)
+    # Results are kept for longer than they are fresh, so that expired ones can be revalidated
+    validation_cache.set(
+        hls_url,
+        (result, now + timeout),
+        max(timeout, settings.VIDEO_API.get("HLS_VALIDATION_CACHE_RETENTION", VALIDATION_CACHE_RETENTION)),
+    )
+    return result
+
+
+def is_valid_hls_url(hls_url):
+    """
+    Checks if a given URL points to a valid HLS manifest
+    """
+    return validate_hls_url(hls_url).valid
+
+
+def validate_hls_urls(hls_urls, max_workers):
+    """
+    Validates several HLS manifest URLs concurrently
+
+    Args:
+        hls_urls (iterable of str): The manifest URLs
+        max_workers (int): The maximum number of manifests to validate at the same time
+    Returns:
+        dict: A ManifestResult for each URL
+    """
+    hls_urls = list(set(hls_urls))
+    if not hls_urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(hls_urls))) as executor:
+        return dict(zip(hls_urls, executor.map(validate_hls_url, hls_urls)))
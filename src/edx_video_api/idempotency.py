@@ -0,0 +1,111 @@
+"""
+Replaying the responses to requests that are retried with the same Idempotency-Key header
+"""
+import hashlib
+import json
+from collections import namedtuple
+from functools import wraps
+from uuid import uuid4
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+from edx_video_api.changes import get_video_cache
+
+IDEMPOTENCY_KEY_HEADER = "HTTP_IDEMPOTENCY_KEY"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_KEY_TIMEOUT = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 60 * 5
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+StoredResponse = namedtuple("StoredResponse", ["fingerprint", "status_code", "data"])
+
+
+def idempotency_cache_key(request, course_id, idempotency_key):
+    """Returns the cache key for a stored response, which is scoped to the requesting user and the course"""
+    key_source = u"{}\n{}\n{}".format(request.user.pk, course_id, idempotency_key)
+    return "edx_video_api.idempotency:{}".format(hashlib.sha1(key_source.encode("utf-8")).hexdigest())
+
+
+def request_fingerprint(request):
+    """Returns a hash of a request's method, path, query parameters and data"""
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    fingerprint_source = json.dumps(
+        [request.method, request.path, sorted(request.query_params.lists()), data],
+        sort_keys=True,
+        default=unicode,
+    )
+    return hashlib.sha1(fingerprint_source.encode("utf-8")).hexdigest()
+
+
+def idempotent(view_func):
+    """
+    A decorator to wrap a view function that takes a course id parameter, so that a request with an Idempotency-Key
+    header that is retried gets the original response back instead of being processed again
+
+    Successful responses are stored (for the IDEMPOTENCY_KEY_TIMEOUT setting's number of seconds), and replayed with
+    an Idempotent-Replayed header. Error responses aren't stored, so a request that failed (e.g.: because its
+    manifest couldn't be fetched in time) can be retried with the same key.
+
+    Returns:
+        A 409 response if a request with the same key is still being processed, or a 422 response if the key was
+        used for a different request
+    """
+    @wraps(view_func)
+    def wrapped_function(self, request, **kwargs):
+        """
+        Wraps the given view function
+        """
+        idempotency_key = request.META.get(IDEMPOTENCY_KEY_HEADER)
+        if idempotency_key is None:
+            return view_func(self, request, **kwargs)
+        if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {"error": u"Idempotency-Key must be between 1 and {} characters".format(IDEMPOTENCY_KEY_MAX_LENGTH)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        cache = get_video_cache()
+        cache_key = idempotency_cache_key(request, kwargs.get("course_id"), idempotency_key)
+        lock_key = "{}:lock".format(cache_key)
+        fingerprint = request_fingerprint(request)
+        stored_response = cache.get(cache_key)
+        if stored_response is None:
+            lock_timeout = settings.VIDEO_API.get("IDEMPOTENCY_LOCK_TIMEOUT", IDEMPOTENCY_LOCK_TIMEOUT)
+            lock_owner = uuid4().hex
+            if not cache.add(lock_key, lock_owner, lock_timeout):
+                return Response(
+                    {"error": u"A request with this Idempotency-Key is being processed"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            try:
+                # The first request may have finished between the lookup and taking the lock
+                stored_response = cache.get(cache_key)
+                if stored_response is None:
+                    response = view_func(self, request, **kwargs)
+                    if status.is_success(response.status_code):
+                        cache.set(
+                            cache_key,
+                            StoredResponse(fingerprint, response.status_code, response.data),
+                            settings.VIDEO_API.get("IDEMPOTENCY_KEY_TIMEOUT", IDEMPOTENCY_KEY_TIMEOUT),
+                        )
+                    return response
+            finally:
+                # If this request outlived the lock, another request may hold it now, and it has to keep it. Django's
+                # cache can't compare and delete atomically, so the lock can still be deleted right after it changes
+                # hands, but only by a request that held it for the whole lock timeout.
+                if cache.get(lock_key) == lock_owner:
+                    cache.delete(lock_key)
+
+        if stored_response.fingerprint != fingerprint:
+            return Response(
+                {"error": u"This Idempotency-Key was used for a different request"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        response = Response(stored_response.data, status=stored_response.status_code)
+        response[REPLAYED_HEADER] = "true"
+        return response
+    return wrapped_function
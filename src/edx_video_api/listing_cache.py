@@ -0,0 +1,102 @@
+"""
+Cached course video listings, and the HTTP validators that they're sent with
+"""
+import calendar
+import hashlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.utils.http import quote_etag
+
+from edx_video_api.caching import MAX_CACHE_ITEM_SIZE, pickled_size
+from edx_video_api.changes import course_version_key, get_course_version, get_video_cache
+from edx_video_api.queries import course_videos_summary
+
+LISTING_CACHE_TIMEOUT = 60 * 5
+
+
+class CachedListing(namedtuple("CachedListing", ["version", "body", "content_type", "etag", "last_modified"])):
+    """
+    A rendered course video listing
+
+    Attributes:
+        version (str): The course version token that the listing was rendered for
+        body (bytes): The rendered response body
+        content_type (str): The response's Content-Type
+        etag (str): The response's ETag
+        last_modified (int): The response's last-modified timestamp, or None
+    """
+    __slots__ = ()
+
+
+def listing_cache_key(course_id, request):
+    """
+    Returns the cache key for a course's listing, which depends on the request's full URL (including its query
+    parameters) and its negotiated media type
+    """
+    key_source = u"{} {} {}".format(course_id, request.accepted_media_type, request.build_absolute_uri())
+    return "edx_video_api.listing:{}".format(hashlib.sha1(key_source.encode("utf-8")).hexdigest())
+
+
+def get_cached_listing(course_id, cache_key):
+    """
+    Fetches a course's current version token and its cached listing in a single cache round trip
+
+    Args:
+        course_id (unicode): A course id
+        cache_key (str): The listing's cache key
+    Returns:
+        tuple: The course's version token, and the cached listing (or None if there isn't one for that version)
+    """
+    version_key = course_version_key(course_id)
+    cached_values = get_video_cache().get_many([version_key, cache_key])
+    version = cached_values.get(version_key) or get_course_version(course_id)
+    listing = cached_values.get(cache_key)
+    if listing is None or listing.version != version:
+        return version, None
+    return version, listing
+
+
+def set_cached_listing(cache_key, listing):
+    """
+    Caches a rendered listing. It's replaced on the next request after the course's version token changes. A listing
+    that's larger than the CACHE_MAX_ITEM_SIZE setting isn't cached, since the cache could drop it without an error.
+
+    Args:
+        cache_key (str): The listing's cache key
+        listing (CachedListing): The rendered listing
+    """
+    if pickled_size(listing) > settings.VIDEO_API.get("CACHE_MAX_ITEM_SIZE", MAX_CACHE_ITEM_SIZE):
+        return
+    get_video_cache().set(
+        cache_key,
+        listing,
+        settings.VIDEO_API.get("LISTING_CACHE_TIMEOUT", LISTING_CACHE_TIMEOUT),
+    )
+
+
+def get_course_videos_validators(course_id, version, renderer_format):
+    """
+    Returns HTTP validators for a course's video listing, computed without loading any videos
+
+    Args:
+        course_id (unicode): A course id
+        version (str): The course's version token
+        renderer_format (str): The format of the listing's representation (e.g.: "json" or "msgpack")
+    Returns:
+        tuple: An ETag, and a last-modified timestamp (or None if the course has no videos)
+    """
+    summary = course_videos_summary(course_id)
+    # Video objects have no modification time, so the course's version token (which changes whenever a course
+    # video is saved or deleted) is what makes the ETag change when a video's fields change
+    etag_source = u"{}:{}:{}:{}:{}".format(
+        renderer_format,
+        version,
+        summary["count"],
+        summary["last_created"].isoformat() if summary["last_created"] else "",
+        summary["last_modified"].isoformat() if summary["last_modified"] else "",
+    )
+    etag = quote_etag(hashlib.md5(etag_source.encode("utf-8")).hexdigest())
+    timestamps = [timestamp for timestamp in (summary["last_created"], summary["last_modified"]) if timestamp]
+    last_modified = calendar.timegm(max(timestamps).utctimetuple()) if timestamps else None
+    return etag, last_modified
@@ -0,0 +1,21 @@
+"""
+Deletes changes that are older than the change feeds' retention window
+"""
+from django.core.management.base import BaseCommand
+
+from edx_video_api.changes import prune_video_changes
+
+
+class Command(BaseCommand):
+    """
+    Deletes old changes from the course change feeds
+    """
+    help = (
+        "Deletes the video changes recorded more than VIDEO_API['CHANGE_RETENTION'] seconds ago. Run it periodically "
+        "(e.g.: daily from cron). Clients whose change tokens are older than the oldest change that's kept are told to "
+        "resync."
+    )
+
+    def handle(self, *args, **options):
+        deleted = prune_video_changes()
+        self.stdout.write(u"Deleted {} video changes.".format(deleted))
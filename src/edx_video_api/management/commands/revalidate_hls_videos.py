@@ -0,0 +1,123 @@
+"""
+Revalidates the HLS manifests of existing videos, and updates the statuses of videos whose manifests have broken
+(or have been fixed)
+"""
+import json
+import os
+import time
+from collections import Counter
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from edx_video_api.hls import MANIFEST_HOST_MAX_CONCURRENT, ManifestFetcher
+from edx_video_api.revalidation import ManifestRevalidator, iter_hls_video_chunks
+
+REVALIDATION_CHUNK_SIZE = 500
+REVALIDATION_WORKERS = 32
+
+
+def read_checkpoint(path):
+    """Returns the last encoded video id recorded in a checkpoint file, or None if there isn't one"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path) as checkpoint_file:
+            return int(json.load(checkpoint_file)["after_id"])
+    except (KeyError, TypeError, ValueError) as exc:
+        raise CommandError(u"Invalid checkpoint file {}: {}".format(path, exc))
+
+
+def write_checkpoint(path, after_id):
+    """Records the last encoded video id that has been revalidated, replacing the checkpoint file atomically"""
+    temporary_path = u"{}.tmp".format(path)
+    with open(temporary_path, "w") as checkpoint_file:
+        json.dump({"after_id": after_id}, checkpoint_file)
+    os.rename(temporary_path, path)
+
+
+def format_counts(counts, dry_run):
+    """Returns a summary of revalidation counts"""
+    return (
+        u"Checked {checked} manifests: {valid} valid, {invalid} invalid, {unreachable} unreachable. "
+        u"{updated} video statuses {verb}."
+    ).format(
+        verb=u"would be updated" if dry_run else u"updated",
+        **{key: counts[key] for key in ("checked", "valid", "invalid", "unreachable", "updated")}
+    )
+
+
+class Command(BaseCommand):
+    """
+    Revalidates the HLS manifests of existing videos
+    """
+    help = (
+        "Revalidates the HLS manifests of videos created through this API with a pending, valid or invalid status, and "
+        "updates the statuses of videos whose manifests have become invalid or valid. Manifests that can't be reached "
+        "(e.g.: timeouts) leave their videos' statuses as they are."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=REVALIDATION_CHUNK_SIZE,
+            help="The number of videos read from the database, and updated, at a time",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=REVALIDATION_WORKERS,
+            help="The number of manifests fetched at the same time",
+        )
+        parser.add_argument(
+            "--host-limit", type=int,
+            default=settings.VIDEO_API.get("MANIFEST_HOST_MAX_CONCURRENT") or MANIFEST_HOST_MAX_CONCURRENT,
+            help="The number of manifests fetched at the same time from any one host",
+        )
+        parser.add_argument("--course-id", help="Only revalidate the videos in this course")
+        parser.add_argument(
+            "--all", action="store_true", dest="all_videos",
+            help="Revalidate every HLS video in edxval, including videos that weren't created through this API",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help=(
+                "A file to record progress in after each chunk. If it exists, the sweep resumes from it, and it's "
+                "removed once the sweep finishes."
+            ),
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Report the changes without updating any videos")
+
+    def handle(self, *args, **options):
+        if min(options["chunk_size"], options["workers"], options["host_limit"]) < 1:
+            raise CommandError(u"--chunk-size, --workers and --host-limit must be positive")
+        checkpoint = options["checkpoint"]
+        after_id = read_checkpoint(checkpoint)
+        if after_id is not None:
+            self.stdout.write(u"Resuming after encoded video {}".format(after_id))
+
+        fetcher = ManifestFetcher.from_settings()
+        # Only validity matters here, so manifests are read no further than their first variant
+        fetcher.extract_metadata = False
+        totals = Counter()
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            revalidator = ManifestRevalidator(fetcher, executor, options["host_limit"], dry_run=options["dry_run"])
+            for hls_videos in iter_hls_video_chunks(
+                    options["chunk_size"], after_id, options["course_id"], all_videos=options["all_videos"]
+            ):
+                chunk_start = time.time()
+                counts = revalidator.revalidate(hls_videos)
+                totals.update(counts)
+                totals["checked"] += len(hls_videos)
+                if checkpoint and not options["dry_run"]:
+                    write_checkpoint(checkpoint, hls_videos[-1].encoded_video_id)
+                self.stdout.write(u"{} ({:.1f} manifests/s in this chunk, {:.1f} overall)".format(
+                    format_counts(totals, options["dry_run"]),
+                    len(hls_videos) / max(time.time() - chunk_start, 1e-6),
+                    totals["checked"] / max(time.time() - start, 1e-6),
+                ))
+
+        if checkpoint and os.path.exists(checkpoint) and not options["dry_run"]:
+            os.remove(checkpoint)
+        self.stdout.write(
+            u"Finished in {:.1f}s. {}".format(time.time() - start, format_counts(totals, options["dry_run"]))
+        )
@@ -0,0 +1,40 @@
+"""
+Validates the manifests of videos created with ?async=1 that are still pending long after they should have been
+validated, e.g. because the process that was going to validate them was stopped
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from edx_video_api.tasks import (
+    INVALID_VIDEO_STATUS,
+    STALE_PENDING_VIDEO_AGE,
+    VALID_VIDEO_STATUS,
+    validate_stale_pending_videos,
+)
+
+
+class Command(BaseCommand):
+    """
+    Validates the manifests of stale pending videos
+    """
+    help = (
+        "Validates the manifests of videos created through this API that have been pending for longer than "
+        "--older-than seconds, and sets their statuses. Run it periodically (e.g.: every 10 minutes from cron). Videos "
+        "whose manifests' hosts reject the fetch stay pending until the next run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than", type=int, default=STALE_PENDING_VIDEO_AGE,
+            help="The number of seconds since a pending video was created after which it's validated",
+        )
+
+    def handle(self, *args, **options):
+        if options["older_than"] < 0:
+            raise CommandError(u"--older-than can't be negative")
+        counts = validate_stale_pending_videos(options["older_than"])
+        self.stdout.write(u"Validated {} pending videos: {} valid, {} invalid, {} still pending.".format(
+            sum(counts.values()),
+            counts[VALID_VIDEO_STATUS],
+            counts[INVALID_VIDEO_STATUS],
+            counts[None],
+        ))
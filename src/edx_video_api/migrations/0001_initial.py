@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 13:38
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_id', models.CharField(max_length=255)),
+                ('edx_video_id', models.CharField(max_length=100)),
+                ('changed', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='videochange',
+            index_together=set([('course_id', 'changed'), ('course_id', 'id')]),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 14:20
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edx_video_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseVideoSource',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_id', models.CharField(max_length=255)),
+                ('hls_url_hash', models.CharField(max_length=40)),
+                ('hls_url', models.CharField(max_length=200)),
+                ('edx_video_id', models.CharField(max_length=100)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='coursevideosource',
+            unique_together=set([('course_id', 'hls_url_hash')]),
+        ),
+    ]
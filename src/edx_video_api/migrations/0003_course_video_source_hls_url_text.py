@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:05
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edx_video_api', '0002_course_video_source'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='coursevideosource',
+            name='hls_url',
+            field=models.TextField(),
+        ),
+    ]
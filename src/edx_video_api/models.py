@@ -0,0 +1,47 @@
+"""
+edX Video API models
+"""
+from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+
+
+@python_2_unicode_compatible
+class VideoChange(models.Model):
+    """
+    A record that a video was added to, changed in, or removed from a course. Together these records make up a
+    per-course change feed, whose monotonically increasing ids are used as change tokens.
+    """
+    course_id = models.CharField(max_length=255)
+    edx_video_id = models.CharField(max_length=100)
+    changed = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        index_together = (
+            ("course_id", "id"),
+            ("course_id", "changed"),
+        )
+
+    def __str__(self):
+        return u"{} in {} at {}".format(self.edx_video_id, self.course_id, self.changed)
+
+
+@python_2_unicode_compatible
+class CourseVideoSource(models.Model):
+    """
+    The HLS URL that a course's video was created from, so that a request to create a video for the same course and
+    URL can find the existing video instead of creating a duplicate. URLs are looked up by their hashes, which keeps
+    the unique index small.
+    """
+    course_id = models.CharField(max_length=255)
+    hls_url_hash = models.CharField(max_length=40)
+    hls_url = models.TextField()
+    edx_video_id = models.CharField(max_length=100)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = (
+            ("course_id", "hls_url_hash"),
+        )
+
+    def __str__(self):
+        return u"{} in {} from {}".format(self.edx_video_id, self.course_id, self.hls_url)
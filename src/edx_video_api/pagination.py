@@ -0,0 +1,156 @@
+"""
+Cursor (keyset) pagination for video querysets
+"""
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_ORDERING = ("created", "edx_video_id")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def _split_ordering_field(ordering_field):
+    """
+    Splits an ordering field like "-created" into its field name and the lookup that selects the rows after it
+
+    Args:
+        ordering_field (str): A field name, optionally prefixed with "-" for descending order
+    Returns:
+        tuple: The field name and either "gt" or "lt"
+    """
+    if ordering_field.startswith("-"):
+        return ordering_field[1:], "lt"
+    return ordering_field, "gt"
+
+
+def _jsonable_cursor_value(value):
+    """Returns a JSON-serializable version of a value taken from an object's ordering fields"""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        # Full precision matters here; a truncated timestamp would skip or repeat rows
+        return value.isoformat()
+    return value
+
+
+def get_cursor_values(obj, ordering):
+    """
+    Returns the values of an object's ordering fields
+
+    Args:
+        obj (Model or dict): A model instance or a row returned by a values() queryset
+        ordering (iterable of str): Ordering field names
+    Returns:
+        list: The object's value for each ordering field
+    """
+    names = [_split_ordering_field(field)[0] for field in ordering]
+    if isinstance(obj, dict):
+        return [obj[name] for name in names]
+    return [getattr(obj, name) for name in names]
+
+
+def encode_cursor(values):
+    """
+    Encodes ordering field values as an opaque, URL-safe cursor
+
+    Args:
+        values (list): Values returned by get_cursor_values
+    Returns:
+        str: The encoded cursor
+    """
+    payload = json.dumps([_jsonable_cursor_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor, model, ordering):
+    """
+    Decodes a cursor created by encode_cursor
+
+    Args:
+        cursor (str): The encoded cursor
+        model (Model): The model class that the ordering fields belong to
+        ordering (iterable of str): Ordering field names
+    Returns:
+        list: Ordering field values, converted to their python types
+    Raises:
+        InvalidCursorError: If the cursor is malformed or does not match the ordering
+    """
+    try:
+        padded = cursor.encode("ascii") + b"=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded).decode("utf-8"))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise InvalidCursorError(u"Cursor does not match the ordering")
+        return [
+            model._meta.get_field(_split_ordering_field(field)[0]).to_python(value)  # pylint: disable=protected-access
+            for field, value in zip(ordering, values)
+        ]
+    except (TypeError, ValueError, ValidationError) as exc:
+        raise InvalidCursorError(u"Invalid cursor ('{}'): {}".format(cursor, exc))
+
+
+def keyset_filter(queryset, ordering, values):
+    """
+    Filters a queryset down to the rows that come after the given ordering field values
+
+    Args:
+        queryset (QuerySet): The queryset to filter
+        ordering (iterable of str): Ordering field names. The last one should be unique so the order is total.
+        values (list): The ordering field values of the last row already seen
+    Returns:
+        QuerySet: The filtered queryset
+    """
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name, lookup = _split_ordering_field(field)
+        clause = Q(**{"{}__{}".format(name, lookup): values[index]})
+        for previous_field, previous_value in zip(ordering[:index], values[:index]):
+            clause &= Q(**{_split_ordering_field(previous_field)[0]: previous_value})
+        condition |= clause
+    return queryset.filter(condition)
+
+
+def get_page(queryset, page_size, cursor_values=None, ordering=DEFAULT_ORDERING):
+    """
+    Fetches a single page of a queryset
+
+    Args:
+        queryset (QuerySet): The queryset to paginate
+        page_size (int): The maximum number of rows in the page
+        cursor_values (list): The ordering field values of the last row in the previous page, if any
+        ordering (iterable of str): Ordering field names
+    Returns:
+        tuple: The rows in the page, and the ordering field values for the next page (or None if this is the last page)
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor_values is not None:
+        queryset = keyset_filter(queryset, ordering, cursor_values)
+    # Fetching one extra row tells us whether there is another page without a COUNT query
+    rows = list(queryset[:page_size + 1])
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, get_cursor_values(rows[-1], ordering)
+    return rows, None
+
+
+def iter_pages(queryset, page_size, cursor_values=None, ordering=DEFAULT_ORDERING):
+    """
+    Iterates over a queryset one keyset page at a time, so only one page is ever held in memory
+
+    Args:
+        queryset (QuerySet): The queryset to iterate over
+        page_size (int): The number of rows to fetch per query
+        cursor_values (list): The ordering field values of the row to start after, if any
+        ordering (iterable of str): Ordering field names
+    Yields:
+        list: The rows in each page
+    """
+    while True:
+        rows, cursor_values = get_page(queryset, page_size, cursor_values=cursor_values, ordering=ordering)
+        if rows:
+            yield rows
+        if cursor_values is None:
+            return
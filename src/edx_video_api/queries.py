@@ -0,0 +1,177 @@
+"""
+Queries against the edxval video models
+"""
+from collections import defaultdict
+
+from django.db.models import Count, Max, Prefetch, Q
+from edxval.models import CourseVideo, EncodedVideo, Video
+
+from edx_video_api.models import VideoChange
+
+
+def visible_course_videos(course_id):
+    """
+    Returns a queryset of the videos that are visible in a course
+
+    Args:
+        course_id (str): A course id
+    Returns:
+        QuerySet: A queryset of Video objects
+    """
+    return Video.objects.filter(courses__course_id=unicode(course_id), courses__is_hidden=False)
+
+
+def course_videos_queryset(course_id):
+    """
+    Returns a queryset of the videos that are visible in a course, with their encoded videos prefetched
+
+    Args:
+        course_id (str): A course id
+    Returns:
+        QuerySet: A queryset of Video objects
+    """
+    return visible_course_videos(course_id).prefetch_related(
+        Prefetch("encoded_videos", queryset=EncodedVideo.objects.select_related("profile"))
+    )
+
+
+def batch_course_videos(course_ids):
+    """
+    Returns a queryset of the links between several courses and their visible videos, with the videos and their
+    encoded videos fetched along with them
+
+    Args:
+        course_ids (iterable of str): Course ids
+    Returns:
+        QuerySet: A queryset of CourseVideo objects, ordered by course id and then in the same order as a course's
+            paginated listing
+    """
+    return CourseVideo.objects.filter(
+        course_id__in=[unicode(course_id) for course_id in course_ids],
+        is_hidden=False,
+    ).select_related("video").prefetch_related(
+        Prefetch("video__encoded_videos", queryset=EncodedVideo.objects.select_related("profile"))
+    ).order_by("course_id", "video__created", "video__edx_video_id")
+
+
+def batch_course_video_counts(course_ids):
+    """
+    Counts the visible videos in each of several courses, with a single query
+
+    Args:
+        course_ids (iterable of str): Course ids
+    Returns:
+        dict: The number of videos for each course id, as it's stored in the database
+    """
+    return dict(CourseVideo.objects.filter(
+        course_id__in=[unicode(course_id) for course_id in course_ids],
+        is_hidden=False,
+    ).order_by().values("course_id").annotate(video_count=Count("id")).values_list("course_id", "video_count"))
+
+
+def course_video_values(course_id, columns):
+    """
+    Returns a values() queryset of the videos that are visible in a course, which only selects the given columns
+    (along with the columns that are needed to identify and paginate the videos)
+
+    Args:
+        course_id (str): A course id
+        columns (iterable of str): Video column names
+    Returns:
+        QuerySet: A queryset of dicts
+    """
+    required_columns = ["id", "created", "edx_video_id"]
+    return visible_course_videos(course_id).values(
+        *(required_columns + [column for column in columns if column not in required_columns])
+    )
+
+
+def encoded_video_values(video_ids):
+    """
+    Fetches the encoded videos for several videos in a single values() query
+
+    Args:
+        video_ids (iterable of int): Video primary keys
+    Returns:
+        dict: A list of encoded video dicts (with "url", "file_size", "bitrate" and "profile" values) for each video
+            primary key that has any encoded videos
+    """
+    encoded_videos = defaultdict(list)
+    rows = EncodedVideo.objects.filter(video_id__in=video_ids).order_by("id").values_list(
+        "video_id", "url", "file_size", "bitrate", "profile__profile_name"
+    )
+    for video_id, url, file_size, bitrate, profile_name in rows:
+        encoded_videos[video_id].append({
+            "url": url,
+            "file_size": file_size,
+            "bitrate": bitrate,
+            "profile": profile_name,
+        })
+    return encoded_videos
+
+
+def profile_video_ids(profile_names):
+    """
+    Returns the ids of the videos that have an encoded video with any of the given profiles, for filtering videos with
+    a subquery (a join on encoded videos would repeat the videos that have several)
+
+    Args:
+        profile_names (iterable of str): Profile names
+    Returns:
+        QuerySet: A values_list() queryset of Video primary keys
+    """
+    return EncodedVideo.objects.filter(profile__profile_name__in=list(profile_names)).values_list("video_id", flat=True)
+
+
+def course_videos_summary(course_id):
+    """
+    Summarizes the videos in a course with a single aggregate query, without loading any of them
+
+    Args:
+        course_id (str): A course id
+    Returns:
+        dict: The number of videos ("count"), and the latest video creation time ("last_created") and encoded video
+            modification time ("last_modified"), which are None if the course has no videos
+    """
+    return visible_course_videos(course_id).aggregate(
+        count=Count("id", distinct=True),
+        last_created=Max("created"),
+        last_modified=Max("encoded_videos__modified"),
+    )
+
+
+def changed_video_ids(course_id, change_token=None, modified_since=None):
+    """
+    Returns the ids of the videos in a course's change feed that changed after a change token or a time
+
+    Args:
+        course_id (str): A course id
+        change_token (int): If given, only changes with greater ids are included
+        modified_since (datetime): If given, only changes recorded after this time are included
+    Returns:
+        QuerySet: A values_list() queryset of distinct edx_video_ids
+    """
+    changes = VideoChange.objects.filter(course_id=unicode(course_id))
+    if change_token is not None:
+        changes = changes.filter(id__gt=change_token)
+    if modified_since is not None:
+        changes = changes.filter(changed__gt=modified_since)
+    return changes.order_by().values_list("edx_video_id", flat=True).distinct()
+
+
+def changed_course_videos(queryset, changed_ids, modified_since=None):
+    """
+    Filters a queryset of a course's videos down to the ones that have changed
+
+    Args:
+        queryset (QuerySet): A queryset of the videos that are visible in a course
+        changed_ids (QuerySet): The edx_video_ids returned by changed_video_ids
+        modified_since (datetime): If given, videos created after this time are included too, since videos that were
+            created before the change feed existed have no changes recorded for them
+    Returns:
+        QuerySet: The filtered queryset
+    """
+    condition = Q(edx_video_id__in=changed_ids)
+    if modified_since is not None:
+        condition |= Q(created__gt=modified_since)
+    return queryset.filter(condition)
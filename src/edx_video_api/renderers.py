@@ -0,0 +1,110 @@
+"""
+Renderers for video payloads. ujson and msgpack are optional; without them, responses are rendered by DRF's own
+JSON renderer, and MessagePack isn't offered. They're imported when the first response is rendered rather than at
+LMS startup.
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from edx_video_api.resolvers import import_optional
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# The most decimal places ujson (1.x, the last version for Python 2) writes floats with. Its default is 9.
+UJSON_DOUBLE_PRECISION = 15
+# Types that ujson encodes to the same bytes as JSONRenderer. Floats are checked one by one, and anything else
+# (e.g.: datetimes, Decimals, UUIDs, lazy translation strings) is rendered by JSONRenderer.
+UJSON_SCALAR_TYPES = (basestring, int, long, type(None))
+UJSON_CONTAINER_TYPES = (dict, list, tuple)
+
+
+def ujson_encodes_exactly(ujson, data):
+    """
+    Returns whether ujson would encode some data to the same bytes as JSONRenderer. ujson 1.x encodes datetimes as
+    epoch timestamps and other objects by their attributes rather than raising an error, and writes floats with a
+    fixed number of decimal places rather than their repr, so each value is checked before encoding.
+
+    Args:
+        ujson (module): The ujson module
+        data (any): Data to render
+    Returns:
+        bool: True if ujson's output would match JSONRenderer's
+    """
+    checked_floats = set()
+    pending = [data]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, UJSON_SCALAR_TYPES):
+            continue
+        if isinstance(value, float):
+            if value in checked_floats:
+                continue
+            try:
+                if ujson.dumps(value, double_precision=UJSON_DOUBLE_PRECISION) != repr(value):
+                    return False
+            except (ValueError, OverflowError):
+                return False
+            checked_floats.add(value)
+        elif isinstance(value, dict):
+            # JSONRenderer converts keys that aren't strings (e.g.: True to "true"); ujson doesn't do the same
+            if not all(isinstance(key, basestring) for key in value):
+                return False
+            pending.extend(value.itervalues())
+        elif isinstance(value, UJSON_CONTAINER_TYPES):
+            pending.extend(value)
+        else:
+            return False
+    return True
+
+
+class VideoJSONRenderer(JSONRenderer):
+    """
+    A JSON renderer that encodes with ujson when it's installed and its output would be byte for byte the same as
+    JSONRenderer's. Anything else (e.g.: datetimes, floats that ujson writes differently from their repr, NaN, very
+    large integers) is rendered by JSONRenderer.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        ujson = import_optional("ujson")
+        if (
+                ujson is None or data is None or not self.compact or self.ensure_ascii or
+                self.get_indent(accepted_media_type, renderer_context or {}) is not None or
+                not ujson_encodes_exactly(ujson, data)
+        ):
+            return super(VideoJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+        try:
+            ret = ujson.dumps(
+                data, ensure_ascii=False, escape_forward_slashes=False, double_precision=UJSON_DOUBLE_PRECISION
+            )
+        except (TypeError, ValueError, OverflowError):
+            return super(VideoJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer, escape the line and paragraph separators, which are valid in JSON but not in JavaScript
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class VideoMessagePackRenderer(BaseRenderer):
+    """Renders MessagePack, with the same values as the JSON representation"""
+    media_type = MSGPACK_MEDIA_TYPE
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # Values that MessagePack has no type for (e.g.: datetimes) are converted the same way as for JSON. Native
+        # (byte) strings, like the payloads' keys, are packed as str rather than bin, since they're text.
+        return import_optional("msgpack").packb(data, use_bin_type=False, default=JSONEncoder().default)
+
+
+def get_video_renderer_classes():
+    """
+    Returns the renderer classes for the video views: the configured default renderers, with VideoJSONRenderer in
+    place of JSONRenderer, followed by VideoMessagePackRenderer if msgpack is installed
+    """
+    renderer_classes = [
+        VideoJSONRenderer if renderer_class is JSONRenderer else renderer_class
+        for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES
+    ]
+    if import_optional("msgpack") is not None:
+        renderer_classes.append(VideoMessagePackRenderer)
+    return tuple(renderer_classes)
@@ -0,0 +1,48 @@
+"""
+Resolving classes and optional modules on first use, so that importing the plugin doesn't import them at LMS startup
+"""
+import importlib
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+_resolved_paths = {}
+_optional_modules = {}
+
+
+def resolve_setting(name):
+    """
+    Imports the object named by a dotted path in settings.VIDEO_API. Objects are cached by their dotted path, so a
+    setting that's changed (e.g.: in a test) is resolved again.
+
+    Args:
+        name (str): The setting's name, e.g.: COURSE_OVERVIEW
+    Returns:
+        The imported object
+    """
+    dotted_path = settings.VIDEO_API[name]
+    try:
+        return _resolved_paths[dotted_path]
+    except KeyError:
+        resolved = _resolved_paths[dotted_path] = import_string(dotted_path)
+        return resolved
+
+
+def import_optional(module_name):
+    """
+    Imports a module that may not be installed. The result is cached, so a missing module is only looked for once.
+
+    Args:
+        module_name (str): The module's name
+    Returns:
+        module: The module, or None if it isn't installed
+    """
+    try:
+        return _optional_modules[module_name]
+    except KeyError:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            module = None
+        _optional_modules[module_name] = module
+        return module
@@ -0,0 +1,187 @@
+"""
+Revalidating the HLS manifests of existing videos in bulk
+"""
+import threading
+from collections import Counter, OrderedDict, defaultdict, namedtuple
+from urlparse import urlparse
+
+from django.db import transaction
+from edxval.models import CourseVideo, EncodedVideo, Video
+
+from edx_video_api.changes import videos_changed
+from edx_video_api.hls import ManifestFailure
+from edx_video_api.models import CourseVideoSource
+from edx_video_api.tasks import INVALID_VIDEO_STATUS, PENDING_VIDEO_STATUS, VALID_VIDEO_STATUS
+
+HLS_PROFILE = "hls"
+# The statuses that this app gives HLS videos. Videos with any other status are left alone.
+REVALIDATED_STATUSES = (PENDING_VIDEO_STATUS, VALID_VIDEO_STATUS, INVALID_VIDEO_STATUS)
+# Failures that show a manifest is broken. Timeouts, connection errors and fetches rejected by a host's limits may
+# be temporary, so videos whose manifests couldn't be reached keep their status.
+INVALID_MANIFEST_FAILURES = (
+    ManifestFailure.http_error,
+    ManifestFailure.invalid_url,
+    ManifestFailure.too_large,
+    ManifestFailure.not_a_manifest,
+    ManifestFailure.no_variants,
+)
+
+HlsVideo = namedtuple("HlsVideo", ["encoded_video_id", "video_id", "edx_video_id", "status", "hls_url"])
+
+
+def iter_hls_video_chunks(chunk_size, after_id=None, course_id=None, all_videos=False):
+    """
+    Reads the HLS encoded videos of videos with one of the REVALIDATED_STATUSES, in order of their ids, with one
+    keyset-paginated query per chunk
+
+    Args:
+        chunk_size (int): The number of encoded videos per chunk
+        after_id (int): If given, only encoded videos with greater ids are read (e.g.: to resume from a checkpoint)
+        course_id (unicode): If given, only videos in this course are read
+        all_videos (bool): If True, every HLS video in edxval is read. Otherwise only videos created through this API
+            (which have a CourseVideoSource) are read, since file_complete is also the status of videos that other
+            apps manage.
+    Yields:
+        list of HlsVideo: The videos in each chunk
+    """
+    queryset = EncodedVideo.objects.filter(
+        profile__profile_name=HLS_PROFILE, video__status__in=REVALIDATED_STATUSES
+    )
+    if not all_videos:
+        queryset = queryset.filter(
+            video__edx_video_id__in=CourseVideoSource.objects.values("edx_video_id")
+        )
+    if course_id is not None:
+        queryset = queryset.filter(video__courses__course_id=unicode(course_id))
+    queryset = queryset.order_by("id").values_list("id", "video_id", "video__edx_video_id", "video__status", "url")
+    while True:
+        chunk_queryset = queryset if after_id is None else queryset.filter(id__gt=after_id)
+        hls_videos = [HlsVideo(*row) for row in chunk_queryset[:chunk_size]]
+        if not hls_videos:
+            return
+        yield hls_videos
+        after_id = hls_videos[-1].encoded_video_id
+
+
+def manifest_host(hls_url):
+    """Returns the host name of a manifest URL"""
+    return urlparse(hls_url).netloc.lower()
+
+
+def interleave_by_host(hls_videos):
+    """
+    Reorders videos so that consecutive videos have different manifest hosts wherever possible. This spreads a
+    worker pool's fetches across hosts, instead of having every worker wait for the same host's limit.
+
+    Args:
+        hls_videos (list of HlsVideo): Videos
+    Returns:
+        list of HlsVideo: The same videos, taking one from each host in turn
+    """
+    videos_by_host = OrderedDict()
+    for hls_video in hls_videos:
+        videos_by_host.setdefault(manifest_host(hls_video.hls_url), []).append(hls_video)
+    host_videos = list(videos_by_host.values())
+    return [
+        videos[index]
+        for index in range(max(len(videos) for videos in host_videos) if host_videos else 0)
+        for videos in host_videos
+        if index < len(videos)
+    ]
+
+
+def get_revalidated_status(manifest_result):
+    """
+    Returns the status a video should have after its manifest has been revalidated
+
+    Args:
+        manifest_result (ManifestResult): The result of fetching the manifest
+    Returns:
+        str: The new status, or None if the manifest couldn't be reached and the video's status should be kept
+    """
+    if manifest_result.valid:
+        return VALID_VIDEO_STATUS
+    if manifest_result.failure in INVALID_MANIFEST_FAILURES:
+        return INVALID_VIDEO_STATUS
+    return None
+
+
+def update_video_statuses(new_statuses):
+    """
+    Sets the statuses of several videos with one update per status, and records the changes in their courses'
+    change feeds
+
+    Args:
+        new_statuses (dict): The new status for each changed video, keyed by a (Video primary key, edx_video_id) tuple
+    Returns:
+        int: The number of videos that were updated
+    """
+    video_ids_by_status = defaultdict(list)
+    for (video_id, _), new_status in new_statuses.items():
+        video_ids_by_status[new_status].append(video_id)
+    updated_count = 0
+    with transaction.atomic():
+        for new_status, video_ids in video_ids_by_status.items():
+            # Videos that were given some other status in the meantime are left alone
+            updated_count += Video.objects.filter(
+                id__in=video_ids, status__in=REVALIDATED_STATUSES
+            ).exclude(status=new_status).update(status=new_status)
+        # update() doesn't send signals, so the changes are recorded here
+        videos_changed(CourseVideo.objects.filter(
+            video_id__in=[video_id for video_id, _ in new_statuses]
+        ).values_list("course_id", "video__edx_video_id"))
+    return updated_count
+
+
+class ManifestRevalidator(object):
+    """
+    Revalidates the manifests of existing HLS videos on a bounded pool of workers, with at most host_limit fetches
+    from any one host at the same time, and updates the videos whose statuses no longer match their manifests
+    """
+    def __init__(self, fetcher, executor, host_limit, dry_run=False):
+        """
+        Args:
+            fetcher (ManifestFetcher): Fetches the manifests (without any caching)
+            executor (concurrent.futures.Executor): The pool of workers that fetch the manifests
+            host_limit (int): The most fetches from any one host at the same time
+            dry_run (bool): If True, the statuses are counted but not updated
+        """
+        self.fetcher = fetcher
+        self.executor = executor
+        self.dry_run = dry_run
+        self.host_semaphores = defaultdict(lambda: threading.BoundedSemaphore(host_limit))
+        self._lock = threading.Lock()
+
+    def fetch(self, hls_video):
+        """Fetches a video's manifest, waiting while its host already has host_limit fetches running"""
+        with self._lock:
+            semaphore = self.host_semaphores[manifest_host(hls_video.hls_url)]
+        with semaphore:
+            return self.fetcher.fetch(hls_video.hls_url)
+
+    def revalidate(self, hls_videos):
+        """
+        Revalidates a chunk of videos' manifests and updates the videos whose statuses have changed
+
+        Args:
+            hls_videos (list of HlsVideo): Videos, as read by iter_hls_video_chunks
+        Returns:
+            Counter: The number of manifests that were "valid", "invalid" or "unreachable", and the number of videos
+                that were "updated"
+        """
+        hls_videos = interleave_by_host(hls_videos)
+        counts = Counter()
+        new_statuses = {}
+        for hls_video, manifest_result in zip(hls_videos, self.executor.map(self.fetch, hls_videos)):
+            new_status = get_revalidated_status(manifest_result)
+            if new_status is None:
+                counts["unreachable"] += 1
+                continue
+            counts["valid" if new_status == VALID_VIDEO_STATUS else "invalid"] += 1
+            if new_status != hls_video.status:
+                new_statuses[(hls_video.video_id, hls_video.edx_video_id)] = new_status
+        if self.dry_run:
+            counts["updated"] += len(new_statuses)
+        elif new_statuses:
+            counts["updated"] += update_video_statuses(new_statuses)
+        return counts
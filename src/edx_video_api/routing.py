@@ -0,0 +1,97 @@
+"""
+Routing the database reads for video listings to a read replica
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from edx_video_api.changes import courses_changed_recently
+
+_state = threading.local()
+
+
+def get_read_database():
+    """Returns the database alias that reads in the current thread are routed to, or None if they aren't routed"""
+    return getattr(_state, "alias", None)
+
+
+@contextmanager
+def route_reads(alias):
+    """
+    Routes the database reads in the current thread to a database while the block runs
+
+    Args:
+        alias (str): A database alias, or None to leave reads to the other routers (i.e.: the primary database)
+    """
+    previous_alias = get_read_database()
+    _state.alias = alias
+    try:
+        yield alias
+    finally:
+        _state.alias = previous_alias
+
+
+def read_replica_for_courses(course_ids):
+    """
+    Returns the database that reads of some courses' videos can be sent to: the READ_REPLICA_ALIAS database, unless
+    it isn't set (or isn't one of the DATABASES) or any of the courses' videos changed in the last
+    READ_REPLICA_STICKY_TIMEOUT seconds (so a replica that's behind can't hide a write, e.g.: a video that was just
+    created)
+
+    Args:
+        course_ids (iterable of unicode): Course ids
+    Returns:
+        str: The replica's alias, or None if reads should go to the primary database
+    """
+    alias = settings.VIDEO_API.get("READ_REPLICA_ALIAS")
+    if not alias or alias not in settings.DATABASES or courses_changed_recently(course_ids):
+        return None
+    return alias
+
+
+def reads_from_replica(course_ids):
+    """
+    Returns a context manager that routes the reads in its block to the read replica, if the courses can be read
+    from it (see read_replica_for_courses)
+
+    Args:
+        course_ids (iterable of unicode): The ids of the courses whose videos are read
+    """
+    return route_reads(read_replica_for_courses(course_ids))
+
+
+def iter_with_read_database(iterable):
+    """
+    Returns an iterator over an iterable (e.g.: the pages of a streamed response, which are read after the view has
+    returned) with reads routed to the database that the current thread's reads are routed to now
+
+    Args:
+        iterable (iterable): An iterable that reads from the database as it's iterated over
+    Returns:
+        iterator: The iterable's items
+    """
+    # This isn't a generator itself, so that the database is chosen when it's called rather than on the first next()
+    alias = get_read_database()
+    iterator = iter(iterable)
+
+    def iter_items():
+        """Yields the items, reading each one with reads routed to the chosen database"""
+        while True:
+            with route_reads(alias):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+    return iter_items()
+
+
+class ReadReplicaRouter(object):
+    """
+    Database router that sends reads to the database chosen with route_reads() (e.g.: by reads_from_replica()). It
+    doesn't route anything outside of those blocks, or any writes.
+    """
+    def db_for_read(self, model, **hints):  # pylint: disable=unused-argument
+        """Returns the database that reads in the current thread are routed to"""
+        return get_read_database()
@@ -0,0 +1,139 @@
+"""
+Serializing edxval videos into the JSON-serializable objects that the API responds with
+"""
+import re
+from collections import OrderedDict
+
+from edxval.models import Video
+
+from edx_video_api.queries import encoded_video_values
+
+# Video ids that reverse() leaves as they are in a URL, so their URLs can be built from a template
+URL_SAFE_VIDEO_ID = re.compile(r"^[-\w]+$")
+
+
+def dict_without_keys(d, *omitkeys):
+    """
+    Returns a copy of a dict without the specified keys
+    Args:
+        d (dict): A dict that to omit keys from
+        *omitkeys: Variable length list of keys to omit
+    Returns:
+        dict: A dict with omitted keys
+    """
+    return {key: d[key] for key in d.keys() if key not in omitkeys}
+
+
+def json_serialize_video(serialized_video):
+    """Returns a JSON-serializable version of an edxval-serialized video object"""
+    return {
+        "encoded_videos": [
+            dict_without_keys(encoded_video, "created", "modified")
+            for encoded_video in serialized_video["encoded_videos"]
+        ],
+        "url": serialized_video["url"],
+        "edx_video_id": serialized_video["edx_video_id"],
+        "client_video_id": serialized_video["client_video_id"],
+        "duration": serialized_video["duration"],
+        "status": serialized_video["status"]
+    }
+
+
+def serialize_new_video_data(video_data):
+    """
+    Returns the edxval-serialized version of a video that was just created from the given data, without reading it
+    back from the database. Values are normalized the same way that edxval's serializer normalizes them when the
+    video is created, so the result is identical to the one that get_videos_for_ids would return.
+
+    Args:
+        video_data (dict): Data that was passed to create_video
+    Returns:
+        dict: The serialized video
+    """
+    return {
+        "encoded_videos": [
+            OrderedDict([
+                ("url", unicode(encoded_video["url"]).strip()),
+                ("file_size", int(encoded_video["file_size"])),
+                ("bitrate", int(encoded_video["bitrate"])),
+                ("profile", encoded_video["profile"]),
+            ])
+            for encoded_video in video_data["encoded_videos"]
+        ],
+        "url": Video(edx_video_id=video_data["edx_video_id"]).get_absolute_url(),
+        "edx_video_id": video_data["edx_video_id"],
+        "client_video_id": unicode(video_data["client_video_id"]).strip(),
+        "duration": float(video_data["duration"]),
+        "status": unicode(video_data["status"]).strip(),
+    }
+
+
+def get_video_url_builder():
+    """
+    Returns a function that returns the URL for an edx_video_id, identical to the one that Video.get_absolute_url
+    returns. The URL pattern is reversed once, instead of once per video.
+    """
+    placeholder = "edx-video-api-video-id"
+    prefix, _, suffix = Video(edx_video_id=placeholder).get_absolute_url().partition(placeholder)
+
+    def video_url(edx_video_id):
+        """Returns a video's URL"""
+        if URL_SAFE_VIDEO_ID.match(edx_video_id):
+            return prefix + edx_video_id + suffix
+        return Video(edx_video_id=edx_video_id).get_absolute_url()
+    return video_url
+
+
+def json_serialize_video_instance(video, video_url=None):
+    """
+    Returns a JSON-serializable version of an edxval Video object. The result is identical to passing the
+    edxval-serialized version of the video to json_serialize_video.
+
+    Args:
+        video (Video): The video
+        video_url (callable): A function returned by get_video_url_builder, for serializing many videos
+    """
+    return {
+        "encoded_videos": [
+            {
+                "url": encoded_video.url,
+                "file_size": encoded_video.file_size,
+                "bitrate": encoded_video.bitrate,
+                "profile": encoded_video.profile.profile_name,
+            }
+            for encoded_video in video.encoded_videos.all()
+        ],
+        "url": video_url(video.edx_video_id) if video_url else video.get_absolute_url(),
+        "edx_video_id": video.edx_video_id,
+        "client_video_id": video.client_video_id,
+        "duration": video.duration,
+        "status": video.status
+    }
+
+
+def json_serialize_video_values(rows, fields):
+    """
+    Returns JSON-serializable versions of videos fetched with course_video_values, with only the given fields. Each
+    video's values are identical to the ones that json_serialize_video_instance returns. Encoded videos are only
+    fetched if they're requested.
+
+    Args:
+        rows (list of dict): Video values
+        fields (tuple of str): The fields to include
+    Returns:
+        list of dict: The serialized videos
+    """
+    encoded_videos = encoded_video_values([row["id"] for row in rows]) if "encoded_videos" in fields else {}
+    video_url = get_video_url_builder()
+    serialized_videos = []
+    for row in rows:
+        serialized_video = {}
+        for field in fields:
+            if field == "url":
+                serialized_video[field] = video_url(row["edx_video_id"])
+            elif field == "encoded_videos":
+                serialized_video[field] = encoded_videos.get(row["id"], [])
+            else:
+                serialized_video[field] = row[field]
+        serialized_videos.append(serialized_video)
+    return serialized_videos
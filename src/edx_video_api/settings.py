@@ -6,5 +6,110 @@ def plugin_settings(settings):
     settings.VIDEO_API = dict(
         AUTHENTICATION_CLASS="openedx.core.lib.api.authentication.OAuth2AuthenticationAllowInactiveUser",
         API_KEY_PERMISSION_CLASS="openedx.core.lib.api.permissions.ApiKeyHeaderPermission",
-        COURSE_OVERVIEW="openedx.core.djangoapps.content.course_overviews.models.CourseOverview"
+        COURSE_OVERVIEW="openedx.core.djangoapps.content.course_overviews.models.CourseOverview",
+        # Page size used for cursor-paginated listings when no "page_size" is requested, and the largest page allowed
+        DEFAULT_PAGE_SIZE=100,
+        MAX_PAGE_SIZE=1000,
+        # Number of videos fetched from the database per query when streaming a listing
+        STREAM_CHUNK_SIZE=500,
+        # HLS manifest validation results are cached per process (up to HLS_VALIDATION_CACHE_SIZE URLs) and, if
+        # HLS_VALIDATION_CACHE_ALIAS names a Django cache, shared between processes. Valid and invalid results stay
+        # fresh for different lengths of time, and are then revalidated with a conditional request.
+        HLS_VALIDATION_CACHE_SIZE=1024,
+        HLS_VALIDATION_CACHE_ALIAS=None,
+        HLS_VALID_RESULT_TIMEOUT=60 * 60,
+        HLS_INVALID_RESULT_TIMEOUT=60,
+        HLS_VALIDATION_CACHE_RETENTION=60 * 60 * 24,
+        # Bounds for fetching HLS manifests: per-connect and per-read timeouts, a deadline for the whole fetch (all in
+        # seconds), the largest manifest that will be read, and the number of keep-alive connections kept per host
+        MANIFEST_CONNECT_TIMEOUT=3.05,
+        MANIFEST_READ_TIMEOUT=5,
+        MANIFEST_FETCH_DEADLINE=15,
+        MANIFEST_MAX_BYTES=1024 * 1024,
+        MANIFEST_POOL_SIZE=10,
+        # Whether a video's duration and bitrate are read from its manifest when it's validated. The master playlist is
+        # then read to the end for its highest variant BANDWIDTH, and up to MANIFEST_MAX_VARIANTS variant playlists are
+        # fetched (MANIFEST_VARIANT_WORKERS at a time, within the same deadline) to add up their segment durations.
+        # It's off by default, since it costs several fetches per video; without it, a manifest is only read up to its
+        # first variant, and videos get a duration and bitrate of 0 (see "Manifest metadata" in the README).
+        HLS_EXTRACT_METADATA=False,
+        MANIFEST_VARIANT_WORKERS=4,
+        MANIFEST_MAX_VARIANTS=10,
+        # Limits for manifest fetches from each host (for up to MANIFEST_MAX_HOSTS hosts per process): at most
+        # MANIFEST_HOST_MAX_CONCURRENT fetches at the same time (None for no limit), and a circuit breaker that rejects
+        # fetches for MANIFEST_HOST_RESET_TIMEOUT seconds after MANIFEST_HOST_FAILURE_THRESHOLD timeouts, connection
+        # errors or server errors in a row. Rejected creates get a 503 response.
+        MANIFEST_HOST_MAX_CONCURRENT=10,
+        MANIFEST_HOST_FAILURE_THRESHOLD=5,
+        MANIFEST_HOST_RESET_TIMEOUT=30,
+        MANIFEST_MAX_HOSTS=1024,
+        # The most videos that can be created in one request, and the number of their manifests validated concurrently
+        BULK_CREATE_MAX_ITEMS=1000,
+        BULK_VALIDATION_WORKERS=8,
+        # The largest number of courses that can be listed in one request to the batch endpoint, and the largest number
+        # of videos in one batch response (courses that don't fit are reported as errors, to be listed on their own)
+        BATCH_MAX_COURSES=500,
+        BATCH_MAX_VIDEOS=10000,
+        # Course id lookups are cached per process (up to COURSE_CACHE_SIZE courses, for at most
+        # COURSE_CACHE_LOCAL_TIMEOUT seconds) and in the COURSE_CACHE_ALIAS Django cache. Existing and missing courses
+        # are cached for different lengths of time, and entries are removed when a course is published or deleted.
+        COURSE_CACHE_SIZE=1024,
+        COURSE_CACHE_ALIAS="default",
+        COURSE_CACHE_LOCAL_TIMEOUT=30,
+        COURSE_EXISTS_TIMEOUT=60 * 5,
+        COURSE_NOT_FOUND_TIMEOUT=30,
+        # The Django cache that holds data about each course's videos: the version token used in ETags, and rendered
+        # listings (kept for at most LISTING_CACHE_TIMEOUT seconds, and replaced as soon as the version changes)
+        VIDEO_CACHE_ALIAS="default",
+        LISTING_CACHE_TIMEOUT=60 * 5,
+        # The largest value stored under one cache key (memcached drops larger items without an error). Listings that
+        # are larger aren't cached, and larger snapshot data is split across several keys.
+        CACHE_MAX_ITEM_SIZE=1000 * 1000,
+        # Successful responses to create requests with an Idempotency-Key header are stored in the same cache for
+        # IDEMPOTENCY_KEY_TIMEOUT seconds. A request's key is locked while it's processed, for at most
+        # IDEMPOTENCY_LOCK_TIMEOUT seconds.
+        IDEMPOTENCY_KEY_TIMEOUT=60 * 60 * 24,
+        IDEMPOTENCY_LOCK_TIMEOUT=60 * 5,
+        # Change tokens only cover changes that are at least this many seconds old, so that changes still being
+        # committed when a token is issued are not skipped (they are sent again with the next token instead)
+        CHANGE_TOKEN_SETTLE_TIME=10,
+        # Changes are kept in the change feeds for CHANGE_RETENTION seconds, by running the prune_video_changes command.
+        # Requests with a change token or time from before the oldest change that's kept get a 410 response.
+        CHANGE_RETENTION=60 * 60 * 24 * 30,
+        # If SERVER_TIMING_ENABLED is set, responses have a Server-Timing header with the time (and the number of
+        # queries) spent in each phase of the request. METRICS_CALLBACK can be set to a function (or its dotted path)
+        # that is called with the same timings after each request, e.g. to send them to statsd. Phases are only timed
+        # if either is set.
+        SERVER_TIMING_ENABLED=False,
+        METRICS_CALLBACK=None,
+        # The number of threads per process that validate manifests for videos created with ?async=1, and the most
+        # validations that can be waiting, running or waiting to be retried in a process (more are left pending). A
+        # validation whose manifest host rejects the fetch is retried up to ASYNC_VALIDATION_MAX_RETRIES times. Videos
+        # that are still pending after that (or after their process was stopped) are validated by the
+        # validate_pending_videos command.
+        ASYNC_VALIDATION_WORKERS=4,
+        ASYNC_VALIDATION_MAX_QUEUED=1000,
+        ASYNC_VALIDATION_MAX_RETRIES=3,
+        # If AUTHENTICATION_CACHE_TIMEOUT is set, the user and token authenticated from a bearer token are kept in the
+        # AUTHENTICATION_CACHE_ALIAS Django cache for that many seconds (never past the token's expiry). Saving or
+        # deleting (e.g.: revoking) a token removes its entry. Changes to a user can take up to the timeout to apply.
+        AUTHENTICATION_CACHE_TIMEOUT=None,
+        AUTHENTICATION_CACHE_ALIAS="default",
+        # If READ_REPLICA_ALIAS is set to a database alias, video listings (including batch listings) read from that
+        # database. Listings of a course whose videos changed in the last READ_REPLICA_STICKY_TIMEOUT seconds (which
+        # should be longer than the replica's lag) read from the primary database, as do creates.
+        READ_REPLICA_ALIAS=None,
+        READ_REPLICA_STICKY_TIMEOUT=10,
+        # If SNAPSHOTS_ENABLED is set, each course's default listing (with no query parameters) is kept in the video
+        # cache as a gzip (and, if brotli is installed, br) compressed body for SNAPSHOT_TIMEOUT seconds, which is sent
+        # to clients that accept it. Snapshots are updated on a background thread with the videos that changed. A
+        # course whose compressed listing is larger than CACHE_MAX_ITEM_SIZE isn't snapshotted for SNAPSHOT_TIMEOUT.
+        SNAPSHOTS_ENABLED=False,
+        SNAPSHOT_TIMEOUT=60 * 60 * 24,
     )
+    # The router is always added, since READ_REPLICA_ALIAS is usually configured after this runs (e.g.: from the LMS's
+    # yaml config). It only routes reads inside the blocks that ask for the replica, and those only ask for it if the
+    # alias names one of the DATABASES, so it's a no-op without one.
+    database_routers = list(getattr(settings, "DATABASE_ROUTERS", []))
+    if "edx_video_api.routing.ReadReplicaRouter" not in database_routers:
+        settings.DATABASE_ROUTERS = database_routers + ["edx_video_api.routing.ReadReplicaRouter"]
@@ -0,0 +1,103 @@
+"""
+Signal receivers that keep cached data up to date
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+from edxval.models import CourseVideo, EncodedVideo, Video
+
+from edx_video_api.authentication import AUTHENTICATION_CACHE_TOKEN_MODELS, invalidate_token
+from edx_video_api.changes import course_videos_changed_signal, video_changed
+from edx_video_api.courses import invalidate_course_status
+from edx_video_api.resolvers import resolve_setting
+from edx_video_api.snapshots import schedule_snapshot_rebuilds
+
+
+def handle_course_changed(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """Handles a course being published or deleted in the modulestore"""
+    invalidate_course_status(course_key)
+
+
+def handle_course_overview_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Handles a CourseOverview being saved or deleted"""
+    invalidate_course_status(instance.id)
+
+
+def handle_access_token_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Handles an OAuth2 access token being saved (e.g.: expired) or deleted (e.g.: revoked)"""
+    invalidate_token(instance.token)
+
+
+def handle_video_saved(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """Handles an edxval Video being saved"""
+    # A new video isn't in any courses yet; adding it to a course is handled as a CourseVideo change
+    if not created:
+        video_changed(instance.edx_video_id, instance.courses.values_list("course_id", flat=True))
+
+
+def handle_course_video_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Handles an edxval CourseVideo being saved or deleted"""
+    video_changed(instance.video.edx_video_id, [instance.course_id])
+
+
+def handle_encoded_video_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Handles an edxval EncodedVideo being saved or deleted"""
+    video_changed(
+        instance.video.edx_video_id,
+        CourseVideo.objects.filter(video_id=instance.video_id).values_list("course_id", flat=True),
+    )
+
+
+def handle_course_videos_changed(sender, course_ids, **kwargs):  # pylint: disable=unused-argument
+    """Handles videos changing in some courses, by rebuilding the courses' snapshots if they're enabled"""
+    schedule_snapshot_rebuilds(course_ids)
+
+
+def connect_signals():
+    """Connects the signal receivers in this module"""
+    course_videos_changed_signal.connect(
+        handle_course_videos_changed, dispatch_uid="edx_video_api.course_videos_changed"
+    )
+    # Deleting a Video deletes its CourseVideos, so handling CourseVideo deletions covers that case
+    post_save.connect(handle_video_saved, sender=Video, dispatch_uid="edx_video_api.video_saved")
+    for signal in (post_save, post_delete):
+        signal.connect(
+            handle_course_video_changed,
+            sender=CourseVideo,
+            dispatch_uid="edx_video_api.course_video_changed",
+        )
+        signal.connect(
+            handle_encoded_video_changed,
+            sender=EncodedVideo,
+            dispatch_uid="edx_video_api.encoded_video_changed",
+        )
+    course_overview_class = resolve_setting("COURSE_OVERVIEW")
+    post_save.connect(
+        handle_course_overview_changed,
+        sender=course_overview_class,
+        dispatch_uid="edx_video_api.course_overview_saved",
+    )
+    post_delete.connect(
+        handle_course_overview_changed,
+        sender=course_overview_class,
+        dispatch_uid="edx_video_api.course_overview_deleted",
+    )
+    for token_model_path in settings.VIDEO_API.get(
+            "AUTHENTICATION_CACHE_TOKEN_MODELS", AUTHENTICATION_CACHE_TOKEN_MODELS
+    ):
+        try:
+            token_model = import_string(token_model_path)
+        except ImportError:
+            continue
+        for signal in (post_save, post_delete):
+            signal.connect(
+                handle_access_token_changed,
+                sender=token_model,
+                dispatch_uid="edx_video_api.access_token_changed",
+            )
+    try:
+        from xmodule.modulestore.django import SignalHandler  # pylint: disable=import-error
+    except ImportError:
+        return
+    SignalHandler.course_published.connect(handle_course_changed, dispatch_uid="edx_video_api.course_published")
+    SignalHandler.course_deleted.connect(handle_course_changed, dispatch_uid="edx_video_api.course_deleted")
@@ -0,0 +1,270 @@
+"""
+Precomputed, compressed snapshots of course video listings, which are kept up to date on a background worker
+"""
+import hashlib
+import logging
+import threading
+from collections import namedtuple
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import transaction
+from django.utils.http import quote_etag
+from django.utils.text import compress_string
+
+from edx_video_api.caching import MAX_CACHE_ITEM_SIZE, get_chunked, pickled_size, set_chunked
+from edx_video_api.changes import course_version_key, get_change_token, get_course_version, get_video_cache
+from edx_video_api.listing_cache import get_course_videos_validators
+from edx_video_api.queries import changed_video_ids, course_videos_queryset
+from edx_video_api.renderers import VideoJSONRenderer
+from edx_video_api.resolvers import import_optional
+from edx_video_api.serialization import get_video_url_builder, json_serialize_video_instance
+from edx_video_api.tasks import background_task
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+# Content codings in order of preference. br is only used if brotli is installed.
+SNAPSHOT_ENCODINGS = ("br", "gzip")
+SNAPSHOT_CONTENT_TYPE = "application/json"
+
+_executor = None  # pylint: disable=invalid-name
+_executor_lock = threading.Lock()  # pylint: disable=invalid-name
+_pending_course_ids = set()  # pylint: disable=invalid-name
+_pending_lock = threading.Lock()  # pylint: disable=invalid-name
+
+
+class CourseSnapshot(namedtuple("CourseSnapshot", ["version", "bodies", "etag", "last_modified"])):
+    """
+    A course's default video listing, compressed and ready to send
+
+    Attributes:
+        version (str): The course version token that the snapshot was built for
+        bodies (dict): The compressed response body for each content coding (e.g.: "gzip")
+        etag (str): The listing's ETag, before the content coding is added to it (see snapshot_etag)
+        last_modified (int): The listing's last-modified timestamp, or None
+    """
+    __slots__ = ()
+
+    @property
+    def too_large(self):
+        """
+        Whether this is a marker recording that the course's listing was too large to store (so it has no bodies),
+        which stops the course's snapshot from being rebuilt until the marker expires
+        """
+        return not self.bodies
+
+
+class SnapshotState(namedtuple("SnapshotState", ["change_token", "entries"])):
+    """
+    What a course's snapshot was built from, so it can be updated with only the videos that changed since then
+
+    Attributes:
+        change_token (int): The course's change token when the snapshot was built (see get_change_token)
+        entries (dict): The sort key (creation time and edx_video_id) and rendered JSON of each visible video, by
+            edx_video_id
+    """
+    __slots__ = ()
+
+
+def snapshots_enabled():
+    """Returns True if course snapshots are turned on with the SNAPSHOTS_ENABLED setting"""
+    return bool(settings.VIDEO_API.get("SNAPSHOTS_ENABLED"))
+
+
+def snapshot_key(course_id):
+    """Returns the cache key for a course's snapshot"""
+    return "edx_video_api.snapshot:{}".format(hashlib.sha1(unicode(course_id).encode("utf-8")).hexdigest())
+
+
+def snapshot_state_key(course_id):
+    """Returns the cache key for the state that a course's snapshot was built from"""
+    return "edx_video_api.snapshot_state:{}".format(hashlib.sha1(unicode(course_id).encode("utf-8")).hexdigest())
+
+
+def get_snapshot_encodings():
+    """Returns the content codings that snapshots are compressed with, in order of preference"""
+    return tuple(
+        encoding for encoding in SNAPSHOT_ENCODINGS if encoding != "br" or import_optional("brotli") is not None
+    )
+
+
+def compress_body(body, encoding):
+    """
+    Compresses a response body
+
+    Args:
+        body (bytes): The body
+        encoding (str): A content coding from SNAPSHOT_ENCODINGS
+    Returns:
+        bytes: The compressed body
+    """
+    if encoding == "br":
+        return import_optional("brotli").compress(body)
+    return compress_string(body)
+
+
+def get_accepted_encoding(request, encodings):
+    """
+    Returns the first of some content codings that a request's Accept-Encoding header allows
+
+    Args:
+        request (Request): The request
+        encodings (iterable of str): Content codings, in order of preference
+    Returns:
+        str: The content coding, or None if the request allows none of them
+    """
+    accepted = set()
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, _, params = item.partition(";")
+        if params.replace(" ", "").lower() in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    for encoding in encodings:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def snapshot_etag(etag, encoding):
+    """Returns the ETag of a snapshot's body in a content coding, which differs from the uncompressed body's"""
+    return quote_etag(u"{}-{}".format(etag.strip('"'), encoding))
+
+
+def get_course_snapshot(course_id):
+    """
+    Fetches a course's current version token and its snapshot in a single cache round trip
+
+    Args:
+        course_id (unicode): A course id
+    Returns:
+        tuple: The course's version token, and its snapshot (or None if there isn't one for that version). A marker
+            recording that the listing is too large is returned whatever its version.
+    """
+    version_key, key = course_version_key(course_id), snapshot_key(course_id)
+    cached_values = get_video_cache().get_many([version_key, key])
+    version = cached_values.get(version_key) or get_course_version(course_id)
+    snapshot = cached_values.get(key)
+    if snapshot is None or (snapshot.version != version and not snapshot.too_large):
+        return version, None
+    return version, snapshot
+
+
+def render_entries(videos):
+    """
+    Renders videos for a snapshot
+
+    Args:
+        videos (iterable of Video): Videos, with their encoded videos prefetched
+    Returns:
+        dict: The sort key and rendered JSON of each video, by edx_video_id
+    """
+    renderer = VideoJSONRenderer()
+    video_url = get_video_url_builder()
+    return {
+        video.edx_video_id: (
+            (video.created, video.edx_video_id),
+            renderer.render(json_serialize_video_instance(video, video_url=video_url)),
+        )
+        for video in videos
+    }
+
+
+def rebuild_course_snapshot(course_id):
+    """
+    Brings a course's snapshot up to date. If the course has a snapshot, only the videos in its change feed since the
+    snapshot was built are read and rendered again; otherwise every video is.
+
+    The state that the snapshot is built from is stored in chunks, but the compressed bodies are sent from a single
+    cache item. If they're larger than the CACHE_MAX_ITEM_SIZE setting, a marker is stored instead, and the course
+    isn't snapshotted again until the marker expires after SNAPSHOT_TIMEOUT seconds.
+
+    Args:
+        course_id (unicode): A course id
+    Returns:
+        CourseSnapshot: The new snapshot, or the marker if the listing is too large
+    """
+    with _pending_lock:
+        _pending_course_ids.discard(course_id)
+    cache = get_video_cache()
+    previous_snapshot = cache.get(snapshot_key(course_id))
+    if previous_snapshot is not None and previous_snapshot.too_large:
+        return previous_snapshot
+    state = get_chunked(cache, snapshot_state_key(course_id))
+    # The version is read first, so a change made while the snapshot is built leaves it out of date (and schedules
+    # another rebuild) rather than unnoticed
+    version = get_course_version(course_id)
+    previous_token = state.change_token if state is not None else 0
+    change_token = get_change_token(course_id, previous_token=previous_token)
+    queryset = course_videos_queryset(course_id)
+    if state is None:
+        entries = render_entries(queryset)
+    else:
+        # Changes after the change token may be recent enough to still be committing, so they're patched in again
+        # by the next rebuild
+        changed_ids = changed_video_ids(course_id, change_token=previous_token)
+        removed_ids = set(changed_ids)
+        entries = {
+            edx_video_id: entry for edx_video_id, entry in state.entries.items() if edx_video_id not in removed_ids
+        }
+        entries.update(render_entries(queryset.filter(edx_video_id__in=changed_ids)))
+
+    body = b"[" + b",".join(rendered for _, rendered in sorted(entries.values())) + b"]"
+    etag, last_modified = get_course_videos_validators(course_id, version, "json")
+    snapshot = CourseSnapshot(
+        version=version,
+        bodies={encoding: compress_body(body, encoding) for encoding in get_snapshot_encodings()},
+        etag=etag,
+        last_modified=last_modified,
+    )
+    timeout = settings.VIDEO_API.get("SNAPSHOT_TIMEOUT", SNAPSHOT_TIMEOUT)
+    max_size = settings.VIDEO_API.get("CACHE_MAX_ITEM_SIZE", MAX_CACHE_ITEM_SIZE)
+    if pickled_size(snapshot) > max_size:
+        log.info(u"The video listing for course %s is too large to snapshot (%d videos)", course_id, len(entries))
+        snapshot = snapshot._replace(bodies={})
+        cache.delete(snapshot_state_key(course_id))
+    else:
+        set_chunked(
+            cache,
+            snapshot_state_key(course_id),
+            SnapshotState(change_token=change_token, entries=entries),
+            timeout,
+            chunk_size=max_size,
+        )
+    cache.set(snapshot_key(course_id), snapshot, timeout)
+    return snapshot
+
+
+def get_snapshot_executor():
+    """Returns the process's snapshot worker, creating it on first use"""
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        if _executor is None:
+            # A single worker, so a course's snapshot is never rebuilt by two threads of a process at once
+            _executor = ThreadPoolExecutor(max_workers=1)
+        return _executor
+
+
+def schedule_snapshot_rebuilds(course_ids):
+    """
+    Rebuilds some courses' snapshots on the background worker once the current transaction commits (so the worker
+    can see the changes), if snapshots are enabled. A course that's already waiting for a rebuild isn't scheduled
+    again.
+
+    Args:
+        course_ids (iterable of unicode): Course ids
+    """
+    if not snapshots_enabled():
+        return
+    course_ids = set(course_ids)
+
+    def submit():
+        """Submits the rebuilds that aren't already waiting to the worker"""
+        with _pending_lock:
+            new_course_ids = course_ids - _pending_course_ids
+            _pending_course_ids.update(new_course_ids)
+        for course_id in new_course_ids:
+            get_snapshot_executor().submit(background_task(rebuild_course_snapshot), course_id)
+
+    if course_ids:
+        transaction.on_commit(submit)
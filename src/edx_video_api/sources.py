@@ -0,0 +1,68 @@
+"""
+Finding the videos that were created from HLS URLs
+"""
+import hashlib
+
+from edx_video_api.models import CourseVideoSource
+from edx_video_api.queries import course_videos_queryset
+
+
+def hls_url_hash(hls_url):
+    """Returns the hash that a CourseVideoSource's HLS URL is looked up by"""
+    return hashlib.sha1(hls_url.strip().encode("utf-8")).hexdigest()
+
+
+def get_videos_by_hls_url(course_id, hls_urls):
+    """
+    Finds the visible videos in a course that were created from any of the given HLS URLs. Sources whose videos are
+    no longer visible in the course are removed, so that new videos can be created from their URLs.
+
+    Args:
+        course_id (unicode): A course id
+        hls_urls (iterable of unicode): HLS URLs
+    Returns:
+        dict: The Video object (with its encoded videos prefetched) for each HLS URL that a visible video was created
+            from
+    """
+    hashes = {hls_url: hls_url_hash(hls_url) for hls_url in hls_urls}
+    if not hashes:
+        return {}
+    sources = list(CourseVideoSource.objects.filter(
+        course_id=unicode(course_id), hls_url_hash__in=set(hashes.values())
+    ).values_list("id", "hls_url_hash", "edx_video_id"))
+    if not sources:
+        return {}
+    videos = {
+        video.edx_video_id: video
+        for video in course_videos_queryset(course_id).filter(
+            edx_video_id__in=[edx_video_id for _, _, edx_video_id in sources]
+        )
+    }
+    stale_source_ids = [source_id for source_id, _, edx_video_id in sources if edx_video_id not in videos]
+    if stale_source_ids:
+        CourseVideoSource.objects.filter(id__in=stale_source_ids).delete()
+    videos_by_hash = {
+        url_hash: videos[edx_video_id] for _, url_hash, edx_video_id in sources if edx_video_id in videos
+    }
+    return {
+        hls_url: videos_by_hash[url_hash] for hls_url, url_hash in hashes.items() if url_hash in videos_by_hash
+    }
+
+
+def record_video_source(course_id, hls_url, edx_video_id):
+    """
+    Records the HLS URL that a course's video was created from
+
+    Args:
+        course_id (unicode): A course id
+        hls_url (unicode): The HLS URL
+        edx_video_id (unicode): The video's id
+    Raises:
+        IntegrityError: If a video in the course has already been created from the URL
+    """
+    CourseVideoSource.objects.create(
+        course_id=unicode(course_id),
+        hls_url_hash=hls_url_hash(hls_url),
+        hls_url=hls_url.strip(),
+        edx_video_id=edx_video_id,
+    )
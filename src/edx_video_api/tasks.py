@@ -0,0 +1,238 @@
+"""
+Background validation of HLS manifests for videos created asynchronously
+"""
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+from functools import wraps
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from edxval.models import CourseVideo, EncodedVideo, Video
+
+from edx_video_api.changes import video_changed
+from edx_video_api.hls import MANIFEST_HOST_RESET_TIMEOUT, validate_hls_url
+from edx_video_api.models import CourseVideoSource
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+# Studio shows videos with this status as "In Progress"
+PENDING_VIDEO_STATUS = "ingest"
+VALID_VIDEO_STATUS = "file_complete"
+INVALID_VIDEO_STATUS = "invalid_token"
+ASYNC_VALIDATION_WORKERS = 4
+ASYNC_VALIDATION_MAX_QUEUED = 1000
+ASYNC_VALIDATION_MAX_RETRIES = 3
+STALE_PENDING_VIDEO_AGE = 60 * 10
+
+_executor = None  # pylint: disable=invalid-name
+_executor_lock = threading.Lock()  # pylint: disable=invalid-name
+_queued_count = 0  # pylint: disable=invalid-name
+_queued_lock = threading.Lock()  # pylint: disable=invalid-name
+
+
+def get_validation_executor():
+    """Returns the process's pool of background validation workers, creating it on first use"""
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.VIDEO_API.get("ASYNC_VALIDATION_WORKERS", ASYNC_VALIDATION_WORKERS)
+            )
+        return _executor
+
+
+def background_task(func):
+    """
+    Wraps a function that runs on a background worker thread, so that it uses its own database connection and
+    logs any exception instead of losing it in an unread future
+    """
+    @wraps(func)
+    def wrapped_function(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u"Background task %s failed", func.__name__)
+        finally:
+            connection.close()
+    return wrapped_function
+
+
+def validate_video_manifest(edx_video_id, hls_url, attempt=0):
+    """
+    Validates the manifest for a pending video and sets its final status, along with the duration and bitrate
+    taken from the manifest if they're known
+
+    Args:
+        edx_video_id (unicode): The video's id
+        hls_url (str): The video's manifest URL
+        attempt (int): The number of times the manifest's host has already rejected the fetch
+    Returns:
+        str: The video's new status, or None if the video was no longer pending or its manifest's host rejected the
+            fetch (in which case it's retried later, up to ASYNC_VALIDATION_MAX_RETRIES times)
+    """
+    result = validate_hls_url(hls_url)
+    if result.rejected:
+        # The manifest wasn't fetched, so the video stays pending until it's validated again
+        log.warning(
+            u"Could not validate the HLS manifest for video %s (reason: %s)", edx_video_id, result.failure.value
+        )
+        retry_manifest_validation(edx_video_id, hls_url, attempt + 1)
+        return None
+    new_status = VALID_VIDEO_STATUS if result.valid else INVALID_VIDEO_STATUS
+    video_updates = {"status": new_status}
+    if result.duration is not None:
+        video_updates["duration"] = result.duration
+    # Only a pending video is updated, in case the video was changed by something else in the meantime
+    if not Video.objects.filter(edx_video_id=edx_video_id, status=PENDING_VIDEO_STATUS).update(**video_updates):
+        return None
+    if result.bitrate is not None:
+        EncodedVideo.objects.filter(
+            video__edx_video_id=edx_video_id, profile__profile_name="hls"
+        ).update(bitrate=result.bitrate)
+    # update() doesn't send signals, so the change is recorded here
+    video_changed(
+        edx_video_id,
+        CourseVideo.objects.filter(video__edx_video_id=edx_video_id).values_list("course_id", flat=True),
+    )
+    if not result.valid:
+        log.info(u"Video %s has an invalid HLS manifest (reason: %s)", edx_video_id, result.failure.value)
+    return new_status
+
+
+def reserve_validation_slot():
+    """
+    Takes one of the ASYNC_VALIDATION_MAX_QUEUED places for validations that are waiting, running or scheduled to be
+    retried in this process
+
+    Returns:
+        bool: Whether a place was free
+    """
+    global _queued_count  # pylint: disable=global-statement
+    with _queued_lock:
+        if _queued_count >= settings.VIDEO_API.get("ASYNC_VALIDATION_MAX_QUEUED", ASYNC_VALIDATION_MAX_QUEUED):
+            return False
+        _queued_count += 1
+        return True
+
+
+def release_validation_slot(future=None):  # pylint: disable=unused-argument
+    """Frees a place taken by reserve_validation_slot, e.g. when the validation's future is done"""
+    global _queued_count  # pylint: disable=global-statement
+    with _queued_lock:
+        _queued_count -= 1
+
+
+def submit_reserved_validation(edx_video_id, hls_url, attempt):
+    """
+    Validates the manifest for a pending video on a background worker, in a place that's already been reserved
+
+    Args:
+        edx_video_id (unicode): The video's id
+        hls_url (str): The video's manifest URL
+        attempt (int): The number of times the manifest's host has already rejected the fetch
+    """
+    try:
+        future = get_validation_executor().submit(
+            background_task(validate_video_manifest), edx_video_id, hls_url, attempt=attempt
+        )
+    except Exception:
+        release_validation_slot()
+        raise
+    future.add_done_callback(release_validation_slot)
+
+
+def submit_manifest_validation(edx_video_id, hls_url, attempt=0):
+    """
+    Validates the manifest for a pending video on a background worker, unless ASYNC_VALIDATION_MAX_QUEUED
+    validations are already waiting, running or scheduled to be retried in this process. A video that isn't
+    validated here stays pending until validate_stale_pending_videos finds it.
+
+    Args:
+        edx_video_id (unicode): The video's id
+        hls_url (str): The video's manifest URL
+        attempt (int): The number of times the manifest's host has already rejected the fetch
+    Returns:
+        bool: Whether the validation was submitted
+    """
+    if not reserve_validation_slot():
+        log.warning(u"Too many queued manifest validations, leaving video %s pending", edx_video_id)
+        return False
+    submit_reserved_validation(edx_video_id, hls_url, attempt)
+    return True
+
+
+def retry_manifest_validation(edx_video_id, hls_url, attempt):
+    """
+    Submits a pending video's manifest validation again after its host rejected the fetch, once the host's circuit
+    breaker could have closed (waiting twice as long for each attempt). A waiting retry takes one of the
+    ASYNC_VALIDATION_MAX_QUEUED places, so the number of retry timers is bounded too. After
+    ASYNC_VALIDATION_MAX_RETRIES attempts, or if there's no place for the retry, the video is left for
+    validate_stale_pending_videos.
+
+    Args:
+        edx_video_id (unicode): The video's id
+        hls_url (str): The video's manifest URL
+        attempt (int): The number of times the manifest's host has rejected the fetch
+    Returns:
+        bool: Whether the retry was scheduled
+    """
+    if attempt > settings.VIDEO_API.get("ASYNC_VALIDATION_MAX_RETRIES", ASYNC_VALIDATION_MAX_RETRIES):
+        return False
+    if not reserve_validation_slot():
+        log.warning(u"Too many queued manifest validations, leaving video %s pending", edx_video_id)
+        return False
+    delay = settings.VIDEO_API.get("MANIFEST_HOST_RESET_TIMEOUT", MANIFEST_HOST_RESET_TIMEOUT) * 2 ** (attempt - 1)
+    timer = threading.Timer(delay, submit_reserved_validation, args=(edx_video_id, hls_url, attempt))
+    timer.daemon = True
+    timer.start()
+    return True
+
+
+def schedule_manifest_validation(edx_video_id, hls_url):
+    """
+    Validates the manifest for a pending video on a background worker, once the current transaction commits
+    (so that the worker can see the video)
+
+    Args:
+        edx_video_id (unicode): The video's id
+        hls_url (str): The video's manifest URL
+    """
+    transaction.on_commit(lambda: submit_manifest_validation(edx_video_id, hls_url))
+
+
+def get_stale_pending_videos(older_than=STALE_PENDING_VIDEO_AGE):
+    """
+    Returns the videos created through this API that have been pending for longer than they should take to validate,
+    e.g. because the process that was going to validate them was stopped
+
+    Args:
+        older_than (int): The number of seconds since a video was created after which it's stale
+    Returns:
+        list of tuple: The edx_video_id and manifest URL of each stale video
+    """
+    return list(CourseVideoSource.objects.filter(
+        created__lt=timezone.now() - timedelta(seconds=older_than),
+        edx_video_id__in=Video.objects.filter(status=PENDING_VIDEO_STATUS).values("edx_video_id"),
+    ).order_by("id").values_list("edx_video_id", "hls_url").distinct())
+
+
+def validate_stale_pending_videos(older_than=STALE_PENDING_VIDEO_AGE):
+    """
+    Validates the manifests of stale pending videos (see get_stale_pending_videos) in the current thread
+
+    Args:
+        older_than (int): The number of seconds since a video was created after which it's stale
+    Returns:
+        Counter: The number of videos given each new status, and the number left pending (under None)
+    """
+    # The sweep runs again later, so fetches that are rejected now aren't retried in the background
+    last_attempt = settings.VIDEO_API.get("ASYNC_VALIDATION_MAX_RETRIES", ASYNC_VALIDATION_MAX_RETRIES)
+    return Counter(
+        validate_video_manifest(edx_video_id, hls_url, attempt=last_attempt)
+        for edx_video_id, hls_url in get_stale_pending_videos(older_than)
+    )
@@ -0,0 +1,194 @@
+"""
+Per-phase timing for API views, reported in Server-Timing headers and to a metrics callback
+"""
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.module_loading import import_string
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+
+class NullPhase(object):
+    """A context manager that does nothing, used when timing is off"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class NullTimer(object):
+    """A timer that records nothing, so that instrumented code costs next to nothing when timing is off"""
+    enabled = False
+    null_phase = NullPhase()
+
+    def phase(self, name):  # pylint: disable=unused-argument
+        """Returns a context manager that does nothing"""
+        return self.null_phase
+
+    def count(self, name, value):
+        """Does nothing"""
+
+    def stop(self):
+        """Does nothing"""
+
+
+class Phase(object):
+    """A context manager that adds the time spent (and the queries run) inside it to a timer's phase"""
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.start = None
+        self.start_queries = None
+
+    def __enter__(self):
+        self.start = time.time()
+        self.start_queries = self.timer.queries_logged()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        timer = self.timer
+        timer.durations[self.name] = timer.durations.get(self.name, 0) + time.time() - self.start
+        timer.query_counts[self.name] = (
+            timer.query_counts.get(self.name, 0) + timer.queries_logged() - self.start_queries
+        )
+        return False
+
+
+class PhaseTimer(object):
+    """
+    Records how long each phase of a request takes, how many queries each phase runs, and other counts (such as
+    the number of rows serialized)
+
+    Queries are counted by turning on Django's query log for the default database and the read replica (if there is
+    one) until the timer is stopped, and by comparing the log's length before and after each phase. Each log holds
+    at most 9000 queries, so counts stop growing once it's full.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.durations = OrderedDict()
+        self.query_counts = {}
+        self.counts = OrderedDict()
+        self.previous_force_debug_cursors = []
+        for db_connection in get_counted_connections():
+            self.previous_force_debug_cursors.append((db_connection, db_connection.force_debug_cursor))
+            db_connection.force_debug_cursor = True
+
+    def phase(self, name):
+        """Returns a context manager that times a phase. Time spent in the same phase more than once is added up."""
+        return Phase(self, name)
+
+    def count(self, name, value):
+        """Adds to a count"""
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def queries_logged(self):
+        """Returns the number of queries in the logs of the connections whose queries are counted"""
+        return sum(len(db_connection.queries_log) for db_connection, _ in self.previous_force_debug_cursors)
+
+    def stop(self):
+        """Stops counting queries. It can be called more than once."""
+        for db_connection, previous_force_debug_cursor in self.previous_force_debug_cursors:
+            db_connection.force_debug_cursor = previous_force_debug_cursor
+
+    def server_timing(self):
+        """
+        Returns the value for a Server-Timing header, e.g.:
+        auth;dur=1.2, query;dur=15.3;desc="2 queries", rows;desc="100"
+        """
+        metrics = []
+        for name, duration in self.durations.items():
+            metric = u"{};dur={:.1f}".format(name, duration * 1000)
+            if self.query_counts.get(name):
+                metric += u';desc="{} queries"'.format(self.query_counts[name])
+            metrics.append(metric)
+        metrics.extend(u'{};desc="{}"'.format(name, value) for name, value in self.counts.items())
+        return u", ".join(metrics)
+
+
+NULL_TIMER = NullTimer()
+
+
+def get_counted_connections():
+    """Returns the connections whose queries are counted: the default database's, and the read replica's if it's set"""
+    aliases = [DEFAULT_DB_ALIAS]
+    replica_alias = settings.VIDEO_API.get("READ_REPLICA_ALIAS")
+    if replica_alias and replica_alias != DEFAULT_DB_ALIAS and replica_alias in settings.DATABASES:
+        aliases.append(replica_alias)
+    return [connections[alias] for alias in aliases]
+
+
+def get_metrics_callback():
+    """Returns the function configured as METRICS_CALLBACK in settings.VIDEO_API, or None"""
+    callback = settings.VIDEO_API.get("METRICS_CALLBACK")
+    if isinstance(callback, basestring):
+        return import_string(callback)
+    return callback
+
+
+def new_timer():
+    """Returns a timer for a request: a PhaseTimer if timing is on, or the NullTimer otherwise"""
+    if settings.VIDEO_API.get("SERVER_TIMING_ENABLED") or settings.VIDEO_API.get("METRICS_CALLBACK"):
+        return PhaseTimer()
+    return NULL_TIMER
+
+
+class PhaseTimingMixin(object):
+    """
+    A mixin for API views that times authentication and permission checks, and whatever phases the view times with
+    self.timer.phase(...). Once the response has been rendered, the timings are added to it as a Server-Timing
+    header and passed to the configured metrics callback.
+    """
+    timer = NULL_TIMER
+
+    def dispatch(self, request, *args, **kwargs):
+        """Handles the request, and makes sure the query log is turned back off even if the response isn't reported"""
+        try:
+            return super(PhaseTimingMixin, self).dispatch(request, *args, **kwargs)
+        finally:
+            # Queries run while the response is rendered afterwards aren't counted
+            self.timer.stop()
+
+    def initial(self, request, *args, **kwargs):
+        """Starts timing the request, and times the authentication and permission checks"""
+        self.timer = new_timer()
+        with self.timer.phase("auth"):
+            super(PhaseTimingMixin, self).initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Reports the timings, after the response has been rendered if it still needs to be"""
+        response = super(PhaseTimingMixin, self).finalize_response(request, response, *args, **kwargs)
+        timer = self.timer
+        if not timer.enabled:
+            return response
+        if hasattr(response, "add_post_render_callback") and not response.is_rendered:
+            render_phase = timer.phase("render").__enter__()
+
+            def report_rendered(rendered_response):
+                """Reports the timings once the response has been rendered"""
+                render_phase.__exit__(None, None, None)
+                return self.report_timings(request, rendered_response, timer)
+            response.add_post_render_callback(report_rendered)
+            return response
+        return self.report_timings(request, response, timer)
+
+    def report_timings(self, request, response, timer):
+        """Adds a Server-Timing header to a response and passes the timings to the metrics callback"""
+        timer.stop()
+        if settings.VIDEO_API.get("SERVER_TIMING_ENABLED"):
+            response[SERVER_TIMING_HEADER] = timer.server_timing()
+        metrics_callback = get_metrics_callback()
+        if metrics_callback is not None:
+            metrics_callback(
+                view=self.__class__.__name__,
+                method=request.method,
+                status_code=response.status_code,
+                durations=dict(timer.durations),
+                query_counts=dict(timer.query_counts),
+                counts=dict(timer.counts),
+            )
+        return response
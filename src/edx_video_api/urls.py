@@ -2,9 +2,10 @@
 
 from django.conf.urls import url
 
-from edx_video_api.views import CourseVideoListView
+from edx_video_api.views import CourseVideoBatchView, CourseVideoListView
 
 
 urlpatterns = [
+    url(r"^batch/$", CourseVideoBatchView.as_view(), name="course-videos-batch"),
     url(r"^(?P<course_id>[^/]*)/$", CourseVideoListView.as_view(), name="course-videos"),
 ]
@@ -25,6 +25,10 @@ class DummyCourseOverview(object):
     def get_from_id_if_exists(course_key):  # pylint: disable=unused-argument
         return True
 
+    @staticmethod
+    def get_from_ids_if_exists(course_keys):
+        return {course_key: True for course_key in course_keys}
+
 
 def now_in_utc():
     """Returns the current datetime in UTC"""
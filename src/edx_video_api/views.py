@@ -1,51 +1,132 @@
 """
 edX video API views
 """
+from collections import OrderedDict
 from functools import wraps
 from uuid import uuid4
-import m3u8
 
 from django.conf import settings
-from django.utils.module_loading import import_string
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
 from rest_framework import permissions, status
 from rest_framework.generics import ListCreateAPIView
+from rest_framework.views import APIView
 from rest_framework.response import Response
-from edxval.api import (
-    create_video,
-    get_videos_for_course,
-    get_videos_for_ids,
-)
+from rest_framework.utils.urls import replace_query_param
 from edxval.exceptions import ValCannotCreateError
-from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
+from edxval.models import Video
+
+from edx_video_api.authentication import CachedTokenAuthentication
+from edx_video_api.changes import (
+    course_videos_changed,
+    get_change_token,
+    get_course_version,
+    get_oldest_change_token,
+    is_change_feed_expired,
+)
+from edx_video_api.courses import CourseStatus, get_course_status, get_course_statuses
+from edx_video_api.hls import MANIFEST_HOST_RESET_TIMEOUT, validate_hls_url, validate_hls_urls
+from edx_video_api.idempotency import idempotent
+from edx_video_api.listing_cache import (
+    CachedListing,
+    get_cached_listing,
+    get_course_videos_validators,
+    listing_cache_key,
+    set_cached_listing,
+)
+from edx_video_api.pagination import (
+    DEFAULT_ORDERING,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    get_page,
+    iter_pages,
+)
+from edx_video_api.queries import (
+    batch_course_video_counts,
+    batch_course_videos,
+    changed_course_videos,
+    changed_video_ids,
+    course_video_values,
+    course_videos_queryset,
+    profile_video_ids,
+)
+from edx_video_api.renderers import VideoJSONRenderer, get_video_renderer_classes
+from edx_video_api.resolvers import resolve_setting
+from edx_video_api.serialization import (
+    get_video_url_builder,
+    json_serialize_video,
+    json_serialize_video_instance,
+    json_serialize_video_values,
+    serialize_new_video_data,
+)
+from edx_video_api.routing import iter_with_read_database, reads_from_replica
+from edx_video_api.snapshots import (
+    SNAPSHOT_CONTENT_TYPE,
+    get_accepted_encoding,
+    get_course_snapshot,
+    get_snapshot_encodings,
+    schedule_snapshot_rebuilds,
+    snapshot_etag,
+    snapshots_enabled,
+)
+from edx_video_api.sources import get_videos_by_hls_url, record_video_source
+from edx_video_api.tasks import PENDING_VIDEO_STATUS, VALID_VIDEO_STATUS, schedule_manifest_validation
+from edx_video_api.timing import PhaseTimingMixin
 
-OAuth2Authentication = import_string(settings.VIDEO_API["AUTHENTICATION_CLASS"])
-ApiKeyHeaderPermission = import_string(settings.VIDEO_API["API_KEY_PERMISSION_CLASS"])
-CourseOverview = import_string(settings.VIDEO_API["COURSE_OVERVIEW"])
 ERROR_KEY = "error"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
+BULK_CREATE_MAX_ITEMS = 1000
+BULK_VALIDATION_WORKERS = 8
+BATCH_MAX_COURSES = 500
+BATCH_MAX_VIDEOS = 10000
+# Returned when a concurrent request created a video from the same HLS URL, but this request's transaction can't see it
+# yet (e.g.: with ATOMIC_REQUESTS under REPEATABLE READ isolation)
+CONCURRENT_CREATE_ERROR = u"A video is being created from this HLS URL by another request. Retry to get it."
+CONCURRENT_CREATE_RETRY_AFTER = 1
+# The fields of a serialized video, in the order they can be requested with ?fields=
+VIDEO_FIELDS = ("edx_video_id", "client_video_id", "url", "duration", "status", "encoded_videos")
+EXPANDABLE_VIDEO_FIELDS = ("encoded_videos",)
+STREAM_CONTENT_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+# The fields that listings can be ordered by with ?ordering= (e.g.: ?ordering=-duration,client_video_id). Since the
+# order must be total for cursor pagination, edx_video_id is added as the last field if it isn't requested.
+ORDERING_FIELDS = ("created", "edx_video_id", "client_video_id", "duration", "status")
 
 
-def dict_without_keys(d, *omitkeys):
-    """
-    Returns a copy of a dict without the specified keys
-    Args:
-        d (dict): A dict that to omit keys from
-        *omitkeys: Variable length list of keys to omit
-    Returns:
-        dict: A dict with omitted keys
-    """
-    return {key: d[key] for key in d.keys() if key not in omitkeys}
+def create_video(video_data):
+    """Creates a video with edxval's API, which is imported on first use since it's slow to import"""
+    from edxval.api import create_video as edxval_create_video
+    return edxval_create_video(video_data)
 
 
-def is_valid_hls_url(hls_url):
+def get_videos_for_course(course_id):
+    """Gets a course's serialized videos with edxval's API, which is imported on first use since it's slow to import"""
+    from edxval.api import get_videos_for_course as edxval_get_videos_for_course
+    return edxval_get_videos_for_course(course_id)
+
+
+def get_course_error(course_id, course_status):
     """
-    Checks if a given URL points to a valid HLS manifest
+    Returns an error message for a course id that doesn't refer to an existing course, or None if it does
+
+    Args:
+        course_id (unicode): A course id
+        course_status (CourseStatus): The course's status
     """
-    try:
-        manifest = m3u8.load(hls_url)
-        return bool(len(manifest.media) or len(manifest.playlists))
-    except:  # pylint: disable=bare-except
-        return False
+    if course_status == CourseStatus.invalid_key:
+        return u"Invalid course key ('{}')".format(course_id)
+    if course_status == CourseStatus.not_found:
+        return u"Course with id '{}' not found".format(course_id)
+    return None
 
 
 def verify_course_exists(view_func):
@@ -61,87 +142,785 @@ def verify_course_exists(view_func):
         Wraps the given view function
         """
         course_id = kwargs.get("course_id")
-        try:
-            course_key = CourseKey.from_string(course_id)
-            if CourseOverview.get_from_id_if_exists(course_key) is None:
-                return Response(
-                    {ERROR_KEY: u"Course with id '{}' not found".format(course_id)},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-        except InvalidKeyError:
+        with self.timer.phase("course"):
+            error = get_course_error(course_id, get_course_status(course_id))
+        if error:
             return Response(
-                {ERROR_KEY: u"Invalid course key ('{}')".format(course_id)},
+                {ERROR_KEY: error},
                 status=status.HTTP_404_NOT_FOUND
             )
         return view_func(self, request, **kwargs)
     return wrapped_function
 
 
-def json_serialize_video(serialized_video):
-    """Returns a JSON-serializable version of an edxval-serialized video object"""
+def course_reads_from_replica(view_func):
+    """
+    A decorator to wrap a view function that takes a course id parameter, so that its database reads go to the read
+    replica (if one is set, and the course's videos haven't changed too recently; see reads_from_replica)
+    """
+    @wraps(view_func)
+    def wrapped_function(self, request, **kwargs):
+        """
+        Wraps the given view function
+        """
+        with reads_from_replica([kwargs.get("course_id")]):
+            return view_func(self, request, **kwargs)
+    return wrapped_function
+
+
+def render_json_stream(pages, stream_format):
+    """
+    Renders pages of JSON-serializable objects incrementally
+
+    Args:
+        pages (iterable of list): Pages of objects to render
+        stream_format (str): "json" to render a single JSON array, or "ndjson" to render one object per line
+    Yields:
+        bytes: Rendered chunks of the response body, one per page
+    """
+    renderer = VideoJSONRenderer()
+    if stream_format == "ndjson":
+        for page in pages:
+            yield b"".join(renderer.render(obj) + b"\n" for obj in page)
+        return
+    yield b"["
+    separator = b""
+    for page in pages:
+        if page:
+            # Each page is rendered as an array in one call, and the array's brackets are dropped
+            yield separator + renderer.render(page)[1:-1]
+            separator = b","
+    yield b"]"
+
+
+def get_video_data_error(video_data):
+    """
+    Checks that the data for a new video contains the required values
+
+    Args:
+        video_data (dict): Data for a new video from a request body
+    Returns:
+        unicode: An error message, or None if the data is complete
+    """
+    if not isinstance(video_data, dict):
+        return u"Video data must be an object"
+    if not video_data.get("hls_url") or not isinstance(video_data["hls_url"], basestring):
+        return u"Request does not contain HLS URL"
+    if not video_data.get("filename"):
+        return u"Request does not contain file name"
+    return None
+
+
+def get_manifest_error(manifest_result):
+    """
+    Returns an error message for an invalid HLS manifest, or None if the manifest is valid
+
+    Args:
+        manifest_result (ManifestResult): The result of validating the manifest
+    """
+    if manifest_result.valid:
+        return None
+    if manifest_result.rejected:
+        return u"The HLS URL's host can't be reached right now (reason: {})".format(manifest_result.failure.value)
+    return u"Request does not contain a valid HLS URL (reason: {})".format(manifest_result.failure.value)
+
+
+def is_async_request(request):
+    """Returns True if a request asks for its videos' manifests to be validated in the background"""
+    return request.query_params.get("async", "").lower() in ("1", "true")
+
+
+def new_hls_video_data(course_id, file_name, hls_url, video_status=VALID_VIDEO_STATUS, manifest_result=None):
+    """
+    Returns the data passed to edxval to create an HLS video for a course. The duration and bitrate are taken from
+    the manifest validation result if it has them, and are otherwise 0 (edxval's convention for an unknown value).
+    """
+    duration = manifest_result.duration if manifest_result else None
+    bitrate = manifest_result.bitrate if manifest_result else None
     return {
-        "encoded_videos": [
-            dict_without_keys(encoded_video, "created", "modified")
-            for encoded_video in serialized_video["encoded_videos"]
-        ],
-        "url": serialized_video["url"],
-        "edx_video_id": serialized_video["edx_video_id"],
-        "client_video_id": serialized_video["client_video_id"],
-        "duration": serialized_video["duration"],
-        "status": serialized_video["status"]
+        "edx_video_id": unicode(uuid4()),
+        "status": video_status,
+        "client_video_id": file_name,
+        "duration": duration or 0,
+        "encoded_videos": [{"profile": "hls", "url": hls_url, "bitrate": bitrate or 0, "file_size": 0}],
+        "courses": [course_id]
     }
 
 
-class CourseVideoListView(ListCreateAPIView):
+def set_validator_headers(response, etag, last_modified):
+    """
+    Sets the ETag and Last-Modified headers on a response, and returns the response. Since the representation
+    depends on the Accept header, the response also varies on it.
+    """
+    response["ETag"] = etag
+    patch_vary_headers(response, ("Accept", ))
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def get_video_fields(request):
+    """
+    Returns the video fields requested via the "fields" and "expand" query parameters, e.g.:
+    ?fields=edx_video_id,status&expand=encoded_videos
+
+    Returns:
+        tuple of str: The requested fields in serialization order, or None if every field should be included
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    fields = request.query_params.get("fields")
+    if fields is None:
+        return None
+    fields = {field.strip() for field in fields.split(",") if field.strip()}
+    expand = {field.strip() for field in request.query_params.get("expand", "").split(",") if field.strip()}
+    unknown_fields = (fields - set(VIDEO_FIELDS)) | (expand - set(EXPANDABLE_VIDEO_FIELDS))
+    if unknown_fields:
+        raise ValueError(u"Unknown fields ({})".format(u", ".join(sorted(unknown_fields))))
+    fields |= expand
+    if not fields:
+        raise ValueError(u"At least one field must be requested")
+    return tuple(field for field in VIDEO_FIELDS if field in fields)
+
+
+def get_video_filters(request):
+    """
+    Returns the database filters requested via the "status", "profile", "client_video_id" and
+    "client_video_id__startswith" query parameters. "status" and "profile" take comma-separated lists of values, e.g.:
+    ?status=file_complete,ingest&profile=hls
+
+    Returns:
+        dict: Lookups to filter a queryset of Video objects by
+    Raises:
+        ValueError: If a filter has no values
+    """
+    query_params = request.query_params
+    filters = {}
+    for param, lookup in (("status", "status__in"), ("profile", "id__in")):
+        if param not in query_params:
+            continue
+        values = {value.strip() for value in query_params[param].split(",") if value.strip()}
+        if not values:
+            raise ValueError(u"At least one {} must be given".format(param))
+        filters[lookup] = profile_video_ids(values) if param == "profile" else values
+    # Client video ids are file names, which may contain commas, so they are matched as a whole
+    for lookup in ("client_video_id", "client_video_id__startswith"):
+        if lookup in query_params:
+            filters[lookup] = query_params[lookup]
+    return filters
+
+
+def get_video_ordering(request):
+    """
+    Returns the ordering requested via the "ordering" query parameter
+
+    Returns:
+        tuple of str: Ordering field names, which always end with edx_video_id
+    Raises:
+        ValueError: If an unknown or repeated field is requested
+    """
+    ordering = request.query_params.get("ordering")
+    if ordering is None:
+        return DEFAULT_ORDERING
+    ordering = [field.strip() for field in ordering.split(",") if field.strip()]
+    names = [field[1:] if field.startswith("-") else field for field in ordering]
+    unknown_fields = set(names) - set(ORDERING_FIELDS)
+    if unknown_fields:
+        raise ValueError(u"Unknown ordering fields ({})".format(u", ".join(sorted(unknown_fields))))
+    if len(set(names)) != len(names):
+        raise ValueError(u"Ordering fields must not be repeated")
+    if "edx_video_id" not in names:
+        ordering.append("edx_video_id")
+    return tuple(ordering)
+
+
+def get_video_source(course_id, fields, filters=None, ordering=DEFAULT_ORDERING):
+    """
+    Returns the queryset that a course's videos are read from, and a function that serializes a list of its rows
+
+    Args:
+        course_id (unicode): A course id
+        fields (tuple of str): The fields to include, or None for every field
+        filters (dict): Lookups to filter the videos by, as returned by get_video_filters
+        ordering (tuple of str): The fields that the videos will be ordered by, which are selected along with the
+            requested fields
+    """
+    if fields is None:
+        video_url = get_video_url_builder()
+        return (
+            course_videos_queryset(course_id).filter(**(filters or {})),
+            lambda videos: [json_serialize_video_instance(video, video_url) for video in videos],
+        )
+    columns = [field for field in fields if field not in ("url", "encoded_videos")]
+    columns.extend(field.lstrip("-") for field in ordering)
+    return (
+        course_video_values(course_id, columns).filter(**(filters or {})),
+        lambda rows: json_serialize_video_values(rows, fields),
+    )
+
+
+def get_page_size(request):
+    """
+    Returns the page size requested via the "page_size" query parameter, capped at the configured maximum
+
+    Raises:
+        ValueError: If the page size is not a positive integer
+    """
+    max_page_size = settings.VIDEO_API.get("MAX_PAGE_SIZE", MAX_PAGE_SIZE)
+    page_size = request.query_params.get("page_size")
+    if page_size is None:
+        return min(settings.VIDEO_API.get("DEFAULT_PAGE_SIZE", DEFAULT_PAGE_SIZE), max_page_size)
+    page_size = int(page_size)
+    if page_size < 1:
+        raise ValueError(u"Page size must be a positive integer")
+    return min(page_size, max_page_size)
+
+
+def get_change_filters(request):
+    """
+    Returns the change token and time requested via the "change_token" and "modified_since" query parameters
+
+    Returns:
+        tuple: The change token (int) and time (datetime), either of which may be None
+    Raises:
+        ValueError: If either value is invalid
+    """
+    change_token = request.query_params.get("change_token")
+    if change_token is not None:
+        if not change_token.isdigit():
+            raise ValueError(u"Invalid change token ('{}')".format(change_token))
+        change_token = int(change_token)
+    modified_since = request.query_params.get("modified_since")
+    if modified_since is not None:
+        modified_since_value = modified_since
+        modified_since = parse_datetime(modified_since)
+        if modified_since is None:
+            raise ValueError(u"Invalid timestamp ('{}')".format(modified_since_value))
+        if timezone.is_naive(modified_since):
+            modified_since = timezone.make_aware(modified_since, timezone.utc)
+    return change_token, modified_since
+
+
+def group_by_course_id(course_ids):
+    """
+    Returns the course ids that a course id stored in the database can belong to. MySQL compares course ids without
+    regard to case, so a stored course id can differ in case from the course id that it was looked up with.
+
+    Args:
+        course_ids (iterable of unicode): Course ids
+    Returns:
+        dict: The course ids, keyed by the lowercased course id
+    """
+    grouped_course_ids = {}
+    for course_id in course_ids:
+        grouped_course_ids.setdefault(course_id.lower(), []).append(course_id)
+    return grouped_course_ids
+
+
+def limit_batch_courses(course_ids, max_videos):
+    """
+    Picks the courses whose videos can be listed together without going over a total number of videos, in order
+
+    Args:
+        course_ids (list of unicode): Course ids
+        max_videos (int): The most videos that can be listed
+    Returns:
+        list of unicode: The course ids that fit
+    """
+    video_counts = {}
+    for stored_course_id, video_count in batch_course_video_counts(course_ids).items():
+        video_counts[stored_course_id.lower()] = video_counts.get(stored_course_id.lower(), 0) + video_count
+    listed_course_ids = []
+    for course_id in course_ids:
+        video_count = video_counts.get(course_id.lower(), 0)
+        if video_count <= max_videos:
+            listed_course_ids.append(course_id)
+            max_videos -= video_count
+    return listed_course_ids
+
+
+class VideoApiViewMixin(object):
+    """
+    A mixin for API views that resolves the authentication, permission and renderer classes when a request is
+    handled, so that they (and the modules they come from) aren't imported at LMS startup
+    """
+    @property
+    def authentication_classes(self):
+        """The configured authentication class"""
+        return (resolve_setting("AUTHENTICATION_CLASS"), )
+
+    @property
+    def permission_classes(self):
+        """Admin users with the configured API key permission"""
+        return (permissions.IsAdminUser, resolve_setting("API_KEY_PERMISSION_CLASS"))
+
+    @property
+    def renderer_classes(self):
+        """The video renderer classes"""
+        return get_video_renderer_classes()
+
+    def get_authenticators(self):
+        """Returns the authenticators, wrapped to cache token authentication if AUTHENTICATION_CACHE_TIMEOUT is set"""
+        authenticators = super(VideoApiViewMixin, self).get_authenticators()
+        timeout = settings.VIDEO_API.get("AUTHENTICATION_CACHE_TIMEOUT")
+        if not timeout:
+            return authenticators
+        return [CachedTokenAuthentication(authenticator, timeout) for authenticator in authenticators]
+
+
+class CourseVideoListView(VideoApiViewMixin, PhaseTimingMixin, ListCreateAPIView):
     """Video API views"""
-    authentication_classes = (OAuth2Authentication, )
-    permission_classes = (permissions.IsAdminUser, ApiKeyHeaderPermission)
 
     @verify_course_exists
+    @course_reads_from_replica
     def list(self, request, *args, **kwargs):  # pylint: disable=unused-argument
-        """Returns serialized videos for a course"""
+        """
+        Returns serialized videos for a course. They can be filtered (see get_video_filters) and ordered (see
+        get_video_ordering) in the database query, for every kind of listing.
+        """
         course_id = kwargs.get("course_id")
-        return Response([
-            json_serialize_video(serialized_video)
-            for serialized_video in list(get_videos_for_course(course_id)[0])
-        ])
+        if snapshots_enabled() and not request.query_params and request.accepted_renderer.format == "json":
+            # Clients that accept a compressed body are sent the course's snapshot from the same URL
+            response = self.get_snapshot_response(request, course_id)
+            if response is None:
+                response = self.cached_list(request, course_id)
+            patch_vary_headers(response, ("Accept-Encoding", ))
+            return response
+        if "change_token" in request.query_params or "modified_since" in request.query_params:
+            # A change feed response holds a change token that moves on as changes settle, even while the course's
+            # version stays the same, so it's neither cached nor validated with the course's ETag
+            return self.get_list_response(request, course_id)
+        return self.cached_list(request, course_id)
+
+    def get_snapshot_response(self, request, course_id):
+        """
+        Returns the course's default listing, compressed, from its snapshot. Returns None if the request doesn't
+        accept any of the snapshot's content codings, if the course's listing is too large to snapshot, or if the
+        course has no up-to-date snapshot (in which case it's rebuilt in the background).
+        """
+        if get_accepted_encoding(request, get_snapshot_encodings()) is None:
+            return None
+        with self.timer.phase("cache"):
+            _, snapshot = get_course_snapshot(course_id)
+        if snapshot is None:
+            schedule_snapshot_rebuilds([course_id])
+            return None
+        if snapshot.too_large:
+            return None
+        # The snapshot may have been built in a process without brotli
+        encoding = get_accepted_encoding(
+            request, [encoding for encoding in get_snapshot_encodings() if encoding in snapshot.bodies]
+        )
+        if encoding is None:
+            return None
+        etag = snapshot_etag(snapshot.etag, encoding)
+        response = get_conditional_response(request, etag=etag, last_modified=snapshot.last_modified)
+        if response is None:
+            response = HttpResponse(snapshot.bodies[encoding], content_type=SNAPSHOT_CONTENT_TYPE)
+            response["Content-Encoding"] = encoding
+        return set_validator_headers(response, etag, snapshot.last_modified)
+
+    def cached_list(self, request, course_id):
+        """
+        Returns a course's listing from the listing cache, or renders it and caches it (if it can be cached)
+        """
+        # Streamed and non-JSON (e.g.: browsable API) listings are not cached
+        cache_key = None
+        with self.timer.phase("cache"):
+            if "stream" not in request.query_params and request.accepted_renderer.format == "json":
+                cache_key = listing_cache_key(course_id, request)
+                version, cached_listing = get_cached_listing(course_id, cache_key)
+            else:
+                version, cached_listing = get_course_version(course_id), None
+
+        if cached_listing is not None:
+            etag, last_modified = cached_listing.etag, cached_listing.last_modified
+        else:
+            with self.timer.phase("validators"):
+                etag, last_modified = get_course_videos_validators(
+                    course_id, version, request.accepted_renderer.format
+                )
+        not_modified_response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified_response is not None:
+            return set_validator_headers(not_modified_response, etag, last_modified)
+        if cached_listing is not None:
+            return set_validator_headers(
+                HttpResponse(cached_listing.body, content_type=cached_listing.content_type), etag, last_modified
+            )
+
+        response = self.get_list_response(request, course_id)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        if cache_key is not None:
+            response.add_post_render_callback(
+                lambda rendered: set_cached_listing(cache_key, CachedListing(
+                    version=version,
+                    body=rendered.content,
+                    content_type=rendered["Content-Type"],
+                    etag=etag,
+                    last_modified=last_modified,
+                ))
+            )
+        return set_validator_headers(response, etag, last_modified)
+
+    def get_list_response(self, request, course_id):
+        """Returns an uncached response with the serialized videos for a course"""
+        query_params = request.query_params
+        try:
+            fields = get_video_fields(request)
+            filters = get_video_filters(request)
+            ordering = get_video_ordering(request)
+        except ValueError as exc:
+            return Response({ERROR_KEY: unicode(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if "change_token" in query_params or "modified_since" in query_params:
+            return self.changes_list(request, course_id, fields, filters, ordering)
+        if "stream" in query_params:
+            return self.stream_list(request, course_id, fields, filters, ordering)
+        if "cursor" in query_params or "page_size" in query_params:
+            return self.paginated_list(request, course_id, fields, filters, ordering)
+        if fields is not None or filters or "ordering" in query_params:
+            queryset, serialize_rows = get_video_source(course_id, fields, filters, ordering)
+            with self.timer.phase("query"):
+                rows = list(queryset.order_by(*ordering))
+            with self.timer.phase("serialize"):
+                results = serialize_rows(rows)
+        else:
+            # edxval serializes the videos as it reads them, so its serialization is part of the query phase
+            with self.timer.phase("query"):
+                rows = list(get_videos_for_course(course_id)[0])
+            with self.timer.phase("serialize"):
+                results = [json_serialize_video(serialized_video) for serialized_video in rows]
+        self.timer.count("rows", len(rows))
+        return Response(results)
+
+    def changes_list(self, request, course_id, fields=None, filters=None, ordering=DEFAULT_ORDERING):
+        """
+        Returns the videos in a course that have changed since a change token or a time, the ids of videos that have
+        been removed from the course (or hidden) since then, and a new change token to send with the next request
+        """
+        try:
+            change_token, modified_since = get_change_filters(request)
+        except ValueError as exc:
+            return Response({ERROR_KEY: unicode(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset, serialize_rows = get_video_source(course_id, fields, filters, ordering)
+        with self.timer.phase("query"):
+            oldest_change_token = get_oldest_change_token()
+            if is_change_feed_expired(oldest_change_token, change_token=change_token, modified_since=modified_since):
+                return Response({
+                    ERROR_KEY: u"Changes since this point are no longer recorded, so a full resync is required",
+                    "resync_required": True,
+                }, status=status.HTTP_410_GONE)
+            # The new token is read first, so that any change made while the videos are being read is reported again.
+            # It's never older than the oldest token still covered, so that a client can keep using it.
+            new_change_token = get_change_token(
+                course_id, previous_token=max(change_token or 0, oldest_change_token)
+            )
+            changed_ids = changed_video_ids(course_id, change_token=change_token, modified_since=modified_since)
+            rows = list(changed_course_videos(queryset, changed_ids, modified_since).order_by(*ordering))
+            visible_ids = {row["edx_video_id"] if isinstance(row, dict) else row.edx_video_id for row in rows}
+            removed_ids = sorted(set(changed_ids) - visible_ids)
+        with self.timer.phase("serialize"):
+            results = serialize_rows(rows)
+        self.timer.count("rows", len(rows))
+        return Response({
+            "change_token": unicode(new_change_token),
+            "results": results,
+            "removed": removed_ids,
+        })
+
+    def paginated_list(self, request, course_id, fields=None, filters=None, ordering=DEFAULT_ORDERING):
+        """
+        Returns a single page of serialized videos for a course, along with a link to the next page
+        """
+        try:
+            page_size = get_page_size(request)
+            cursor = request.query_params.get("cursor")
+            cursor_values = decode_cursor(cursor, Video, ordering) if cursor else None
+        except ValueError as exc:
+            return Response({ERROR_KEY: unicode(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset, serialize_rows = get_video_source(course_id, fields, filters, ordering)
+        with self.timer.phase("query"):
+            rows, next_cursor_values = get_page(queryset, page_size, cursor_values=cursor_values, ordering=ordering)
+        with self.timer.phase("serialize"):
+            results = serialize_rows(rows)
+        self.timer.count("rows", len(rows))
+        next_url = None
+        if next_cursor_values is not None:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "cursor", encode_cursor(next_cursor_values)
+            )
+        return Response({
+            "next": next_url,
+            "results": results,
+        })
+
+    def stream_list(self, request, course_id, fields=None, filters=None, ordering=DEFAULT_ORDERING):
+        """
+        Streams serialized videos for a course as a JSON array or as newline-delimited JSON, fetching the videos
+        from the database in fixed-size chunks so that memory use does not depend on the number of videos
+        """
+        stream_format = request.query_params.get("stream") or "json"
+        if stream_format not in STREAM_CONTENT_TYPES:
+            return Response(
+                {ERROR_KEY: u"Invalid stream format ('{}')".format(stream_format)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            cursor = request.query_params.get("cursor")
+            cursor_values = decode_cursor(cursor, Video, ordering) if cursor else None
+        except InvalidCursorError as exc:
+            return Response({ERROR_KEY: unicode(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset, serialize_rows = get_video_source(course_id, fields, filters, ordering)
+        # The pages are read while the response is streamed, after this method has returned
+        pages = iter_with_read_database(iter_pages(
+            queryset,
+            settings.VIDEO_API.get("STREAM_CHUNK_SIZE", STREAM_CHUNK_SIZE),
+            cursor_values=cursor_values,
+            ordering=ordering,
+        ))
+        return StreamingHttpResponse(
+            render_json_stream((serialize_rows(page) for page in pages), stream_format),
+            content_type=STREAM_CONTENT_TYPES[stream_format]
+        )
 
     @verify_course_exists
+    @idempotent
     def create(self, request, *args, **kwargs):  # pylint: disable=unused-argument
         """
         Creates an HLS video object for a course and returns a serialized version of the
-        newly-created video object
+        newly-created video object. If the request body is a list, a video is created for each item in it.
+
+        If a visible video in the course was already created from the same HLS URL, that video is returned instead,
+        without validating the manifest or creating anything.
+
+        With ?async=1, the video is created with a pending status and a 202 response is returned right away. Its
+        manifest is validated in the background, and its status then changes to "file_complete" or "invalid_token".
         """
         course_id = kwargs.get("course_id")
-        file_name = request.data.get("filename")
-        hls_url = request.data.get("hls_url")
-        error = None
-        if not file_name:
-            error = u"Request does not contain file name"
-        if not hls_url:
-            error = u"Request does not contain HLS URL"
-        elif not is_valid_hls_url(hls_url):
-            error = u"Request does not contain a valid HLS URL"
+        if isinstance(request.data, list):
+            return self.bulk_create(request, course_id)
+
+        error = get_video_data_error(request.data)
         if error:
             return Response(
                 {ERROR_KEY: error},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        hls_url = request.data["hls_url"]
+        with self.timer.phase("dedupe"):
+            existing_video = get_videos_by_hls_url(course_id, [hls_url]).get(hls_url)
+        if existing_video is not None:
+            return Response(json_serialize_video_instance(existing_video))
 
-        edx_video_id = unicode(uuid4())
+        async_create = is_async_request(request)
+        manifest_result = None
+        if not async_create:
+            with self.timer.phase("manifest"):
+                manifest_result = validate_hls_url(hls_url)
+            error = get_manifest_error(manifest_result)
+            if error and manifest_result.rejected:
+                # The manifest's host is overloaded or failing, so the same request can succeed later
+                return Response(
+                    {ERROR_KEY: error},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": str(settings.VIDEO_API.get(
+                        "MANIFEST_HOST_RESET_TIMEOUT", MANIFEST_HOST_RESET_TIMEOUT
+                    ))},
+                )
+            if error:
+                return Response(
+                    {ERROR_KEY: error},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        video_data = new_hls_video_data(
+            course_id,
+            request.data["filename"],
+            hls_url,
+            video_status=PENDING_VIDEO_STATUS if async_create else VALID_VIDEO_STATUS,
+            manifest_result=manifest_result,
+        )
         try:
-            video_id = create_video({
-                "edx_video_id": edx_video_id,
-                "status": "file_complete",
-                "client_video_id": file_name,
-                "duration": 0,
-                "encoded_videos": [{"profile": "hls", "url": hls_url, "bitrate": 0, "file_size": 0}],
-                "courses": [course_id]
-            })
+            with self.timer.phase("create"), transaction.atomic():
+                video_id = create_video(video_data)
+                record_video_source(course_id, hls_url, video_id)
         except ValCannotCreateError as exc:
             return Response(
                 {ERROR_KEY: u"Could not create video (exception: {})".format(str(exc))},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        serialized_video = next(get_videos_for_ids([video_id]))
-        return Response(json_serialize_video(serialized_video))
+        except IntegrityError:
+            # A concurrent request created a video from the same URL first
+            existing_video = get_videos_by_hls_url(course_id, [hls_url]).get(hls_url)
+            if existing_video is None:
+                return Response(
+                    {ERROR_KEY: CONCURRENT_CREATE_ERROR},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={"Retry-After": str(CONCURRENT_CREATE_RETRY_AFTER)},
+                )
+            return Response(json_serialize_video_instance(existing_video))
+        course_videos_changed([course_id])
+        if async_create:
+            schedule_manifest_validation(video_id, hls_url)
+        return Response(
+            json_serialize_video(serialize_new_video_data(video_data)),
+            status=status.HTTP_202_ACCEPTED if async_create else status.HTTP_200_OK
+        )
+
+    def bulk_create(self, request, course_id):
+        """
+        Creates an HLS video object for each item in the request body, and returns a list with either the
+        serialized video or an error for each item. Videos that already exist for an item's HLS URL (including
+        earlier items in the same request) are returned instead of being created again. Manifests are validated
+        concurrently, and the videos are created in a single transaction.
+
+        With ?async=1, the videos are created with a pending status without waiting for their manifests, which are
+        validated in the background, and a 202 response is returned if any videos were created.
+        """
+        items = request.data
+        max_items = settings.VIDEO_API.get("BULK_CREATE_MAX_ITEMS", BULK_CREATE_MAX_ITEMS)
+        if not items or len(items) > max_items:
+            return Response(
+                {ERROR_KEY: u"Request must contain between 1 and {} videos".format(max_items)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        errors = [get_video_data_error(item) for item in items]
+        hls_urls = {item["hls_url"] for item, error in zip(items, errors) if not error}
+        with self.timer.phase("dedupe"):
+            videos_by_hls_url = {
+                hls_url: json_serialize_video_instance(video)
+                for hls_url, video in get_videos_by_hls_url(course_id, hls_urls).items()
+            }
+        async_create = is_async_request(request)
+        manifest_results = {}
+        if not async_create:
+            with self.timer.phase("manifest"):
+                manifest_results = validate_hls_urls(
+                    hls_urls - set(videos_by_hls_url),
+                    settings.VIDEO_API.get("BULK_VALIDATION_WORKERS", BULK_VALIDATION_WORKERS),
+                )
+        videos = [None] * len(items)
+        any_created = False
+        with self.timer.phase("create"), transaction.atomic():
+            for index, item in enumerate(items):
+                if errors[index]:
+                    continue
+                hls_url = item["hls_url"]
+                if hls_url in videos_by_hls_url:
+                    videos[index] = videos_by_hls_url[hls_url]
+                    continue
+                if not async_create:
+                    errors[index] = get_manifest_error(manifest_results[hls_url])
+                    if errors[index]:
+                        continue
+                video_data = new_hls_video_data(
+                    course_id,
+                    item["filename"],
+                    hls_url,
+                    video_status=PENDING_VIDEO_STATUS if async_create else VALID_VIDEO_STATUS,
+                    manifest_result=manifest_results.get(hls_url),
+                )
+                try:
+                    # A savepoint per video lets the others be created if one fails
+                    with transaction.atomic():
+                        video_id = create_video(video_data)
+                        record_video_source(course_id, hls_url, video_id)
+                except ValCannotCreateError as exc:
+                    errors[index] = u"Could not create video (exception: {})".format(str(exc))
+                except IntegrityError:
+                    # A concurrent request created a video from the same URL first
+                    existing_video = get_videos_by_hls_url(course_id, [hls_url]).get(hls_url)
+                    if existing_video is None:
+                        errors[index] = CONCURRENT_CREATE_ERROR
+                    else:
+                        videos[index] = videos_by_hls_url[hls_url] = json_serialize_video_instance(existing_video)
+                else:
+                    videos[index] = videos_by_hls_url[hls_url] = json_serialize_video(
+                        serialize_new_video_data(video_data)
+                    )
+                    any_created = True
+                    if async_create:
+                        schedule_manifest_validation(video_id, hls_url)
+
+        if any_created:
+            course_videos_changed([course_id])
+        return Response(
+            [
+                {"video": video} if video else {ERROR_KEY: error}
+                for video, error in zip(videos, errors)
+            ],
+            status=status.HTTP_202_ACCEPTED if async_create and any_created else status.HTTP_200_OK
+        )
+
+
+class CourseVideoBatchView(VideoApiViewMixin, PhaseTimingMixin, APIView):
+    """Video API view that lists the videos for several courses at once"""
+
+    def get(self, request):
+        """Returns serialized videos for the courses in the "course_id" query parameters"""
+        return self.batch_list(request.query_params.getlist("course_id"))
+
+    def post(self, request):
+        """
+        Returns serialized videos for the courses in the request body's "course_ids" list. This is a read, but a
+        POST body can hold more course ids than a URL.
+        """
+        course_ids = request.data.get("course_ids") if isinstance(request.data, dict) else None
+        if not isinstance(course_ids, list) or not all(isinstance(course_id, basestring) for course_id in course_ids):
+            return Response(
+                {ERROR_KEY: u"Request must contain a list of course ids"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return self.batch_list(course_ids)
+
+    def batch_list(self, course_ids):
+        """
+        Returns the serialized videos for each existing course (looked up together, with their videos read in a
+        single query), and an error for each course id that doesn't refer to an existing course. If the courses have
+        more than BATCH_MAX_VIDEOS videos between them, the courses that don't fit get an error instead, and have to
+        be listed on their own.
+        """
+        max_courses = settings.VIDEO_API.get("BATCH_MAX_COURSES", BATCH_MAX_COURSES)
+        if not course_ids or len(course_ids) > max_courses:
+            return Response(
+                {ERROR_KEY: u"Request must contain between 1 and {} course ids".format(max_courses)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with self.timer.phase("course"):
+            course_statuses = get_course_statuses(course_ids)
+        results = OrderedDict()
+        errors = {}
+        for course_id in course_ids:
+            error = get_course_error(course_id, course_statuses[course_id])
+            if error:
+                errors[course_id] = error
+            else:
+                results[course_id] = []
+        if results:
+            max_videos = settings.VIDEO_API.get("BATCH_MAX_VIDEOS", BATCH_MAX_VIDEOS)
+            with self.timer.phase("query"), reads_from_replica(results):
+                course_videos = list(batch_course_videos(list(results))[:max_videos + 1])
+                if len(course_videos) > max_videos:
+                    listed_course_ids = limit_batch_courses(list(results), max_videos)
+                    for course_id in set(results) - set(listed_course_ids):
+                        del results[course_id]
+                        errors[course_id] = (
+                            u"Too many videos to list in a batch (more than {}). List this course on its own.".format(
+                                max_videos
+                            )
+                        )
+                    course_videos = list(batch_course_videos(listed_course_ids)) if listed_course_ids else []
+            with self.timer.phase("serialize"):
+                video_url = get_video_url_builder()
+                grouped_course_ids = group_by_course_id(results)
+                for course_video in course_videos:
+                    serialized_video = json_serialize_video_instance(course_video.video, video_url)
+                    for course_id in grouped_course_ids.get(course_video.course_id.lower(), []):
+                        results[course_id].append(serialized_video)
+            self.timer.count("rows", len(course_videos))
+        return Response({"results": results, "errors": errors})
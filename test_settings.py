@@ -9,7 +9,22 @@ VIDEO_API = dict(
 
 SECRET_KEY = "edx_video_api"
 INSTALLED_APPS = [
-    "edxval"
+    "edxval",
+    "edx_video_api",
 ]
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": "edx_video_api.db",
+    },
+    # A separate database standing in for a read replica, which is never written to (see READ_REPLICA_ALIAS)
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": "edx_video_api_replica.db",
+    },
+}
+DATABASE_ROUTERS = ["edx_video_api.routing.ReadReplicaRouter"]
+ROOT_URLCONF = "test_urls"
+USE_TZ = True
 
 django.setup()
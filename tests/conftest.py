@@ -0,0 +1,21 @@
+"""Fixtures shared by the test suite"""
+import pytest
+from django.core.cache import caches
+
+from edx_video_api import courses, hls, signals, snapshots
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Clears cached data before each test"""
+    caches["default"].clear()
+    courses.course_cache.local.clear()
+    hls.validation_cache.local.clear()
+    hls.get_manifest_fetcher().bulkheads.clear()
+    snapshots._pending_course_ids.clear()  # pylint: disable=protected-access
+
+
+@pytest.fixture(scope="session", autouse=True)
+def connect_signals():
+    """Connects signal receivers, as the app config does when the app is installed"""
+    signals.connect_signals()
@@ -0,0 +1,26 @@
+"""Functions that create objects for the test suite"""
+from uuid import uuid4
+
+from edxval.api import create_video
+from edxval.models import Video
+
+
+def create_course_video(course_id, **kwargs):
+    """Creates an HLS video for a course in the edxval database and returns the Video object"""
+    edx_video_id = kwargs.pop("edx_video_id", unicode(uuid4()))
+    video_data = {
+        "edx_video_id": edx_video_id,
+        "status": u"file_complete",
+        "client_video_id": u"My File",
+        "duration": 0,
+        "encoded_videos": [{
+            "profile": u"hls",
+            "url": u"https://example.com/{}.m3u8".format(edx_video_id),
+            "bitrate": 0,
+            "file_size": 0
+        }],
+        "courses": [course_id]
+    }
+    video_data.update(kwargs)
+    create_video(video_data)
+    return Video.objects.get(edx_video_id=edx_video_id)
@@ -0,0 +1,94 @@
+"""Tests for caching authentication results"""
+# pylint: disable=redefined-outer-name
+import datetime
+from collections import namedtuple
+
+import pytest
+from rest_framework.test import APIRequestFactory
+
+from edx_video_api.authentication import CachedTokenAuthentication, invalidate_token
+from edx_video_api.utils import now_in_utc
+
+AccessToken = namedtuple("AccessToken", ["token", "expires"])
+TOKEN = "abc123"
+
+
+@pytest.fixture()
+def authenticator(mocker):
+    """Fixture for a mocked authenticator that returns a token expiring in an hour"""
+    authenticator = mocker.Mock()
+    authenticator.authenticate.return_value = ("user", AccessToken(TOKEN, now_in_utc() + datetime.timedelta(hours=1)))
+    return authenticator
+
+
+def make_request(authorization=u"Bearer {}".format(TOKEN)):
+    """Returns a request with the given Authorization header"""
+    return APIRequestFactory().get("/", HTTP_AUTHORIZATION=authorization)
+
+
+def test_cached(authenticator):
+    """A bearer token should only be authenticated once while its result is cached"""
+    cached_authentication = CachedTokenAuthentication(authenticator, 60)
+    first_result = cached_authentication.authenticate(make_request())
+    assert cached_authentication.authenticate(make_request()) == first_result
+    assert authenticator.authenticate.call_count == 1
+
+    cached_authentication.authenticate(make_request(u"Bearer other"))
+    assert authenticator.authenticate.call_count == 2
+
+
+def test_invalidate_token(authenticator):
+    """Invalidating a token should authenticate it again on the next request"""
+    cached_authentication = CachedTokenAuthentication(authenticator, 60)
+    cached_authentication.authenticate(make_request())
+    invalidate_token(TOKEN)
+    cached_authentication.authenticate(make_request())
+    assert authenticator.authenticate.call_count == 2
+
+
+@pytest.mark.parametrize("authorization", ["", "Basic dXNlcjpwYXNz", "Bearer"])
+def test_not_bearer(authenticator, authorization):
+    """Requests without a bearer token should always be passed to the authenticator"""
+    cached_authentication = CachedTokenAuthentication(authenticator, 60)
+    for _ in range(2):
+        cached_authentication.authenticate(make_request(authorization))
+    assert authenticator.authenticate.call_count == 2
+
+
+@pytest.mark.parametrize("result", [None, ("user", AccessToken(TOKEN, None)), ("user", None)])
+def test_not_cached(authenticator, result):
+    """Failed authentication, and tokens without an expiry, shouldn't be cached"""
+    authenticator.authenticate.return_value = result
+    cached_authentication = CachedTokenAuthentication(authenticator, 60)
+    for _ in range(2):
+        assert cached_authentication.authenticate(make_request()) == result
+    assert authenticator.authenticate.call_count == 2
+
+
+@pytest.mark.parametrize("expires_in,expected_timeout", [
+    (datetime.timedelta(hours=1), 60),
+    (datetime.timedelta(seconds=30), 29),
+    (datetime.timedelta(seconds=-30), -31),
+])
+def test_get_timeout(expires_in, expected_timeout):
+    """Results should be cached for the configured timeout, or until the token expires if that's sooner"""
+    cached_authentication = CachedTokenAuthentication(None, 60)
+    timeout = cached_authentication.get_timeout(AccessToken(TOKEN, now_in_utc() + expires_in))
+    assert expected_timeout <= timeout <= expected_timeout + 1
+
+
+def test_expired(authenticator):
+    """A token that has already expired shouldn't be cached"""
+    authenticator.authenticate.return_value = ("user", AccessToken(TOKEN, now_in_utc()))
+    cached_authentication = CachedTokenAuthentication(authenticator, 60)
+    for _ in range(2):
+        cached_authentication.authenticate(make_request())
+    assert authenticator.authenticate.call_count == 2
+
+
+def test_authenticate_header(authenticator):
+    """The WWW-Authenticate header should come from the wrapped authenticator"""
+    authenticator.authenticate_header.return_value = "Bearer realm=\"api\""
+    request = make_request()
+    assert CachedTokenAuthentication(authenticator, 60).authenticate_header(request) == "Bearer realm=\"api\""
+    authenticator.authenticate_header.assert_called_once_with(request)
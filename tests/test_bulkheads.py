@@ -0,0 +1,124 @@
+"""Tests for per-host limits on manifest fetches"""
+import threading
+
+from edx_video_api.bulkheads import CircuitState, HostBulkhead, HostBulkheads, Rejection
+
+
+def test_host_bulkhead_max_concurrent():
+    """HostBulkhead should reject fetches once max_concurrent are running, and count the rejections"""
+    bulkhead = HostBulkhead(max_concurrent=2, failure_threshold=3, reset_timeout=30)
+    assert bulkhead.acquire() is None
+    assert bulkhead.acquire() is None
+    assert bulkhead.acquire() is Rejection.host_busy
+    bulkhead.release(False)
+    assert bulkhead.acquire() is None
+    assert bulkhead.stats() == {
+        "state": "closed",
+        "active": 2,
+        "consecutive_failures": 0,
+        "rejections": {"host_busy": 1, "host_unavailable": 0},
+    }
+
+
+def test_host_bulkhead_circuit_breaker(mocker):
+    """
+    HostBulkhead should reject every fetch for reset_timeout seconds after failure_threshold failures in a row, then
+    let a single trial fetch through, which closes the breaker if it succeeds
+    """
+    patched_time = mocker.patch("edx_video_api.bulkheads.time.time", return_value=1000)
+    bulkhead = HostBulkhead(max_concurrent=None, failure_threshold=2, reset_timeout=30)
+    for failed in (True, False, True, True):
+        assert bulkhead.acquire() is None
+        bulkhead.release(failed)
+    assert bulkhead.state is CircuitState.open
+    assert bulkhead.acquire() is Rejection.host_unavailable
+
+    patched_time.return_value = 1030
+    assert bulkhead.acquire() is None
+    assert bulkhead.state is CircuitState.half_open
+    assert bulkhead.acquire() is Rejection.host_unavailable
+    bulkhead.release(False)
+    assert bulkhead.state is CircuitState.closed
+    assert bulkhead.acquire() is None
+    assert bulkhead.stats()["rejections"] == {"host_busy": 0, "host_unavailable": 2}
+
+
+def test_host_bulkhead_trial_failure(mocker):
+    """A failed trial fetch should open the breaker again for another reset_timeout seconds"""
+    patched_time = mocker.patch("edx_video_api.bulkheads.time.time", return_value=1000)
+    bulkhead = HostBulkhead(max_concurrent=None, failure_threshold=1, reset_timeout=30)
+    bulkhead.acquire()
+    bulkhead.release(True)
+    patched_time.return_value = 1031
+    assert bulkhead.acquire() is None
+    bulkhead.release(True)
+    assert bulkhead.state is CircuitState.open
+    patched_time.return_value = 1060
+    assert bulkhead.acquire() is Rejection.host_unavailable
+
+
+def test_host_bulkhead_stale_release(mocker):
+    """
+    While the breaker is half open, a fetch that started before it opened shouldn't change its state when it
+    finishes; only the trial fetch should
+    """
+    patched_time = mocker.patch("edx_video_api.bulkheads.time.time", return_value=1000)
+    bulkhead = HostBulkhead(max_concurrent=None, failure_threshold=1, reset_timeout=30)
+    acquired = threading.Event()
+    trial_started = threading.Event()
+
+    def stale_fetch():
+        """Starts a fetch while the breaker is closed, and finishes it successfully once the trial has started"""
+        assert bulkhead.acquire() is None
+        acquired.set()
+        trial_started.wait(5)
+        bulkhead.release(False)
+
+    thread = threading.Thread(target=stale_fetch)
+    thread.start()
+    acquired.wait(5)
+    bulkhead.acquire()
+    bulkhead.release(True)
+    assert bulkhead.state is CircuitState.open
+
+    patched_time.return_value = 1030
+    assert bulkhead.acquire() is None
+    trial_started.set()
+    thread.join(5)
+    assert bulkhead.state is CircuitState.half_open
+    assert bulkhead.acquire() is Rejection.host_unavailable
+    bulkhead.release(False)
+    assert bulkhead.state is CircuitState.closed
+    assert bulkhead.active == 0
+
+
+def test_host_bulkheads_keep_active_hosts():
+    """HostBulkheads shouldn't evict a host while it has running fetches"""
+    bulkheads = HostBulkheads(max_concurrent=1, failure_threshold=5, reset_timeout=30, max_hosts=1)
+    busy_bulkhead = bulkheads.get("example.com")
+    assert busy_bulkhead.acquire() is None
+    bulkheads.get("other.example.com")
+    assert bulkheads.get("example.com") is busy_bulkhead
+    assert bulkheads.get("example.com").acquire() is Rejection.host_busy
+    busy_bulkhead.release(False)
+    bulkheads.get("third.example.com")
+    assert bulkheads.get("example.com") is not busy_bulkhead
+
+
+def test_host_bulkheads():
+    """HostBulkheads should keep a HostBulkhead per host, and only report the stats of hosts that aren't idle"""
+    bulkheads = HostBulkheads(max_concurrent=1, failure_threshold=5, reset_timeout=30, max_hosts=10)
+    assert bulkheads.get("example.com") is bulkheads.get("example.com")
+    assert bulkheads.get("example.com").acquire() is None
+    assert bulkheads.get("other.example.com").acquire() is None
+    bulkheads.get("other.example.com").release(False)
+    assert bulkheads.stats() == {
+        "example.com": {
+            "state": "closed",
+            "active": 1,
+            "consecutive_failures": 0,
+            "rejections": {"host_busy": 0, "host_unavailable": 0},
+        },
+    }
+    bulkheads.clear()
+    assert bulkheads.stats() == {}
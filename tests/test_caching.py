@@ -0,0 +1,139 @@
+"""Tests for caches"""
+# pylint: disable=redefined-outer-name
+from uuid import uuid4
+
+import pytest
+from django.core.cache import caches
+
+from edx_video_api.caching import LRUCache, TieredCache, get_chunked, set_chunked
+
+
+def test_lru_cache_eviction():
+    """LRUCache should evict the least recently used entry when it's full"""
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_lru_cache_can_evict():
+    """LRUCache should only evict the entries that can_evict allows, and grow past max_size while none can be"""
+    cache = LRUCache(1, can_evict=lambda value: value > 0)
+    cache.set("a", 0)
+    cache.set("b", 1)
+    assert len(cache) == 2
+    cache.set("c", 2)
+    assert cache.get("a") == 0
+    assert cache.get("b") is None
+    assert cache.get("c") == 2
+    assert len(cache) == 2
+
+
+def test_lru_cache_delete_and_clear():
+    """LRUCache should support removing one or all entries"""
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    cache.delete("missing")
+    assert cache.get("a") is None
+    cache.clear()
+    assert cache.get("b") is None
+
+
+@pytest.fixture()
+def tiered_cache():
+    """Fixture for a TieredCache backed by the default Django cache"""
+    caches["default"].clear()
+    return TieredCache("test", 10, cache_alias="default")
+
+
+def test_tiered_cache_shared_tier(tiered_cache):
+    """TieredCache should fall back to the shared tier and repopulate the local tier from it"""
+    tiered_cache.set(u"key", {"value": 1}, 60)
+    tiered_cache.local.clear()
+    assert tiered_cache.get(u"key") == {"value": 1}
+    assert tiered_cache.local.get(u"key")[0] == {"value": 1}
+    tiered_cache.delete(u"key")
+    assert tiered_cache.get(u"key") is None
+    assert caches["default"].get(tiered_cache.shared_key(u"key")) is None
+
+
+def test_tiered_cache_get_many(mocker, tiered_cache):
+    """TieredCache.get_many should read values missing from the local tier from the shared tier in one call"""
+    tiered_cache.set(u"local", 1, 60)
+    tiered_cache.set(u"shared", 2, 60)
+    tiered_cache.local.delete(u"shared")
+    patched_get_many = mocker.patch.object(
+        caches["default"], "get_many", wraps=caches["default"].get_many
+    )
+    assert tiered_cache.get_many([u"local", u"shared", u"missing"]) == {u"local": 1, u"shared": 2}
+    patched_get_many.assert_called_once()
+    assert sorted(patched_get_many.call_args[0][0]) == sorted(
+        [tiered_cache.shared_key(u"shared"), tiered_cache.shared_key(u"missing")]
+    )
+    assert tiered_cache.local.get(u"shared")[0] == 2
+
+
+def test_tiered_cache_expiry(mocker, tiered_cache):
+    """TieredCache should expire values in both tiers, including values copied from the shared tier"""
+    patched_time = mocker.patch("edx_video_api.caching.time.time", return_value=1000)
+    tiered_cache.set(u"key", 1, 60)
+    tiered_cache.local.clear()
+    patched_time.return_value = 1059
+    assert tiered_cache.get(u"key") == 1
+    # Django's local memory cache uses its own clock, so the shared tier still has the value
+    patched_time.return_value = 1061
+    assert tiered_cache.get(u"key") is None
+
+
+def test_tiered_cache_local_timeout(mocker):
+    """TieredCache should re-read the shared tier once its local copy of a value is older than the local timeout"""
+    caches["default"].clear()
+    cache = TieredCache("test", 10, cache_alias="default", local_timeout=10)
+    patched_time = mocker.patch("edx_video_api.caching.time.time", return_value=1000)
+    cache.set(u"key", 1, 60)
+    # Simulate another process changing the value
+    caches["default"].set(cache.shared_key(u"key"), (2, 1060), 60)
+    patched_time.return_value = 1009
+    assert cache.get(u"key") == 1
+    patched_time.return_value = 1011
+    assert cache.get(u"key") == 2
+
+
+def test_tiered_cache_local_only():
+    """TieredCache should work without a shared tier"""
+    cache = TieredCache("test", 10)
+    assert cache.shared is None
+    cache.set(u"key", 1, 60)
+    assert cache.get(u"key") == 1
+
+
+def test_chunked():
+    """set_chunked should split a value across several keys, which get_chunked reassembles"""
+    cache = caches["default"]
+    value = {"entries": [uuid4().hex for _ in range(100)]}
+    set_chunked(cache, "chunked", value, 60, chunk_size=100)
+    write_id, chunk_count = cache.get("chunked")
+    assert chunk_count > 1
+    assert get_chunked(cache, "chunked") == value
+
+    set_chunked(cache, "chunked", [1, 2], 60, chunk_size=100)
+    assert get_chunked(cache, "chunked") == [1, 2]
+    # The previous write's chunks are deleted
+    assert cache.get("chunked:{}:0".format(write_id)) is None
+
+
+def test_chunked_missing():
+    """get_chunked should return None if the value or any of its chunks is missing"""
+    cache = caches["default"]
+    assert get_chunked(cache, "chunked") is None
+    set_chunked(cache, "chunked", [uuid4().hex for _ in range(100)], 60, chunk_size=100)
+    write_id, _ = cache.get("chunked")
+    cache.delete("chunked:{}:1".format(write_id))
+    assert get_chunked(cache, "chunked") is None
@@ -0,0 +1,120 @@
+"""Tests for tracking changes to course videos"""
+from datetime import timedelta
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.utils import timezone
+
+from edx_video_api.changes import (
+    course_version_key,
+    course_videos_changed,
+    get_change_token,
+    get_course_version,
+    get_oldest_change_token,
+    is_change_feed_expired,
+    prune_video_changes,
+    video_changed,
+)
+from edx_video_api.models import VideoChange
+
+COURSE_ID = "course-v1:MIT+DemoX+Demo_Course_2"
+OTHER_COURSE_ID = "course-v1:MIT+Other+Course"
+
+
+def test_get_course_version():
+    """get_course_version should return the same token until the course's videos change"""
+    version = get_course_version(COURSE_ID)
+    assert get_course_version(COURSE_ID) == version
+    other_version = get_course_version(OTHER_COURSE_ID)
+    course_videos_changed([COURSE_ID])
+    assert get_course_version(COURSE_ID) != version
+    assert get_course_version(OTHER_COURSE_ID) == other_version
+
+
+def test_get_course_version_evicted():
+    """get_course_version should return a new token if the stored one was evicted"""
+    version = get_course_version(COURSE_ID)
+    caches["default"].delete(course_version_key(COURSE_ID))
+    assert get_course_version(COURSE_ID) != version
+
+
+@pytest.mark.django_db
+def test_video_changed():
+    """video_changed should record a change in each course's change feed and give the courses new versions"""
+    version = get_course_version(COURSE_ID)
+    video_changed("video-1", [COURSE_ID, OTHER_COURSE_ID, COURSE_ID])
+    assert sorted(VideoChange.objects.values_list("course_id", "edx_video_id")) == [
+        (COURSE_ID, "video-1"), (OTHER_COURSE_ID, "video-1")
+    ]
+    assert get_course_version(COURSE_ID) != version
+
+
+@pytest.mark.django_db
+def test_get_change_token(settings):
+    """get_change_token should return the id of the course's latest settled change, and never go backwards"""
+    assert get_change_token(COURSE_ID) == 0
+    video_changed("video-1", [COURSE_ID])
+    # The change is too recent to be covered by a token
+    assert get_change_token(COURSE_ID) == 0
+    settings.VIDEO_API = dict(settings.VIDEO_API, CHANGE_TOKEN_SETTLE_TIME=0)
+    change_id = VideoChange.objects.get(course_id=COURSE_ID).id
+    assert get_change_token(COURSE_ID) == change_id
+    video_changed("video-2", [OTHER_COURSE_ID])
+    assert get_change_token(COURSE_ID) == change_id
+    assert get_change_token(COURSE_ID, previous_token=change_id + 10) == change_id + 10
+
+
+@pytest.mark.django_db
+def test_get_oldest_change_token(settings):
+    """get_oldest_change_token should return the id before the oldest change, once that change has settled"""
+    assert get_oldest_change_token() == 0
+    for edx_video_id in ("video-1", "video-2"):
+        video_changed(edx_video_id, [COURSE_ID])
+    oldest_id = VideoChange.objects.order_by("id").first().id
+    VideoChange.objects.filter(id=oldest_id).delete()
+    assert get_oldest_change_token() == 0
+    settings.VIDEO_API = dict(settings.VIDEO_API, CHANGE_TOKEN_SETTLE_TIME=0)
+    assert get_oldest_change_token() == oldest_id
+
+
+def test_is_change_feed_expired(settings):
+    """is_change_feed_expired should return True for tokens older than the oldest one, and times past the retention"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, CHANGE_RETENTION=60)
+    assert is_change_feed_expired(10) is False
+    assert is_change_feed_expired(10, change_token=9) is True
+    assert is_change_feed_expired(10, change_token=10) is False
+    assert is_change_feed_expired(0, modified_since=timezone.now() - timedelta(seconds=30)) is False
+    assert is_change_feed_expired(0, modified_since=timezone.now() - timedelta(seconds=90)) is True
+
+
+@pytest.mark.django_db
+def test_prune_video_changes(settings):
+    """prune_video_changes should delete the changes older than the retention, in batches, keeping the latest one"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, CHANGE_RETENTION=60)
+    for index in range(5):
+        video_changed("video-{}".format(index), [COURSE_ID])
+    changes = list(VideoChange.objects.order_by("id"))
+    VideoChange.objects.filter(id__in=[change.id for change in changes[:3]]).update(
+        changed=timezone.now() - timedelta(seconds=120)
+    )
+    assert prune_video_changes(batch_size=2) == 3
+    assert list(VideoChange.objects.order_by("id").values_list("id", flat=True)) == [
+        change.id for change in changes[3:]
+    ]
+
+    VideoChange.objects.update(changed=timezone.now() - timedelta(seconds=120))
+    assert prune_video_changes() == 1
+    assert list(VideoChange.objects.values_list("id", flat=True)) == [changes[-1].id]
+
+
+@pytest.mark.django_db
+def test_prune_video_changes_command(mocker):
+    """The prune_video_changes command should prune the change feeds and report how many changes it deleted"""
+    patched_prune = mocker.patch(
+        "edx_video_api.management.commands.prune_video_changes.prune_video_changes", return_value=3
+    )
+    stdout = mocker.Mock()
+    call_command("prune_video_changes", stdout=stdout)
+    patched_prune.assert_called_once_with()
+    assert "Deleted 3" in stdout.write.call_args[0][0]
@@ -0,0 +1,105 @@
+"""Tests for course lookups"""
+import pytest
+from opaque_keys.edx.keys import CourseKey
+
+from edx_video_api.courses import (
+    CourseStatus,
+    get_course_status,
+    get_course_statuses,
+    invalidate_course_status,
+    lookup_course_status,
+)
+
+COURSE_ID = "course-v1:MIT+DemoX+Demo_Course_2"
+
+
+@pytest.mark.parametrize('course_overview,expected_status', [
+    (True, CourseStatus.exists),
+    (None, CourseStatus.not_found),
+])
+def test_lookup_course_status(mocker, course_overview, expected_status):
+    """lookup_course_status should return whether a CourseOverview exists for the course key"""
+    patched_get = mocker.patch(
+        "edx_video_api.utils.DummyCourseOverview.get_from_id_if_exists",
+        return_value=course_overview
+    )
+    assert lookup_course_status(COURSE_ID) == expected_status
+    patched_get.assert_called_once_with(CourseKey.from_string(COURSE_ID))
+
+
+def test_lookup_course_status_invalid_key(mocker):
+    """lookup_course_status should not look up a CourseOverview for an invalid course key"""
+    patched_get = mocker.patch("edx_video_api.utils.DummyCourseOverview.get_from_id_if_exists")
+    assert lookup_course_status("not a course key") == CourseStatus.invalid_key
+    patched_get.assert_not_called()
+
+
+@pytest.mark.parametrize('course_id,course_overview', [
+    (COURSE_ID, True),
+    (COURSE_ID, None),
+    ("not a course key", None),
+])
+def test_get_course_status_cached(mocker, course_id, course_overview):
+    """get_course_status should only parse the course key and look up the course once"""
+    patched_parse = mocker.patch("edx_video_api.courses.CourseKey.from_string", wraps=CourseKey.from_string)
+    mocker.patch("edx_video_api.utils.DummyCourseOverview.get_from_id_if_exists", return_value=course_overview)
+    first_status = get_course_status(course_id)
+    assert get_course_status(course_id) == first_status
+    patched_parse.assert_called_once_with(course_id)
+
+
+@pytest.mark.parametrize('course_overview,setting_name', [
+    (True, "COURSE_EXISTS_TIMEOUT"),
+    (None, "COURSE_NOT_FOUND_TIMEOUT"),
+])
+def test_get_course_status_timeouts(settings, mocker, course_overview, setting_name):
+    """Results for existing and missing courses should be cached for their own configured lengths of time"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, **{setting_name: 5})
+    patched_set = mocker.patch("edx_video_api.courses.course_cache.set")
+    mocker.patch("edx_video_api.utils.DummyCourseOverview.get_from_id_if_exists", return_value=course_overview)
+    course_status = get_course_status(COURSE_ID)
+    patched_set.assert_called_once_with(COURSE_ID, course_status, 5)
+
+
+def test_invalidate_course_status(mocker):
+    """invalidate_course_status should cause the course to be looked up again"""
+    patched_get = mocker.patch(
+        "edx_video_api.utils.DummyCourseOverview.get_from_id_if_exists",
+        return_value=None
+    )
+    assert get_course_status(COURSE_ID) == CourseStatus.not_found
+    patched_get.return_value = True
+    invalidate_course_status(CourseKey.from_string(COURSE_ID))
+    assert get_course_status(COURSE_ID) == CourseStatus.exists
+    assert patched_get.call_count == 2
+
+
+def test_get_course_statuses(mocker):
+    """get_course_statuses should look up every uncached course with a single CourseOverview query"""
+    other_course_id = "course-v1:MIT+Other+Course"
+    missing_course_id = "course-v1:MIT+Missing+Course"
+    patched_get = mocker.patch("edx_video_api.utils.DummyCourseOverview.get_from_id_if_exists", return_value=True)
+    patched_get_many = mocker.patch(
+        "edx_video_api.utils.DummyCourseOverview.get_from_ids_if_exists",
+        return_value={CourseKey.from_string(other_course_id): True},
+    )
+    get_course_status(COURSE_ID)
+    course_statuses = get_course_statuses([COURSE_ID, other_course_id, missing_course_id, "not a course key"])
+    assert course_statuses == {
+        COURSE_ID: CourseStatus.exists,
+        other_course_id: CourseStatus.exists,
+        missing_course_id: CourseStatus.not_found,
+        "not a course key": CourseStatus.invalid_key,
+    }
+    patched_get.assert_called_once()
+    patched_get_many.assert_called_once()
+    assert sorted(patched_get_many.call_args[0][0]) == sorted([
+        CourseKey.from_string(other_course_id), CourseKey.from_string(missing_course_id)
+    ])
+    # Every result is cached
+    assert get_course_statuses([other_course_id, missing_course_id, "not a course key"]) == {
+        other_course_id: CourseStatus.exists,
+        missing_course_id: CourseStatus.not_found,
+        "not a course key": CourseStatus.invalid_key,
+    }
+    patched_get_many.assert_called_once()
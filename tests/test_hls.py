@@ -0,0 +1,389 @@
+"""Tests for HLS manifest validation"""
+# pylint: disable=redefined-outer-name
+import pytest
+import requests
+
+from edx_video_api import hls
+from edx_video_api.bulkheads import HostBulkheads
+from edx_video_api.hls import (
+    ManifestFailure,
+    ManifestFetcher,
+    ManifestResult,
+    is_valid_hls_url,
+    validate_hls_url,
+    validate_hls_urls,
+)
+
+HLS_URL = "http://example.com/video.m3u8"
+MASTER_PLAYLIST = b"""#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=1280000,RESOLUTION=640x360
+low/video.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=2560000,RESOLUTION=1280x720
+high/video.m3u8
+"""
+MEDIA_PLAYLIST = b"""#EXTM3U
+#EXT-X-TARGETDURATION:10
+#EXT-X-MEDIA-SEQUENCE:0
+#EXTINF:10.0,
+segment0.ts
+#EXT-X-ENDLIST
+"""
+VALIDATOR_HEADERS = {"ETag": '"abc"', "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"}
+
+
+def mock_response(mocker, status_code=200, body=MASTER_PLAYLIST, headers=None, url=HLS_URL, chunks=None):
+    """Returns a mock streamed response, whose body is read in the given chunks (or one line per chunk)"""
+    return mocker.Mock(
+        status_code=status_code,
+        headers=VALIDATOR_HEADERS if headers is None else headers,
+        iter_content=mocker.Mock(return_value=iter(body.splitlines(True) if chunks is None else chunks)),
+        url=url,
+    )
+
+
+def mock_playlists(mocker, playlists):
+    """Returns a side effect for a patched session.get that responds with the playlist body for each URL"""
+    def get(url, **kwargs):  # pylint: disable=unused-argument
+        """Returns a response for the playlist at a URL, or a 404 response"""
+        if url not in playlists:
+            return mock_response(mocker, status_code=404, body=b"", url=url)
+        return mock_response(mocker, body=playlists[url], url=url)
+    return get
+
+
+@pytest.fixture()
+def mock_get(mocker):
+    """
+    Fixture that patches the manifest fetcher's session to return a valid master playlist, without fetching the
+    variant playlists
+    """
+    manifest_fetcher = hls.get_manifest_fetcher()
+    mocker.patch.object(manifest_fetcher, "extract_metadata", False)
+    return mocker.patch.object(
+        manifest_fetcher.session,
+        "get",
+        side_effect=mock_playlists(mocker, {HLS_URL: MASTER_PLAYLIST}),
+    )
+
+
+@pytest.mark.parametrize('status_code,body,headers,expected_failure', [
+    (200, MASTER_PLAYLIST, {}, None),
+    (200, b"\xef\xbb\xbf#EXTM3U\n#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID=\"aac\",URI=\"a.m3u8\"\n", {}, None),
+    (200, MEDIA_PLAYLIST, {}, ManifestFailure.no_variants),
+    (200, b"<html></html>", {}, ManifestFailure.not_a_manifest),
+    (200, b"", {}, ManifestFailure.not_a_manifest),
+    (200, MASTER_PLAYLIST, {"Content-Length": "2000000"}, ManifestFailure.too_large),
+    (200, b"#EXTM3U\n" + b"#EXT-X-VERSION:3\n" * 100000, {}, ManifestFailure.too_large),
+    (404, MASTER_PLAYLIST, {}, ManifestFailure.http_error),
+])
+def test_fetch(mocker, status_code, body, headers, expected_failure):
+    """ManifestFetcher.fetch should return the reason a manifest is invalid, or no failure if it's valid"""
+    fetcher = ManifestFetcher(1, 1, 10, 1024 * 1024, 1)
+    response = mock_response(mocker, status_code=status_code, body=body, headers=headers)
+    mocker.patch.object(fetcher.session, "get", return_value=response)
+    result = fetcher.fetch(HLS_URL)
+    assert result.failure == expected_failure
+    assert result.valid is (expected_failure is None)
+    response.close.assert_called_once_with()
+
+
+@pytest.mark.parametrize('exception,expected_failure', [
+    (requests.ConnectTimeout, ManifestFailure.timeout),
+    (requests.ReadTimeout, ManifestFailure.timeout),
+    (requests.ConnectionError, ManifestFailure.connection_error),
+    (requests.TooManyRedirects, ManifestFailure.connection_error),
+    (requests.exceptions.MissingSchema, ManifestFailure.invalid_url),
+    (requests.exceptions.InvalidSchema, ManifestFailure.invalid_url),
+    (requests.exceptions.InvalidURL, ManifestFailure.invalid_url),
+])
+def test_fetch_request_error(mocker, exception, expected_failure):
+    """ManifestFetcher.fetch should return the reason a manifest could not be fetched"""
+    fetcher = ManifestFetcher(1, 1, 10, 1024, 1)
+    mocker.patch.object(fetcher.session, "get", side_effect=exception)
+    assert fetcher.fetch(HLS_URL).failure == expected_failure
+
+
+@pytest.mark.parametrize('status_code,exception,opens_breaker', [
+    (500, None, True),
+    (503, None, True),
+    (None, requests.ReadTimeout, True),
+    (None, requests.ConnectionError, True),
+    (None, requests.exceptions.MissingSchema, False),
+    (None, requests.exceptions.InvalidURL, False),
+    (404, None, False),
+    (200, None, False),
+])
+def test_fetch_circuit_breaker(mocker, status_code, exception, opens_breaker):
+    """
+    ManifestFetcher.fetch should open a host's circuit breaker after timeouts, connection errors and server errors, and
+    then reject fetches from the host without requesting them
+    """
+    bulkheads = HostBulkheads(max_concurrent=None, failure_threshold=2, reset_timeout=30, max_hosts=10)
+    fetcher = ManifestFetcher(1, 1, 10, 1024, 1, bulkheads=bulkheads)
+    patched_get = mocker.patch.object(
+        fetcher.session,
+        "get",
+        side_effect=exception or (lambda *args, **kwargs: mock_response(mocker, status_code=status_code)),
+    )
+    fetcher.fetch(HLS_URL)
+    fetcher.fetch(HLS_URL)
+    result = fetcher.fetch(HLS_URL)
+    assert result.rejected is opens_breaker
+    assert patched_get.call_count == (2 if opens_breaker else 3)
+    if opens_breaker:
+        assert result.failure == ManifestFailure.host_unavailable
+        assert bulkheads.stats()["example.com"]["state"] == "open"
+        assert fetcher.fetch("http://other.example.com/video.m3u8").rejected is False
+
+
+def test_fetch_host_busy(mocker):
+    """ManifestFetcher.fetch should reject a fetch from a host that already has as many running as it's allowed"""
+    bulkheads = HostBulkheads(max_concurrent=1, failure_threshold=5, reset_timeout=30, max_hosts=10)
+    fetcher = ManifestFetcher(1, 1, 10, 1024, 1, bulkheads=bulkheads)
+    patched_get = mocker.patch.object(fetcher.session, "get", return_value=mock_response(mocker))
+    bulkheads.get("example.com").acquire()
+    assert fetcher.fetch(HLS_URL) == ManifestResult(ManifestFailure.host_busy)
+    patched_get.assert_not_called()
+    bulkheads.get("example.com").release(False)
+    assert fetcher.fetch(HLS_URL).valid is True
+    assert bulkheads.get("example.com").active == 0
+
+
+def test_fetch_bounded(mocker):
+    """ManifestFetcher.fetch should stream the manifest with timeouts, and stop reading at the first variant tag"""
+    def chunks():
+        """Yields a valid manifest, then fails if reading continues"""
+        yield b"#EXTM3U\n#EXT-X-STREAM-INF:"
+        yield b"BANDWIDTH=1280000\n"
+        raise AssertionError("Read past the first variant tag")
+
+    fetcher = ManifestFetcher(2, 3, 10, 1024, 1)
+    response = mock_response(mocker, headers=VALIDATOR_HEADERS, chunks=chunks())
+    patched_get = mocker.patch.object(fetcher.session, "get", return_value=response)
+    assert fetcher.fetch(HLS_URL) == ManifestResult(None, '"abc"', "Wed, 21 Oct 2015 07:28:00 GMT")
+    patched_get.assert_called_once_with(HLS_URL, headers={}, timeout=(2, 3), stream=True)
+    response.iter_content.assert_called_once_with(hls.MANIFEST_CHUNK_SIZE)
+
+
+@pytest.mark.parametrize('chunks,expected_failure', [
+    ([MASTER_PLAYLIST[:5], MASTER_PLAYLIST[5:30], MASTER_PLAYLIST[30:]], None),
+    ([MASTER_PLAYLIST.replace(b"\n", b"\r\n")], None),
+    ([b"#EXTM3U\n#EXT-X-VERSION:3"], ManifestFailure.no_variants),
+    ([b"#EXTM3U"] + [b"x" * 512] * 3, ManifestFailure.too_large),
+])
+def test_fetch_chunks(mocker, chunks, expected_failure):
+    """
+    ManifestFetcher.fetch should split the manifest into lines across chunks, and stop at the size limit even when
+    there are no newlines
+    """
+    fetcher = ManifestFetcher(1, 1, 10, 1024, 1, extract_metadata=True)
+    mocker.patch.object(fetcher.session, "get", side_effect=lambda url, **kwargs: (
+        mock_response(mocker, chunks=chunks) if url == HLS_URL else mock_response(mocker, status_code=404)
+    ))
+    assert fetcher.fetch(HLS_URL).failure == expected_failure
+
+
+def test_fetch_metadata(mocker):
+    """With metadata extraction, ManifestFetcher.fetch should return the longest variant duration and the highest
+    variant bitrate"""
+    fetcher = ManifestFetcher(1, 1, 10, 1024, 1, extract_metadata=True)
+    patched_get = mocker.patch.object(fetcher.session, "get", side_effect=mock_playlists(mocker, {
+        HLS_URL: MASTER_PLAYLIST,
+        "http://example.com/low/video.m3u8": MEDIA_PLAYLIST,
+        "http://example.com/high/video.m3u8": MEDIA_PLAYLIST.replace(b"#EXT-X-ENDLIST", b"#EXTINF:2.5,\nb.ts"),
+    }))
+    result = fetcher.fetch(HLS_URL)
+    assert result == ManifestResult(None, '"abc"', "Wed, 21 Oct 2015 07:28:00 GMT", duration=12.5, bitrate=2560000)
+    patched_get.assert_any_call("http://example.com/low/video.m3u8", timeout=(1, 1), stream=True)
+
+
+@pytest.mark.parametrize('playlists,expected_duration,expected_bitrate', [
+    ({}, None, 2560000),
+    ({"http://example.com/low/video.m3u8": b"#EXTINF:10.0,\nsegment0.ts\n"}, None, 2560000),
+    ({"http://example.com/low/video.m3u8": b"#EXTM3U\n#EXTINF:ten,\nsegment0.ts\n"}, None, 2560000),
+    ({"http://example.com/low/video.m3u8": MEDIA_PLAYLIST + b"#EXTINF:10.0,\nsegment1.ts\n"}, 10.0, 2560000),
+])
+def test_fetch_metadata_unreadable(mocker, playlists, expected_duration, expected_bitrate):
+    """A manifest should still be valid when its variant playlists can't be read, just without a duration"""
+    fetcher = ManifestFetcher(1, 1, 10, 1024, 1, extract_metadata=True)
+    mocker.patch.object(fetcher.session, "get", side_effect=mock_playlists(mocker, dict(playlists, **{
+        HLS_URL: MASTER_PLAYLIST,
+    })))
+    result = fetcher.fetch(HLS_URL)
+    assert result.valid is True
+    assert result.duration == expected_duration
+    assert result.bitrate == expected_bitrate
+
+
+def test_fetch_metadata_undecodable_variant_url(mocker):
+    """A manifest whose variant URL isn't UTF-8 should be invalid"""
+    fetcher = ManifestFetcher(1, 1, 10, 1024, 1, extract_metadata=True)
+    mocker.patch.object(fetcher.session, "get", return_value=mock_response(
+        mocker, body=b"#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=1280000\nlow/vid\xe9o.m3u8\n"
+    ))
+    assert fetcher.fetch(HLS_URL).failure == ManifestFailure.not_a_manifest
+
+
+def test_fetch_metadata_no_bandwidth(mocker):
+    """ManifestFetcher.fetch should return no bitrate if none of the variants has a BANDWIDTH"""
+    fetcher = ManifestFetcher(1, 1, 10, 1024, 1, extract_metadata=True)
+    master_playlist = b"#EXTM3U\n#EXT-X-STREAM-INF:RESOLUTION=640x360\nlow/video.m3u8\n"
+    mocker.patch.object(fetcher.session, "get", side_effect=mock_playlists(mocker, {
+        HLS_URL: master_playlist,
+        "http://example.com/low/video.m3u8": MEDIA_PLAYLIST,
+    }))
+    result = fetcher.fetch(HLS_URL)
+    assert result.valid is True
+    assert result.bitrate is None
+
+
+def test_from_settings_metadata_off_by_default(settings):
+    """ManifestFetcher.from_settings should only extract metadata if HLS_EXTRACT_METADATA is set"""
+    settings.VIDEO_API = {
+        key: value for key, value in settings.VIDEO_API.items() if key != "HLS_EXTRACT_METADATA"
+    }
+    assert ManifestFetcher.from_settings().extract_metadata is False
+    settings.VIDEO_API = dict(settings.VIDEO_API, HLS_EXTRACT_METADATA=True)
+    assert ManifestFetcher.from_settings().extract_metadata is True
+
+
+def test_fetch_metadata_max_variants(mocker):
+    """ManifestFetcher.fetch should fetch at most max_variants variant playlists, resolved against the final URL"""
+    fetcher = ManifestFetcher(1, 1, 10, 1024, 1, extract_metadata=True, max_variants=1)
+    patched_get = mocker.patch.object(fetcher.session, "get", side_effect=lambda url, **kwargs: mock_response(
+        mocker, body=MASTER_PLAYLIST if url == HLS_URL else MEDIA_PLAYLIST, url="http://cdn.example.com/v/video.m3u8"
+    ))
+    assert fetcher.fetch(HLS_URL).duration == 10.0
+    assert [call[0][0] for call in patched_get.call_args_list] == [HLS_URL, "http://cdn.example.com/v/low/video.m3u8"]
+
+
+def test_fetch_deadline(mocker):
+    """ManifestFetcher.fetch should give up on a manifest that takes longer than the deadline to read"""
+    fetcher = ManifestFetcher(1, 1, 10, 1024, 1)
+    mocker.patch.object(fetcher.session, "get", return_value=mock_response(mocker))
+    mocker.patch("edx_video_api.hls.time.time", side_effect=[1000, 1005, 1011])
+    assert fetcher.fetch(HLS_URL).failure == ManifestFailure.timeout
+
+
+def test_fetch_metadata_deadline(mocker):
+    """A manifest that has shown a variant tag should still be valid when the deadline passes before the end"""
+    fetcher = ManifestFetcher(1, 1, 10, 1024, 1, extract_metadata=True)
+    mocker.patch.object(fetcher.session, "get", return_value=mock_response(mocker))
+    mocker.patch("edx_video_api.hls.time.time", side_effect=[1000, 1001, 1002, 1011])
+    result = fetcher.fetch(HLS_URL)
+    assert result.valid is True
+    assert result.bitrate == 1280000
+    assert result.duration is None
+
+
+def test_fetch_session_pooled():
+    """ManifestFetcher should reuse connections through a pooled session"""
+    fetcher = ManifestFetcher(1, 1, 10, 1024, 7)
+    adapter = fetcher.session.get_adapter(HLS_URL)
+    assert adapter is fetcher.session.get_adapter("https://example.com/video.m3u8")
+    assert adapter._pool_maxsize == 7  # pylint: disable=protected-access
+
+
+def test_get_manifest_fetcher(mocker):
+    """get_manifest_fetcher should create the fetcher from settings on first use, and reuse it after that"""
+    mocker.patch.object(hls, "_manifest_fetcher", None)
+    spied_from_settings = mocker.spy(ManifestFetcher, "from_settings")
+    manifest_fetcher = hls.get_manifest_fetcher()
+    assert isinstance(manifest_fetcher, ManifestFetcher)
+    assert hls.get_manifest_fetcher() is manifest_fetcher
+    spied_from_settings.assert_called_once_with()
+
+
+def test_is_valid_hls_url(mocker, mock_get):
+    """is_valid_hls_url should return whether the manifest is valid"""
+    assert is_valid_hls_url(HLS_URL) is True
+    mock_get.side_effect = None
+    mock_get.return_value = mock_response(mocker, status_code=500)
+    hls.validation_cache.local.clear()
+    assert is_valid_hls_url(HLS_URL) is False
+
+
+def test_validate_hls_url_rejected(mocker):
+    """validate_hls_url should not cache a result for a fetch that the host's limits rejected"""
+    rejected_result = ManifestResult(ManifestFailure.host_unavailable)
+    patched_fetch = mocker.patch.object(
+        hls.get_manifest_fetcher(), "fetch", side_effect=[rejected_result, ManifestResult()]
+    )
+    assert validate_hls_url(HLS_URL) == rejected_result
+    assert validate_hls_url(HLS_URL).valid is True
+    assert validate_hls_url(HLS_URL).valid is True
+    assert patched_fetch.call_count == 2
+
+
+def test_validate_hls_url_cached(mock_get):
+    """validate_hls_url should not fetch the manifest again while the cached result is fresh"""
+    assert validate_hls_url(HLS_URL).valid is True
+    assert validate_hls_url(HLS_URL).valid is True
+    assert mock_get.call_count == 1
+
+
+@pytest.mark.parametrize('valid,setting_name', [
+    (True, "HLS_VALID_RESULT_TIMEOUT"),
+    (False, "HLS_INVALID_RESULT_TIMEOUT"),
+])
+def test_validate_hls_url_timeouts(settings, mocker, mock_get, valid, setting_name):
+    """Valid and invalid results should stay fresh for their own configured lengths of time"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, **{setting_name: 100})
+    if not valid:
+        mock_get.side_effect = lambda *args, **kwargs: mock_response(mocker, body=MEDIA_PLAYLIST)
+    patched_time = mocker.patch("edx_video_api.hls.time.time", return_value=1000)
+    assert validate_hls_url(HLS_URL).valid is valid
+    patched_time.return_value = 1099
+    assert validate_hls_url(HLS_URL).valid is valid
+    assert mock_get.call_count == 1
+    patched_time.return_value = 1101
+    assert validate_hls_url(HLS_URL).valid is valid
+    assert mock_get.call_count == 2
+
+
+def test_validate_hls_url_revalidation(mocker, mock_get):
+    """An expired result should be revalidated with a conditional request, and reused if it hasn't changed"""
+    patched_time = mocker.patch("edx_video_api.hls.time.time", return_value=1000)
+    first_result = validate_hls_url(HLS_URL)
+    assert first_result.valid is True
+    patched_time.return_value = 1000 + hls.VALID_RESULT_TIMEOUT + 1
+    mock_get.side_effect = None
+    mock_get.return_value = mock_response(mocker, status_code=304, body=b"", headers={})
+    assert validate_hls_url(HLS_URL) == first_result
+    assert mock_get.call_args[1]["headers"] == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT",
+    }
+    mock_get.return_value.iter_content.assert_not_called()
+    # The revalidated result is fresh again
+    assert validate_hls_url(HLS_URL).valid is True
+    assert mock_get.call_count == 2
+
+
+def test_validate_hls_url_not_modified_without_cache(mocker, mock_get):
+    """A 304 response to an unconditional request should not count as a valid manifest"""
+    mock_get.side_effect = lambda *args, **kwargs: mock_response(mocker, status_code=304)
+    assert validate_hls_url(HLS_URL).failure == ManifestFailure.http_error
+
+
+def test_validate_hls_urls(mocker):
+    """validate_hls_urls should validate each distinct URL on a bounded thread pool"""
+    patched_executor = mocker.patch("edx_video_api.hls.ThreadPoolExecutor", wraps=hls.ThreadPoolExecutor)
+    patched_validate = mocker.patch(
+        "edx_video_api.hls.validate_hls_url",
+        side_effect=lambda hls_url: ManifestResult(None if "good" in hls_url else ManifestFailure.http_error)
+    )
+    results = validate_hls_urls(["http://good.com/a.m3u8", "http://bad.com/b.m3u8", "http://good.com/a.m3u8"], 8)
+    assert results == {
+        "http://good.com/a.m3u8": ManifestResult(),
+        "http://bad.com/b.m3u8": ManifestResult(ManifestFailure.http_error),
+    }
+    assert patched_validate.call_count == 2
+    patched_executor.assert_called_once_with(max_workers=2)
+
+
+def test_validate_hls_urls_empty(mocker):
+    """validate_hls_urls should not start any threads if there are no URLs"""
+    patched_executor = mocker.patch("edx_video_api.hls.ThreadPoolExecutor")
+    assert validate_hls_urls([], 8) == {}
+    patched_executor.assert_not_called()
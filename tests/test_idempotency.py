@@ -0,0 +1,133 @@
+"""Tests for replaying responses to requests with an Idempotency-Key header"""
+# pylint: disable=redefined-outer-name
+import json
+
+import pytest
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from edx_video_api.hls import ManifestResult
+from edx_video_api.idempotency import idempotency_cache_key
+from edx_video_api.utils import DummyOAuth2Authentication
+from edx_video_api.views import CourseVideoListView
+
+COURSE_ID = "course-v1:MIT+DemoX+Demo_Course_2"
+HLS_URL = "http://example.com/video.m3u8"
+VIDEO_DATA = {"filename": "My Video", "hls_url": HLS_URL}
+
+
+@pytest.fixture()
+def user(mocker):
+    """Fixture for the user that requests are authenticated as"""
+    user = mocker.Mock(pk=1)
+    mocker.patch.object(DummyOAuth2Authentication, "authenticate", return_value=(user, None))
+    return user
+
+
+@pytest.fixture()
+def patched_create_video(mocker):
+    """Fixture that patches video creation and manifest validation"""
+    mocker.patch("edx_video_api.views.validate_hls_url", return_value=ManifestResult())
+    return mocker.patch("edx_video_api.views.create_video", side_effect=lambda video_data: video_data["edx_video_id"])
+
+
+def post(data, idempotency_key="key-1", course_id=COURSE_ID):
+    """Sends a POST request to create a video, and returns the rendered response"""
+    request = APIRequestFactory().post(
+        "/{}/".format(course_id), data, format="json", HTTP_IDEMPOTENCY_KEY=idempotency_key
+    )
+    return CourseVideoListView.as_view()(request, course_id=course_id).render()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("user")
+def test_idempotent_replay(patched_create_video):
+    """A request retried with the same Idempotency-Key should get the original response without creating anything"""
+    response = post(VIDEO_DATA)
+    assert response.status_code == status.HTTP_200_OK
+    assert "Idempotent-Replayed" not in response
+    replayed_response = post(VIDEO_DATA)
+    assert replayed_response.status_code == status.HTTP_200_OK
+    assert replayed_response["Idempotent-Replayed"] == "true"
+    assert json.loads(replayed_response.content) == json.loads(response.content)
+    patched_create_video.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_idempotent_scoped(mocker, user, patched_create_video):
+    """Stored responses should only be replayed for the same user and course"""
+    post(VIDEO_DATA)
+    user.pk = 2
+    assert "Idempotent-Replayed" not in post(VIDEO_DATA)
+    assert "Idempotent-Replayed" not in post(VIDEO_DATA, course_id="course-v1:MIT+Other+Course")
+    assert patched_create_video.call_count == 3
+    assert idempotency_cache_key(mocker.Mock(user=user), COURSE_ID, "key-1") != idempotency_cache_key(
+        mocker.Mock(user=user), COURSE_ID, "key-2"
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("user")
+def test_idempotent_different_request(patched_create_video):
+    """A request that reuses an Idempotency-Key for a different request should fail"""
+    post(VIDEO_DATA)
+    response = post(dict(VIDEO_DATA, filename="Another Video"))
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    patched_create_video.assert_called_once()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("user")
+def test_idempotent_error_not_stored(mocker, patched_create_video):
+    """Error responses should not be stored, so the request can be retried with the same key"""
+    mocker.patch("edx_video_api.views.validate_hls_url", return_value=ManifestResult(failure=mocker.Mock(value="x")))
+    assert post(VIDEO_DATA).status_code == status.HTTP_400_BAD_REQUEST
+    mocker.patch("edx_video_api.views.validate_hls_url", return_value=ManifestResult())
+    response = post(VIDEO_DATA)
+    assert response.status_code == status.HTTP_200_OK
+    assert "Idempotent-Replayed" not in response
+    patched_create_video.assert_called_once()
+
+
+@pytest.mark.usefixtures("user")
+def test_idempotent_in_progress(mocker, patched_create_video):
+    """A request with the same Idempotency-Key as one that is still being processed should fail"""
+    lock_key = "{}:lock".format(idempotency_cache_key(mocker.Mock(user=mocker.Mock(pk=1)), COURSE_ID, "key-1"))
+    caches["default"].add(lock_key, "fingerprint", 60)
+    response = post(VIDEO_DATA)
+    assert response.status_code == status.HTTP_409_CONFLICT
+    patched_create_video.assert_not_called()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("user")
+def test_idempotent_lock_owner(mocker, patched_create_video):
+    """
+    A request that outlived its lock shouldn't release the lock that another request with the same key took since,
+    but should release its own lock when it finishes
+    """
+    lock_key = "{}:lock".format(idempotency_cache_key(mocker.Mock(user=mocker.Mock(pk=1)), COURSE_ID, "key-1"))
+
+    def expire_lock(video_data):
+        """Replaces the lock, as if it expired and another request took it while the video was being created"""
+        caches["default"].set(lock_key, "other-owner", 60)
+        return video_data["edx_video_id"]
+    patched_create_video.side_effect = expire_lock
+    assert post(VIDEO_DATA).status_code == status.HTTP_200_OK
+    assert caches["default"].get(lock_key) == "other-owner"
+
+    caches["default"].delete(lock_key)
+    patched_create_video.side_effect = lambda video_data: video_data["edx_video_id"]
+    assert post(VIDEO_DATA, idempotency_key="key-2").status_code == status.HTTP_200_OK
+    assert caches["default"].get("{}:lock".format(
+        idempotency_cache_key(mocker.Mock(user=mocker.Mock(pk=1)), COURSE_ID, "key-2")
+    )) is None
+
+
+@pytest.mark.usefixtures("user")
+@pytest.mark.parametrize('idempotency_key', ["", "x" * 256])
+def test_idempotent_invalid_key(patched_create_video, idempotency_key):
+    """A request with an empty or overly long Idempotency-Key should fail"""
+    assert post(VIDEO_DATA, idempotency_key=idempotency_key).status_code == status.HTTP_400_BAD_REQUEST
+    patched_create_video.assert_not_called()
@@ -0,0 +1,51 @@
+"""Tests for cached course video listings"""
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from edx_video_api.changes import course_videos_changed
+from edx_video_api.listing_cache import CachedListing, get_cached_listing, listing_cache_key, set_cached_listing
+
+COURSE_ID = "course-v1:MIT+DemoX+Demo_Course_2"
+
+
+def make_request(path, media_type="application/json"):
+    """Returns a DRF request that has negotiated the given media type"""
+    request = Request(APIRequestFactory().get(path))
+    request.accepted_media_type = media_type
+    return request
+
+
+def test_listing_cache_key():
+    """Listings for different query parameters or media types should have different cache keys"""
+    keys = {
+        listing_cache_key(COURSE_ID, make_request("/{}/".format(COURSE_ID))),
+        listing_cache_key(COURSE_ID, make_request("/{}/?page_size=10".format(COURSE_ID))),
+        listing_cache_key(COURSE_ID, make_request("/{}/".format(COURSE_ID), media_type="text/html")),
+    }
+    assert len(keys) == 3
+    assert listing_cache_key(COURSE_ID, make_request("/{}/".format(COURSE_ID))) in keys
+
+
+def test_get_cached_listing():
+    """A cached listing should only be returned until the course's videos change"""
+    cache_key = listing_cache_key(COURSE_ID, make_request("/{}/".format(COURSE_ID)))
+    version, listing = get_cached_listing(COURSE_ID, cache_key)
+    assert listing is None
+
+    listing = CachedListing(version, b"[]", "application/json", '"etag"', 0)
+    set_cached_listing(cache_key, listing)
+    assert get_cached_listing(COURSE_ID, cache_key) == (version, listing)
+
+    course_videos_changed([COURSE_ID])
+    new_version, new_listing = get_cached_listing(COURSE_ID, cache_key)
+    assert new_version != version
+    assert new_listing is None
+
+
+def test_set_cached_listing_too_large(settings):
+    """A listing that's larger than CACHE_MAX_ITEM_SIZE shouldn't be cached"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, CACHE_MAX_ITEM_SIZE=1000)
+    cache_key = listing_cache_key(COURSE_ID, make_request("/{}/".format(COURSE_ID)))
+    version, _ = get_cached_listing(COURSE_ID, cache_key)
+    set_cached_listing(cache_key, CachedListing(version, b"[" + b"0," * 1000 + b"0]", "application/json", '"e"', 0))
+    assert get_cached_listing(COURSE_ID, cache_key) == (version, None)
@@ -0,0 +1,69 @@
+"""Tests for cursor pagination"""
+import pytest
+from edxval.models import Video
+
+from edx_video_api.pagination import (
+    DEFAULT_ORDERING,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    get_cursor_values,
+    get_page,
+    iter_pages,
+)
+from edx_video_api.utils import now_in_utc
+from tests.factories import create_course_video
+
+COURSE_ID = "course-v1:MIT+DemoX+Demo_Course_2"
+
+
+def test_cursor_round_trip():
+    """decode_cursor should return the values passed to encode_cursor, including full datetime precision"""
+    now = now_in_utc()
+    cursor = encode_cursor([now, u"some-id"])
+    assert decode_cursor(cursor, Video, DEFAULT_ORDERING) == [now, u"some-id"]
+
+
+@pytest.mark.parametrize('cursor', [
+    u"garbage",
+    u"\u2603",
+    encode_cursor([u"only-one-value"]),
+    encode_cursor([u"not-a-date", u"some-id"]),
+])
+def test_decode_cursor_invalid(cursor):
+    """decode_cursor should raise InvalidCursorError for malformed cursors"""
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, Video, DEFAULT_ORDERING)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('ordering', [
+    DEFAULT_ORDERING,
+    ("-created", "-edx_video_id"),
+])
+def test_get_page(ordering):
+    """get_page should return pages in order without skipping or repeating rows"""
+    videos = [create_course_video(COURSE_ID) for _ in range(5)]
+    # Give two videos the same creation time so that the tie-breaking field is needed
+    Video.objects.filter(id=videos[2].id).update(created=videos[1].created)
+    expected_ids = list(Video.objects.order_by(*ordering).values_list("edx_video_id", flat=True))
+
+    seen_ids = []
+    cursor_values = None
+    while True:
+        rows, cursor_values = get_page(Video.objects.all(), 2, cursor_values=cursor_values, ordering=ordering)
+        seen_ids.extend(row.edx_video_id for row in rows)
+        if cursor_values is None:
+            break
+        assert cursor_values == get_cursor_values(rows[-1], ordering)
+    assert seen_ids == expected_ids
+
+
+@pytest.mark.django_db
+def test_iter_pages(django_assert_num_queries):
+    """iter_pages should yield every row, one page per query"""
+    videos = [create_course_video(COURSE_ID) for _ in range(5)]
+    with django_assert_num_queries(3):
+        pages = list(iter_pages(Video.objects.all(), 2))
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [row.edx_video_id for page in pages for row in page] == [video.edx_video_id for video in videos]
@@ -0,0 +1,23 @@
+"""Tests for the settings that the plugin provides to edX"""
+import pytest
+from mock import Mock
+
+from edx_video_api.settings import plugin_settings
+
+ROUTER = "edx_video_api.routing.ReadReplicaRouter"
+
+
+@pytest.mark.parametrize('existing_routers,expected_routers', [
+    ([], [ROUTER]),
+    (["some.Router"], ["some.Router", ROUTER]),
+    ([ROUTER], [ROUTER]),
+])
+def test_plugin_settings_router(existing_routers, expected_routers):
+    """
+    plugin_settings should add the read replica router once, even though no read replica is set yet, since it can be
+    set afterwards
+    """
+    settings = Mock(DATABASES={"default": {}}, DATABASE_ROUTERS=existing_routers)
+    plugin_settings(settings)
+    assert settings.VIDEO_API["READ_REPLICA_ALIAS"] is None
+    assert settings.DATABASE_ROUTERS == expected_routers
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Tests for the video payload renderers"""
+import datetime
+import decimal
+import json
+import uuid
+
+import msgpack
+import pytest
+from django.utils.translation import ugettext_lazy
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+from edx_video_api import renderers
+from edx_video_api.renderers import VideoJSONRenderer, VideoMessagePackRenderer, get_video_renderer_classes
+
+VIDEOS = [
+    {
+        "encoded_videos": [{"url": u"https://example.com/{}.m3u8".format(i), "file_size": 0, "bitrate": 0,
+                            "profile": u"hls"}],
+        "url": u"/edxval/videos/{}".format(i),
+        "edx_video_id": u"video-{}".format(i),
+        "client_video_id": u"My ☃ video {}  \"quoted\" \\ </script>".format(i),
+        "duration": 12.5 * i,
+        "status": u"file_complete",
+    }
+    for i in range(10)
+]
+
+
+@pytest.mark.parametrize('data', [
+    VIDEOS,
+    {"results": VIDEOS, "next": None},
+    {"error": u"Invalid course key ('x')"},
+    [],
+])
+def test_video_json_renderer(data):
+    """VideoJSONRenderer should render the same bytes as JSONRenderer"""
+    assert VideoJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_video_json_renderer_floats(mocker):
+    """
+    VideoJSONRenderer should render floats like durations (in seconds, to the millisecond) with ujson, and fall
+    back to JSONRenderer for floats that ujson would write differently from their repr
+    """
+    durations = [0.001, 3.333, 12.5, 30.03, 1234.567, 7199.999]
+    spied_render = mocker.spy(JSONRenderer, "render")
+    assert VideoJSONRenderer().render({"durations": durations}) == JSONRenderer().render({"durations": durations})
+    assert spied_render.call_count == 1
+
+    for data in ({"durations": [0.0, 86400.0, -0.0]}, {"duration": sum([10.01] * 3), "other": 0.1 + 0.2}):
+        assert VideoJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.parametrize('data', [
+    {"created": datetime.datetime(2019, 8, 1, 12, 30)},
+    [{"created": datetime.date(2019, 8, 1)}],
+    {"duration": float("nan")},
+    {"duration": 0.1 + 0.2},
+    {"id": 2 ** 64},
+    {"price": decimal.Decimal("1.10")},
+    {"id": uuid.UUID("12345678123456781234567812345678")},
+    {"status": ugettext_lazy(u"Ready")},
+    {1: u"key that isn't a string"},
+])
+def test_video_json_renderer_fallback(mocker, data):
+    """VideoJSONRenderer should fall back to JSONRenderer for values that ujson can't encode the same way"""
+    patched_render = mocker.patch.object(JSONRenderer, "render", return_value=b"{}")
+    assert VideoJSONRenderer().render(data) == b"{}"
+    patched_render.assert_called_once_with(data, None, None)
+
+
+def test_video_json_renderer_without_ujson(mocker):
+    """Without ujson, VideoJSONRenderer should render with JSONRenderer"""
+    mocker.patch.object(renderers, "import_optional", return_value=None)
+    expected = JSONRenderer().render(VIDEOS)
+    spied_render = mocker.spy(JSONRenderer, "render")
+    assert VideoJSONRenderer().render(VIDEOS) == expected
+    spied_render.assert_called_once()
+
+
+def test_video_json_renderer_indent():
+    """VideoJSONRenderer should use JSONRenderer when an indented response is requested"""
+    rendered = VideoJSONRenderer().render(VIDEOS, "application/json; indent=4")
+    assert rendered == JSONRenderer().render(VIDEOS, "application/json; indent=4")
+    assert b"\n    " in rendered
+
+
+def test_video_msgpack_renderer():
+    """VideoMessagePackRenderer should render the same values as the JSON representation"""
+    data = {"results": VIDEOS, "created": datetime.datetime(2019, 8, 1, 12, 30)}
+    rendered = VideoMessagePackRenderer().render(data)
+    assert msgpack.unpackb(rendered, raw=False) == json.loads(JSONRenderer().render(data))
+    assert VideoMessagePackRenderer().render(None) == b""
+
+
+def test_video_msgpack_renderer_text_keys():
+    """VideoMessagePackRenderer should pack keys and strings as str, so that strict clients decode them as text"""
+    rendered = VideoMessagePackRenderer().render({"results": VIDEOS, "error": "message"})
+    unpacked = msgpack.unpackb(rendered, raw=False)
+    assert all(isinstance(key, unicode) for key in unpacked)
+    assert isinstance(unpacked["error"], unicode)
+    assert all(isinstance(key, unicode) for video in unpacked["results"] for key in video)
+    assert all(
+        isinstance(key, unicode) for video in unpacked["results"] for key in video["encoded_videos"][0]
+    )
+
+
+@pytest.mark.parametrize('msgpack_installed', [True, False])
+def test_get_video_renderer_classes(mocker, msgpack_installed):
+    """get_video_renderer_classes should swap in VideoJSONRenderer, and offer MessagePack if it's installed"""
+    if not msgpack_installed:
+        mocker.patch.object(renderers, "import_optional", return_value=None)
+    expected = (VideoJSONRenderer, BrowsableAPIRenderer)
+    if msgpack_installed:
+        expected += (VideoMessagePackRenderer, )
+    assert get_video_renderer_classes() == expected
@@ -0,0 +1,27 @@
+"""Tests for resolving classes and optional modules on first use"""
+import json
+
+from edx_video_api import resolvers
+from edx_video_api.resolvers import import_optional, resolve_setting
+from edx_video_api.utils import DummyCourseOverview
+
+
+def test_resolve_setting(mocker, settings):
+    """resolve_setting should import the object named by a setting once, and resolve a changed setting again"""
+    spied_import = mocker.spy(resolvers, "import_string")
+    mocker.patch.dict(resolvers._resolved_paths, clear=True)  # pylint: disable=protected-access
+    assert resolve_setting("COURSE_OVERVIEW") is DummyCourseOverview
+    assert resolve_setting("COURSE_OVERVIEW") is DummyCourseOverview
+    spied_import.assert_called_once_with("edx_video_api.utils.DummyCourseOverview")
+    settings.VIDEO_API = dict(settings.VIDEO_API, COURSE_OVERVIEW="json.JSONEncoder")
+    assert resolve_setting("COURSE_OVERVIEW") is json.JSONEncoder
+
+
+def test_import_optional(mocker):
+    """import_optional should return a module, or None if it isn't installed, and only look for it once"""
+    spied_import = mocker.spy(resolvers.importlib, "import_module")
+    mocker.patch.dict(resolvers._optional_modules, clear=True)  # pylint: disable=protected-access
+    assert import_optional("json") is json
+    assert import_optional("edx_video_api_missing_module") is None
+    assert import_optional("edx_video_api_missing_module") is None
+    assert spied_import.call_count == 2
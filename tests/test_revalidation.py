@@ -0,0 +1,205 @@
+"""Tests for revalidating the manifests of existing videos"""
+# pylint: disable=redefined-outer-name
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.core.management import call_command
+from edxval.models import Video
+
+from edx_video_api.changes import get_course_version
+from edx_video_api.hls import ManifestFailure, ManifestResult
+from edx_video_api.models import VideoChange
+from edx_video_api.revalidation import (
+    HlsVideo,
+    ManifestRevalidator,
+    get_revalidated_status,
+    interleave_by_host,
+    iter_hls_video_chunks,
+)
+from edx_video_api.sources import record_video_source
+from edx_video_api.tasks import INVALID_VIDEO_STATUS, PENDING_VIDEO_STATUS, VALID_VIDEO_STATUS
+from tests.factories import create_course_video
+
+COURSE_ID = "course-v1:MIT+DemoX+Demo_Course_2"
+OTHER_COURSE_ID = "course-v1:MIT+Other+Course"
+
+
+def hls_video(hls_url):
+    """Returns an HlsVideo for a manifest URL"""
+    return HlsVideo(1, 1, u"video", VALID_VIDEO_STATUS, hls_url)
+
+
+@pytest.fixture()
+def manifest_results():
+    """Fixture for the results that the patched manifest fetcher returns, keyed by edx_video_id"""
+    return {}
+
+
+@pytest.fixture()
+def fetcher(mocker, manifest_results):
+    """Fixture for a manifest fetcher that returns the result for each video's manifest"""
+    return mocker.Mock(fetch=mocker.Mock(
+        side_effect=lambda hls_url: manifest_results[hls_url.rsplit("/", 1)[-1][:-len(".m3u8")]]
+    ))
+
+
+@pytest.fixture()
+def videos(manifest_results):
+    """
+    Fixture for videos created through the API whose manifests have broken, been fixed, or can't be reached, and a
+    video that wasn't created through the API
+    """
+    videos = {
+        "broken": create_course_video(COURSE_ID, edx_video_id=u"broken"),
+        "fixed": create_course_video(COURSE_ID, edx_video_id=u"fixed", status=INVALID_VIDEO_STATUS),
+        "pending": create_course_video(OTHER_COURSE_ID, edx_video_id=u"pending", status=PENDING_VIDEO_STATUS),
+        "unchanged": create_course_video(COURSE_ID, edx_video_id=u"unchanged"),
+        "unreachable": create_course_video(COURSE_ID, edx_video_id=u"unreachable", status=INVALID_VIDEO_STATUS),
+        "uploaded": create_course_video(COURSE_ID, edx_video_id=u"uploaded", status=u"upload"),
+    }
+    for video in videos.values():
+        record_video_source(
+            video.courses.get().course_id, u"https://example.com/{}.m3u8".format(video.edx_video_id), video.edx_video_id
+        )
+    videos["external"] = create_course_video(COURSE_ID, edx_video_id=u"external")
+    manifest_results.update({
+        "broken": ManifestResult(ManifestFailure.no_variants),
+        "fixed": ManifestResult(),
+        "pending": ManifestResult(),
+        "unchanged": ManifestResult(),
+        "unreachable": ManifestResult(ManifestFailure.timeout),
+        "external": ManifestResult(ManifestFailure.no_variants),
+    })
+    return videos
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("videos")
+def test_iter_hls_video_chunks():
+    """
+    iter_hls_video_chunks should read the HLS videos created through the API with a status set by this app, in chunks,
+    or every HLS video with such a status if all_videos is set
+    """
+    chunks = list(iter_hls_video_chunks(2))
+    assert [[video.edx_video_id for video in chunk] for chunk in chunks] == [
+        [u"broken", u"fixed"], [u"pending", u"unchanged"], [u"unreachable"]
+    ]
+    assert chunks[0][0].hls_url == u"https://example.com/broken.m3u8"
+    assert [video.edx_video_id for chunk in iter_hls_video_chunks(10, after_id=chunks[1][0].encoded_video_id)
+            for video in chunk] == [u"unchanged", u"unreachable"]
+    assert [video.edx_video_id for chunk in iter_hls_video_chunks(10, course_id=OTHER_COURSE_ID)
+            for video in chunk] == [u"pending"]
+    assert [video.edx_video_id for chunk in iter_hls_video_chunks(10, all_videos=True) for video in chunk] == [
+        u"broken", u"fixed", u"pending", u"unchanged", u"unreachable", u"external"
+    ]
+
+
+def test_interleave_by_host():
+    """interleave_by_host should take one video from each host in turn"""
+    urls = [
+        "http://a.example.com/1.m3u8",
+        "http://a.example.com/2.m3u8",
+        "http://a.example.com/3.m3u8",
+        "http://b.example.com/1.m3u8",
+        "http://C.example.com/1.m3u8",
+        "http://b.example.com/2.m3u8",
+    ]
+    assert [video.hls_url for video in interleave_by_host([hls_video(url) for url in urls])] == [
+        urls[0], urls[3], urls[4], urls[1], urls[5], urls[2]
+    ]
+    assert interleave_by_host([]) == []
+
+
+@pytest.mark.parametrize('failure,expected_status', [
+    (None, VALID_VIDEO_STATUS),
+    (ManifestFailure.http_error, INVALID_VIDEO_STATUS),
+    (ManifestFailure.not_a_manifest, INVALID_VIDEO_STATUS),
+    (ManifestFailure.timeout, None),
+    (ManifestFailure.connection_error, None),
+    (ManifestFailure.host_unavailable, None),
+])
+def test_get_revalidated_status(failure, expected_status):
+    """get_revalidated_status should only give a new status for manifests that were reached"""
+    assert get_revalidated_status(ManifestResult(failure)) == expected_status
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('dry_run', [True, False])
+def test_manifest_revalidator(fetcher, videos, dry_run):
+    """
+    ManifestRevalidator should update the videos whose statuses no longer match their manifests, and record the
+    changes in their courses' change feeds
+    """
+    versions = {course_id: get_course_version(course_id) for course_id in (COURSE_ID, OTHER_COURSE_ID)}
+    last_change_id = VideoChange.objects.latest("id").id
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        revalidator = ManifestRevalidator(fetcher, executor, host_limit=2, dry_run=dry_run)
+        counts = revalidator.revalidate([video for chunk in iter_hls_video_chunks(10) for video in chunk])
+    assert counts == {"valid": 3, "invalid": 1, "unreachable": 1, "updated": 3}
+    statuses = dict(Video.objects.values_list("edx_video_id", "status"))
+    expected_statuses = {video_id: video.status for video_id, video in videos.items()}
+    if not dry_run:
+        expected_statuses.update(
+            broken=INVALID_VIDEO_STATUS, fixed=VALID_VIDEO_STATUS, pending=VALID_VIDEO_STATUS
+        )
+    assert statuses == expected_statuses
+    new_changes = VideoChange.objects.filter(id__gt=last_change_id).values_list("course_id", "edx_video_id")
+    assert sorted(new_changes) == ([] if dry_run else [
+        (COURSE_ID, u"broken"), (COURSE_ID, u"fixed"), (OTHER_COURSE_ID, u"pending")
+    ])
+    assert all(
+        (get_course_version(course_id) == version) is dry_run for course_id, version in versions.items()
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("videos")
+def test_revalidate_hls_videos_command(mocker, tmpdir, fetcher):
+    """
+    The revalidate_hls_videos command should revalidate the API's HLS videos in chunks, record its progress after
+    each chunk, and remove the checkpoint once it's finished
+    """
+    mocker.patch("edx_video_api.management.commands.revalidate_hls_videos.ManifestFetcher.from_settings",
+                 return_value=fetcher)
+    spied_write = mocker.spy(json, "dump")
+    checkpoint = tmpdir.join("checkpoint.json")
+    stdout = mocker.Mock()
+    call_command("revalidate_hls_videos", chunk_size=2, checkpoint=str(checkpoint), stdout=stdout)
+    assert fetcher.fetch.call_count == 5
+    assert fetcher.extract_metadata is False
+    assert [call[0][0] for call in spied_write.call_args_list] == [
+        {"after_id": video.encoded_videos.get().id}
+        for video in Video.objects.filter(edx_video_id__in=[u"fixed", u"unchanged", u"unreachable"]).order_by("id")
+    ]
+    assert not checkpoint.check()
+    output = u"".join(call[0][0] for call in stdout.write.call_args_list)
+    assert u"Checked 5 manifests: 3 valid, 1 invalid, 1 unreachable. 3 video statuses updated." in output
+    assert Video.objects.get(edx_video_id=u"broken").status == INVALID_VIDEO_STATUS
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("videos")
+def test_revalidate_hls_videos_command_resume(mocker, tmpdir, fetcher):
+    """The revalidate_hls_videos command should resume from an existing checkpoint"""
+    mocker.patch("edx_video_api.management.commands.revalidate_hls_videos.ManifestFetcher.from_settings",
+                 return_value=fetcher)
+    checkpoint = tmpdir.join("checkpoint.json")
+    checkpoint.write(json.dumps({"after_id": Video.objects.get(edx_video_id=u"pending").encoded_videos.get().id}))
+    call_command("revalidate_hls_videos", checkpoint=str(checkpoint), stdout=mocker.Mock())
+    assert sorted(call[0][0] for call in fetcher.fetch.call_args_list) == [
+        u"https://example.com/unchanged.m3u8", u"https://example.com/unreachable.m3u8"
+    ]
+    assert Video.objects.get(edx_video_id=u"broken").status == VALID_VIDEO_STATUS
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("videos")
+def test_revalidate_hls_videos_command_all(mocker, fetcher):
+    """The revalidate_hls_videos command should only revalidate videos created outside of the API if --all is given"""
+    mocker.patch("edx_video_api.management.commands.revalidate_hls_videos.ManifestFetcher.from_settings",
+                 return_value=fetcher)
+    call_command("revalidate_hls_videos", stdout=mocker.Mock())
+    assert Video.objects.get(edx_video_id=u"external").status == VALID_VIDEO_STATUS
+    call_command("revalidate_hls_videos", "--all", stdout=mocker.Mock())
+    assert Video.objects.get(edx_video_id=u"external").status == INVALID_VIDEO_STATUS
@@ -0,0 +1,73 @@
+"""Tests for routing video listing reads to a read replica"""
+import pytest
+from edxval.models import Video
+
+from edx_video_api.changes import course_videos_changed
+from edx_video_api.routing import (
+    ReadReplicaRouter,
+    get_read_database,
+    iter_with_read_database,
+    read_replica_for_courses,
+    reads_from_replica,
+    route_reads,
+)
+
+COURSE_ID = "course-v1:MIT+DemoX+Demo_Course_2"
+OTHER_COURSE_ID = "course-v1:MIT+Other+Course"
+
+
+def test_route_reads():
+    """route_reads should route reads to a database while its block runs, and restore the previous database after"""
+    router = ReadReplicaRouter()
+    assert get_read_database() is None
+    with route_reads("replica"):
+        assert router.db_for_read(Video) == "replica"
+        with route_reads(None):
+            assert router.db_for_read(Video) is None
+        assert router.db_for_read(Video) == "replica"
+    assert router.db_for_read(Video) is None
+
+
+@pytest.mark.parametrize('alias', [None, "replica"])
+def test_read_replica_for_courses(settings, alias):
+    """read_replica_for_courses should return the replica alias, unless it isn't set"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, READ_REPLICA_ALIAS=alias)
+    assert read_replica_for_courses([COURSE_ID]) == alias
+
+
+def test_read_replica_for_courses_missing_database(settings):
+    """read_replica_for_courses should return None if the replica alias isn't one of the DATABASES"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, READ_REPLICA_ALIAS="missing")
+    assert read_replica_for_courses([COURSE_ID]) is None
+
+
+def test_read_replica_for_courses_recently_changed(settings):
+    """read_replica_for_courses should return None if any of the courses changed within the sticky timeout"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, READ_REPLICA_ALIAS="replica")
+    course_videos_changed([COURSE_ID])
+    assert read_replica_for_courses([COURSE_ID]) is None
+    assert read_replica_for_courses([COURSE_ID, OTHER_COURSE_ID]) is None
+    assert read_replica_for_courses([OTHER_COURSE_ID]) == "replica"
+
+
+def test_read_replica_for_courses_not_sticky(settings):
+    """read_replica_for_courses should ignore recent changes if the sticky timeout is 0"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, READ_REPLICA_ALIAS="replica", READ_REPLICA_STICKY_TIMEOUT=0)
+    course_videos_changed([COURSE_ID])
+    assert read_replica_for_courses([COURSE_ID]) == "replica"
+
+
+def test_iter_with_read_database(settings):
+    """iter_with_read_database should route reads to the database chosen when it was called, as it's iterated over"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, READ_REPLICA_ALIAS="replica")
+
+    def read_databases():
+        """Yields the database that reads are routed to, a few times"""
+        for _ in range(3):
+            yield get_read_database()
+
+    with reads_from_replica([COURSE_ID]):
+        iterator = iter_with_read_database(read_databases())
+    assert get_read_database() is None
+    assert list(iterator) == ["replica"] * 3
+    assert get_read_database() is None
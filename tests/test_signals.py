@@ -0,0 +1,90 @@
+"""Tests for signal receivers"""
+import pytest
+from django.db.models.signals import post_delete, post_save
+from edxval.models import EncodedVideo
+from opaque_keys.edx.keys import CourseKey
+
+from edx_video_api.changes import course_videos_changed
+from edx_video_api.signals import connect_signals, handle_course_changed
+from edx_video_api.utils import DummyCourseOverview
+from tests.factories import create_course_video
+
+COURSE_ID = "course-v1:MIT+DemoX+Demo_Course_2"
+OTHER_COURSE_ID = "course-v1:MIT+Other+Course"
+COURSE_KEY = CourseKey.from_string(COURSE_ID)
+
+
+def test_handle_course_changed(mocker):
+    """A course being published or deleted should invalidate its cached status"""
+    patched_invalidate = mocker.patch("edx_video_api.signals.invalidate_course_status")
+    handle_course_changed(sender=None, course_key=COURSE_KEY)
+    patched_invalidate.assert_called_once_with(COURSE_KEY)
+
+
+def test_course_overview_changed(mocker):
+    """A CourseOverview being saved or deleted should invalidate its course's cached status"""
+    patched_invalidate = mocker.patch("edx_video_api.signals.invalidate_course_status")
+    connect_signals()
+    course_overview = mocker.Mock(id=COURSE_KEY)
+    post_save.send(sender=DummyCourseOverview, instance=course_overview, created=True)
+    post_delete.send(sender=DummyCourseOverview, instance=course_overview)
+    assert patched_invalidate.call_args_list == [mocker.call(COURSE_KEY)] * 2
+
+
+def test_course_videos_changed(mocker):
+    """Videos changing in some courses should rebuild those courses' snapshots"""
+    patched_schedule = mocker.patch("edx_video_api.signals.schedule_snapshot_rebuilds")
+    connect_signals()
+    course_videos_changed([COURSE_ID, OTHER_COURSE_ID, COURSE_ID])
+    assert patched_schedule.call_count == 1
+    assert sorted(patched_schedule.call_args[0][0]) == [COURSE_ID, OTHER_COURSE_ID]
+
+
+@pytest.mark.django_db
+def test_video_changed(mocker):
+    """Saving or deleting edxval objects should record a change to the video in each of its courses"""
+    patched_changed = mocker.patch("edx_video_api.signals.video_changed")
+    video = create_course_video(COURSE_ID, courses=[COURSE_ID, OTHER_COURSE_ID])
+    assert [(call[0][0], list(call[0][1])) for call in patched_changed.call_args_list] == [
+        (video.edx_video_id, [COURSE_ID]),
+        (video.edx_video_id, [OTHER_COURSE_ID]),
+    ]
+
+    patched_changed.reset_mock()
+    video.status = u"invalid_token"
+    video.save()
+    assert patched_changed.call_args[0][0] == video.edx_video_id
+    assert sorted(patched_changed.call_args[0][1]) == [COURSE_ID, OTHER_COURSE_ID]
+
+    patched_changed.reset_mock()
+    encoded_video = EncodedVideo.objects.get(video=video)
+    encoded_video.bitrate = 100
+    encoded_video.save()
+    assert patched_changed.call_args[0][0] == video.edx_video_id
+    assert sorted(patched_changed.call_args[0][1]) == [COURSE_ID, OTHER_COURSE_ID]
+
+    patched_changed.reset_mock()
+    video.delete()
+    assert {call[0][0] for call in patched_changed.call_args_list} == {video.edx_video_id}
+    changed_course_ids = {course_id for call in patched_changed.call_args_list for course_id in call[0][1]}
+    assert changed_course_ids == {COURSE_ID, OTHER_COURSE_ID}
+
+
+class AccessToken(object):
+    """Access token model for tests of token signals"""
+    def __init__(self, token):
+        self.token = token
+
+
+def test_access_token_changed(mocker, settings):
+    """Saving or deleting an access token should remove its cached authentication result"""
+    patched_invalidate = mocker.patch("edx_video_api.signals.invalidate_token")
+    settings.VIDEO_API = dict(
+        settings.VIDEO_API,
+        AUTHENTICATION_CACHE_TOKEN_MODELS=["tests.test_signals.AccessToken", "missing.models.AccessToken"],
+    )
+    connect_signals()
+    access_token = AccessToken("abc123")
+    post_save.send(sender=AccessToken, instance=access_token, created=False)
+    post_delete.send(sender=AccessToken, instance=access_token)
+    assert patched_invalidate.call_args_list == [mocker.call("abc123")] * 2
@@ -0,0 +1,150 @@
+"""Tests for precomputed course video snapshots"""
+import json
+import zlib
+
+import pytest
+from django.core.cache import caches
+from rest_framework.test import APIRequestFactory
+
+from edx_video_api import snapshots
+from edx_video_api.caching import get_chunked
+from edx_video_api.serialization import json_serialize_video_instance
+from edx_video_api.snapshots import (
+    get_accepted_encoding,
+    get_course_snapshot,
+    rebuild_course_snapshot,
+    schedule_snapshot_rebuilds,
+    snapshot_etag,
+    snapshot_state_key,
+)
+from tests.factories import create_course_video
+
+COURSE_ID = "course-v1:MIT+DemoX+Demo_Course_2"
+OTHER_COURSE_ID = "course-v1:MIT+Other+Course"
+
+
+def decompress_listing(snapshot):
+    """Returns the videos in a snapshot's gzip-compressed body"""
+    return json.loads(zlib.decompress(snapshot.bodies["gzip"], 16 + zlib.MAX_WBITS))
+
+
+@pytest.mark.parametrize('accept_encoding,expected', [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("deflate, GZIP;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("br, gzip", "br"),
+])
+def test_get_accepted_encoding(accept_encoding, expected):
+    """get_accepted_encoding should return the first of the content codings that the request allows"""
+    request = APIRequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+    assert get_accepted_encoding(request, ["br", "gzip"]) == expected
+
+
+def test_snapshot_etag():
+    """snapshot_etag should return a different ETag for each content coding"""
+    assert snapshot_etag('"abc"', "gzip") == '"abc-gzip"'
+    assert snapshot_etag('"abc"', "br") == '"abc-br"'
+
+
+@pytest.mark.django_db
+def test_rebuild_course_snapshot():
+    """rebuild_course_snapshot should store the course's listing, compressed, until the course's videos change"""
+    videos = [create_course_video(COURSE_ID) for _ in range(3)]
+    create_course_video(OTHER_COURSE_ID)
+    assert get_course_snapshot(COURSE_ID)[1] is None
+    snapshot = rebuild_course_snapshot(COURSE_ID)
+    assert get_course_snapshot(COURSE_ID)[1] == snapshot
+    assert decompress_listing(snapshot) == [json_serialize_video_instance(video) for video in videos]
+
+    create_course_video(COURSE_ID)
+    assert get_course_snapshot(COURSE_ID)[1] is None
+
+
+@pytest.mark.django_db
+def test_rebuild_course_snapshot_incremental(mocker, settings):
+    """rebuild_course_snapshot should only render the videos that changed since the snapshot was built"""
+    # Changes are otherwise too recent to be covered by the snapshot's change token, so they'd be rendered again
+    settings.VIDEO_API = dict(settings.VIDEO_API, CHANGE_TOKEN_SETTLE_TIME=0)
+    videos = [create_course_video(COURSE_ID) for _ in range(4)]
+    rebuild_course_snapshot(COURSE_ID)
+
+    videos[1].duration = 42
+    videos[1].save()
+    hidden_course_video = videos[2].courses.get(course_id=COURSE_ID)
+    hidden_course_video.is_hidden = True
+    hidden_course_video.save()
+    new_video = create_course_video(COURSE_ID)
+    patched_serialize = mocker.patch(
+        "edx_video_api.snapshots.json_serialize_video_instance", wraps=json_serialize_video_instance
+    )
+    snapshot = rebuild_course_snapshot(COURSE_ID)
+    assert sorted(call[0][0].edx_video_id for call in patched_serialize.call_args_list) == sorted(
+        [videos[1].edx_video_id, new_video.edx_video_id]
+    )
+    assert get_course_snapshot(COURSE_ID)[1] == snapshot
+    assert decompress_listing(snapshot) == [
+        json_serialize_video_instance(video) for video in (videos[0], videos[1], videos[3], new_video)
+    ]
+    assert decompress_listing(snapshot)[1]["duration"] == 42
+
+
+@pytest.mark.django_db
+def test_rebuild_course_snapshot_chunked_state(mocker, settings):
+    """rebuild_course_snapshot should store its state in several cache items if it's larger than one can be"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, CACHE_MAX_ITEM_SIZE=500)
+    # The compressed bodies are about as large as the compressed state, so they're treated as small enough
+    mocker.patch("edx_video_api.snapshots.pickled_size", return_value=0)
+    videos = [create_course_video(COURSE_ID) for _ in range(10)]
+    snapshot = rebuild_course_snapshot(COURSE_ID)
+    assert not snapshot.too_large
+    _, chunk_count = caches["default"].get(snapshot_state_key(COURSE_ID))
+    assert chunk_count > 1
+    assert sorted(get_chunked(caches["default"], snapshot_state_key(COURSE_ID)).entries) == sorted(
+        video.edx_video_id for video in videos
+    )
+
+
+@pytest.mark.django_db
+def test_rebuild_course_snapshot_too_large(mocker, settings):
+    """
+    If a course's compressed listing is too large for the cache, rebuild_course_snapshot should store a marker that
+    stops the course from being snapshotted until it expires, even after the course changes
+    """
+    settings.VIDEO_API = dict(settings.VIDEO_API, CACHE_MAX_ITEM_SIZE=400)
+    for _ in range(10):
+        create_course_video(COURSE_ID)
+    snapshot = rebuild_course_snapshot(COURSE_ID)
+    assert snapshot.too_large
+    assert get_course_snapshot(COURSE_ID)[1] == snapshot
+
+    create_course_video(COURSE_ID)
+    assert get_course_snapshot(COURSE_ID)[1] == snapshot
+    patched_render = mocker.patch("edx_video_api.snapshots.render_entries")
+    assert rebuild_course_snapshot(COURSE_ID) == snapshot
+    patched_render.assert_not_called()
+
+
+@pytest.mark.parametrize('enabled', [True, False])
+def test_schedule_snapshot_rebuilds(mocker, settings, enabled):
+    """
+    schedule_snapshot_rebuilds should rebuild each course's snapshot on the background worker after the transaction
+    commits, if snapshots are enabled, unless the course is already waiting for a rebuild
+    """
+    settings.VIDEO_API = dict(settings.VIDEO_API, SNAPSHOTS_ENABLED=enabled)
+    on_commit_callbacks = []
+    mocker.patch("edx_video_api.snapshots.transaction.on_commit", side_effect=on_commit_callbacks.append)
+    patched_submit = mocker.patch("edx_video_api.snapshots.get_snapshot_executor").return_value.submit
+    schedule_snapshot_rebuilds([COURSE_ID, OTHER_COURSE_ID, COURSE_ID])
+    schedule_snapshot_rebuilds([COURSE_ID])
+    assert len(on_commit_callbacks) == (2 if enabled else 0)
+    patched_submit.assert_not_called()
+    for callback in on_commit_callbacks:
+        callback()
+    assert sorted(call[0][1] for call in patched_submit.call_args_list) == (
+        [COURSE_ID, OTHER_COURSE_ID] if enabled else []
+    )
+    assert snapshots._pending_course_ids == (  # pylint: disable=protected-access
+        {COURSE_ID, OTHER_COURSE_ID} if enabled else set()
+    )
@@ -0,0 +1,45 @@
+"""Tests for finding the videos that were created from HLS URLs"""
+import pytest
+from django.db import IntegrityError
+
+from edx_video_api.models import CourseVideoSource
+from edx_video_api.sources import get_videos_by_hls_url, record_video_source
+from tests.factories import create_course_video
+
+COURSE_ID = "course-v1:MIT+DemoX+Demo_Course_2"
+OTHER_COURSE_ID = "course-v1:MIT+Other+Course"
+HLS_URL = "http://example.com/video.m3u8"
+
+
+@pytest.mark.django_db
+def test_get_videos_by_hls_url():
+    """get_videos_by_hls_url should find the visible videos in a course that were created from the given URLs"""
+    video = create_course_video(COURSE_ID)
+    other_video = create_course_video(OTHER_COURSE_ID)
+    record_video_source(COURSE_ID, HLS_URL, video.edx_video_id)
+    record_video_source(OTHER_COURSE_ID, "http://example.com/other.m3u8", other_video.edx_video_id)
+    assert get_videos_by_hls_url(COURSE_ID, [HLS_URL, " {} ".format(HLS_URL), "http://example.com/other.m3u8"]) == {
+        HLS_URL: video,
+        " {} ".format(HLS_URL): video,
+    }
+    assert get_videos_by_hls_url(COURSE_ID, []) == {}
+
+
+@pytest.mark.django_db
+def test_get_videos_by_hls_url_stale():
+    """get_videos_by_hls_url should remove sources whose videos are no longer visible in the course"""
+    hidden_video = create_course_video(COURSE_ID)
+    hidden_video.courses.update(is_hidden=True)
+    record_video_source(COURSE_ID, HLS_URL, hidden_video.edx_video_id)
+    record_video_source(COURSE_ID, "http://example.com/deleted.m3u8", "deleted-video")
+    assert get_videos_by_hls_url(COURSE_ID, [HLS_URL, "http://example.com/deleted.m3u8"]) == {}
+    assert CourseVideoSource.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_record_video_source_duplicate():
+    """record_video_source should fail if a video in the course was already created from the URL"""
+    record_video_source(COURSE_ID, HLS_URL, "video-1")
+    record_video_source(OTHER_COURSE_ID, HLS_URL, "video-2")
+    with pytest.raises(IntegrityError):
+        record_video_source(COURSE_ID, " {}".format(HLS_URL), "video-3")
@@ -0,0 +1,168 @@
+"""Tests for background manifest validation"""
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from edxval.models import EncodedVideo, Video
+
+from edx_video_api import tasks
+from edx_video_api.changes import get_course_version
+from edx_video_api.hls import ManifestFailure, ManifestResult
+from edx_video_api.models import CourseVideoSource
+from edx_video_api.sources import record_video_source
+from tests.factories import create_course_video
+
+COURSE_ID = "course-v1:MIT+DemoX+Demo_Course_2"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('result,expected_status', [
+    (ManifestResult(), tasks.VALID_VIDEO_STATUS),
+    (ManifestResult(ManifestFailure.not_a_manifest), tasks.INVALID_VIDEO_STATUS),
+])
+def test_validate_video_manifest(mocker, result, expected_status):
+    """validate_video_manifest should set a pending video's status from its manifest's validity"""
+    patched_validate = mocker.patch("edx_video_api.tasks.validate_hls_url", return_value=result)
+    video = create_course_video(COURSE_ID, status=tasks.PENDING_VIDEO_STATUS)
+    version = get_course_version(COURSE_ID)
+    assert tasks.validate_video_manifest(video.edx_video_id, "http://example.com/video.m3u8") == expected_status
+    patched_validate.assert_called_once_with("http://example.com/video.m3u8")
+    assert Video.objects.get(id=video.id).status == expected_status
+    assert get_course_version(COURSE_ID) != version
+
+
+@pytest.mark.django_db
+def test_validate_video_manifest_metadata(mocker):
+    """validate_video_manifest should store the duration and bitrate found in the manifest"""
+    mocker.patch(
+        "edx_video_api.tasks.validate_hls_url", return_value=ManifestResult(duration=61.5, bitrate=2560000)
+    )
+    video = create_course_video(COURSE_ID, status=tasks.PENDING_VIDEO_STATUS)
+    assert tasks.validate_video_manifest(video.edx_video_id, "http://example.com/video.m3u8") == (
+        tasks.VALID_VIDEO_STATUS
+    )
+    assert Video.objects.get(id=video.id).duration == 61.5
+    assert EncodedVideo.objects.get(video=video).bitrate == 2560000
+
+
+@pytest.mark.django_db
+def test_validate_video_manifest_not_pending(mocker):
+    """validate_video_manifest should leave a video alone if it's no longer pending"""
+    mocker.patch(
+        "edx_video_api.tasks.validate_hls_url", return_value=ManifestResult(ManifestFailure.not_a_manifest)
+    )
+    video = create_course_video(COURSE_ID, status=tasks.VALID_VIDEO_STATUS)
+    assert tasks.validate_video_manifest(video.edx_video_id, "http://example.com/video.m3u8") is None
+    assert Video.objects.get(id=video.id).status == tasks.VALID_VIDEO_STATUS
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('attempt,expected_delay', [(0, 30), (2, 120), (3, None)])
+def test_validate_video_manifest_rejected(mocker, attempt, expected_delay):
+    """
+    validate_video_manifest should leave a video pending if its manifest's host rejected the fetch, and retry it
+    later with a growing delay, up to ASYNC_VALIDATION_MAX_RETRIES times
+    """
+    mocker.patch(
+        "edx_video_api.tasks.validate_hls_url", return_value=ManifestResult(ManifestFailure.host_unavailable)
+    )
+    patched_timer = mocker.patch("edx_video_api.tasks.threading.Timer")
+    mocker.patch.object(tasks, "_queued_count", 0)
+    video = create_course_video(COURSE_ID, status=tasks.PENDING_VIDEO_STATUS)
+    assert tasks.validate_video_manifest(video.edx_video_id, "http://example.com/video.m3u8", attempt=attempt) is None
+    assert Video.objects.get(id=video.id).status == tasks.PENDING_VIDEO_STATUS
+    if expected_delay is None:
+        patched_timer.assert_not_called()
+    else:
+        patched_timer.assert_called_once_with(
+            expected_delay,
+            tasks.submit_reserved_validation,
+            args=(video.edx_video_id, "http://example.com/video.m3u8", attempt + 1),
+        )
+        patched_timer.return_value.start.assert_called_once_with()
+        # The waiting retry holds a place in the queue
+        assert tasks._queued_count == 1  # pylint: disable=protected-access
+
+
+def test_retry_manifest_validation_bounded(mocker, settings):
+    """
+    retry_manifest_validation should count waiting retries against ASYNC_VALIDATION_MAX_QUEUED, and leave the video
+    pending if there's no place for another
+    """
+    settings.VIDEO_API = dict(settings.VIDEO_API, ASYNC_VALIDATION_MAX_QUEUED=1)
+    mocker.patch.object(tasks, "_queued_count", 0)
+    patched_timer = mocker.patch("edx_video_api.tasks.threading.Timer")
+    patched_submit = mocker.patch("edx_video_api.tasks.get_validation_executor").return_value.submit
+    assert tasks.retry_manifest_validation("video-1", "http://example.com/1.m3u8", 1) is True
+    assert tasks.retry_manifest_validation("video-2", "http://example.com/2.m3u8", 1) is False
+    assert tasks.submit_manifest_validation("video-3", "http://example.com/3.m3u8") is False
+    assert patched_timer.call_count == 1
+
+    # When the timer fires, the retry is submitted in the place it already holds, which is freed once it's done
+    patched_timer.call_args[0][1](*patched_timer.call_args[1]["args"])
+    patched_submit.assert_called_once_with(mocker.ANY, "video-1", "http://example.com/1.m3u8", attempt=1)
+    assert tasks.submit_manifest_validation("video-3", "http://example.com/3.m3u8") is False
+    release = patched_submit.return_value.add_done_callback.call_args[0][0]
+    release(patched_submit.return_value)
+    assert tasks._queued_count == 0  # pylint: disable=protected-access
+
+
+def test_submit_manifest_validation_bounded(mocker, settings):
+    """submit_manifest_validation should refuse validations while ASYNC_VALIDATION_MAX_QUEUED are queued or running"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, ASYNC_VALIDATION_MAX_QUEUED=1)
+    mocker.patch.object(tasks, "_queued_count", 0)
+    patched_submit = mocker.patch("edx_video_api.tasks.get_validation_executor").return_value.submit
+    assert tasks.submit_manifest_validation("video-1", "http://example.com/1.m3u8") is True
+    assert tasks.submit_manifest_validation("video-2", "http://example.com/2.m3u8") is False
+    assert patched_submit.call_count == 1
+    # Once the first validation finishes, another can be submitted
+    release = patched_submit.return_value.add_done_callback.call_args[0][0]
+    release(patched_submit.return_value)
+    assert tasks.submit_manifest_validation("video-2", "http://example.com/2.m3u8") is True
+    release(patched_submit.return_value)
+
+
+@pytest.mark.django_db
+def test_validate_stale_pending_videos(mocker):
+    """
+    validate_stale_pending_videos should validate the videos created through the API that have been pending for too
+    long, without retrying rejected fetches in the background
+    """
+    stale_video = create_course_video(COURSE_ID, status=tasks.PENDING_VIDEO_STATUS)
+    recent_video = create_course_video(COURSE_ID, status=tasks.PENDING_VIDEO_STATUS)
+    valid_video = create_course_video(COURSE_ID, status=tasks.VALID_VIDEO_STATUS)
+    # Not created through the API
+    create_course_video(COURSE_ID, status=tasks.PENDING_VIDEO_STATUS)
+    for video in (stale_video, recent_video, valid_video):
+        record_video_source(COURSE_ID, u"https://example.com/{}.m3u8".format(video.edx_video_id), video.edx_video_id)
+    CourseVideoSource.objects.filter(edx_video_id__in=[stale_video.edx_video_id, valid_video.edx_video_id]).update(
+        created=timezone.now() - timedelta(hours=1)
+    )
+    patched_validate = mocker.patch("edx_video_api.tasks.validate_hls_url", return_value=ManifestResult())
+    patched_timer = mocker.patch("edx_video_api.tasks.threading.Timer")
+    stdout = mocker.Mock()
+    call_command("validate_pending_videos", stdout=stdout)
+    patched_validate.assert_called_once_with(u"https://example.com/{}.m3u8".format(stale_video.edx_video_id))
+    assert Video.objects.get(id=stale_video.id).status == tasks.VALID_VIDEO_STATUS
+    assert Video.objects.get(id=recent_video.id).status == tasks.PENDING_VIDEO_STATUS
+    assert "1 valid" in stdout.write.call_args[0][0]
+
+    patched_validate.return_value = ManifestResult(ManifestFailure.host_unavailable)
+    assert tasks.validate_stale_pending_videos(older_than=0) == {None: 1}
+    patched_timer.assert_not_called()
+
+
+def test_background_task(mocker):
+    """A background task should log exceptions and close its database connection"""
+    patched_log = mocker.patch("edx_video_api.tasks.log")
+    patched_close = mocker.patch("edx_video_api.tasks.connection.close")
+    mocker.patch("edx_video_api.tasks.close_old_connections")
+
+    def failing_task():
+        """A task that fails"""
+        raise ValueError("failed")
+
+    assert tasks.background_task(failing_task)() is None
+    patched_log.exception.assert_called_once()
+    patched_close.assert_called_once()
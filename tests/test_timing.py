@@ -0,0 +1,69 @@
+"""Tests for per-phase request timing"""
+import pytest
+from django.db import connection, connections
+from edxval.models import Video
+
+from edx_video_api.timing import NULL_TIMER, PhaseTimer, new_timer
+
+
+@pytest.mark.django_db
+def test_phase_timer(mocker):
+    """PhaseTimer should add up the time and queries in each phase, and format them as a Server-Timing header"""
+    patched_time = mocker.patch("edx_video_api.timing.time.time", return_value=100)
+    previous_force_debug_cursor = connection.force_debug_cursor
+    timer = PhaseTimer()
+    with timer.phase("query"):
+        list(Video.objects.all())
+        list(Video.objects.all())
+        patched_time.return_value = 100.0125
+    with timer.phase("serialize"):
+        patched_time.return_value = 100.015
+    with timer.phase("query"):
+        list(Video.objects.all())
+        patched_time.return_value = 100.02
+    timer.count("rows", 10)
+    timer.stop()
+    assert connection.force_debug_cursor == previous_force_debug_cursor
+    assert timer.query_counts == {"query": 3, "serialize": 0}
+    assert timer.server_timing() == u'query;dur=17.5;desc="3 queries", serialize;dur=2.5, rows;desc="10"'
+
+
+@pytest.mark.django_db
+def test_phase_timer_replica_queries(settings):
+    """
+    PhaseTimer should count queries on the read replica as well, without clearing the query logs, and restore each
+    connection's query logging when it's stopped, even if it's stopped twice
+    """
+    settings.VIDEO_API = dict(settings.VIDEO_API, READ_REPLICA_ALIAS="replica")
+    replica_connection = connections["replica"]
+    list(Video.objects.all())
+    previous_queries_logged = len(connection.queries_log)
+    timer = PhaseTimer()
+    assert replica_connection.force_debug_cursor is True
+    with timer.phase("query"):
+        list(Video.objects.all())
+        list(Video.objects.using("replica").all())
+    timer.stop()
+    timer.stop()
+    assert timer.query_counts == {"query": 2}
+    assert len(connection.queries_log) >= previous_queries_logged
+    assert replica_connection.force_debug_cursor is False
+
+
+@pytest.mark.parametrize('setting_name,setting_value,expected_enabled', [
+    (None, None, False),
+    ("SERVER_TIMING_ENABLED", True, True),
+    ("METRICS_CALLBACK", "some.module.callback", True),
+])
+def test_new_timer(settings, setting_name, setting_value, expected_enabled):
+    """new_timer should only return a real timer if Server-Timing headers or a metrics callback are configured"""
+    if setting_name:
+        settings.VIDEO_API = dict(settings.VIDEO_API, **{setting_name: setting_value})
+    timer = new_timer()
+    assert timer.enabled is expected_enabled
+    if expected_enabled:
+        timer.stop()
+    else:
+        assert timer is NULL_TIMER
+        with timer.phase("query"):
+            timer.count("rows", 1)
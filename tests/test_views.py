@@ -1,19 +1,39 @@
 """Tests for video API views"""
 # pylint: disable=redefined-outer-name
 import json
+import zlib
 from collections import namedtuple
 
+import msgpack
 import pytest
+from django.core.cache import caches
+from django.db import connection
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 from rest_framework.test import APIRequestFactory
+from edxval.api import create_video, get_videos_for_ids
 from edxval.exceptions import ValCannotCreateError
 from opaque_keys import InvalidKeyError
-from edx_video_api.views import (
-    CourseVideoListView,
-    json_serialize_video,
-)
+from edxval.models import Video
+from edxval.serializers import VideoSerializer
+from edx_video_api.authentication import CachedTokenAuthentication
+from edx_video_api.changes import course_recently_changed_key
+from edx_video_api.hls import ManifestFailure, ManifestResult
+from edx_video_api.models import VideoChange
+from edx_video_api.queries import batch_course_videos
+from edx_video_api.serialization import get_video_url_builder, json_serialize_video, json_serialize_video_instance
+from edx_video_api.snapshots import rebuild_course_snapshot
+from edx_video_api.sources import get_videos_by_hls_url, record_video_source
+from edx_video_api.views import CONCURRENT_CREATE_ERROR, CourseVideoBatchView, CourseVideoListView
 
-from edx_video_api.utils import generate_video_api_result, now_in_utc, is_subdict
+from edx_video_api.utils import (
+    DummyOAuth2Authentication,
+    generate_video_api_result,
+    now_in_utc,
+    is_subdict,
+)
+from tests.factories import create_course_video
 
 COURSE_ID = "course-v1:MIT+DemoX+Demo_Course_2"
 FILENAME = "My Video"
@@ -31,34 +51,29 @@ def edxval_api(mocker):
     """Fixture for mocked API functions from edxval"""
     EdxvalApi = namedtuple(
         "EdxvalApi",
-        "get_videos_for_course,get_videos_for_ids,create_video"
+        "get_videos_for_course,create_video"
     )
     mock_video_result = generate_video_api_result(COURSE_ID)
     patched_get_videos = mocker.patch(
         "edx_video_api.views.get_videos_for_course",
         return_value=(iter([mock_video_result]), mocker.Mock())
     )
-    patched_get_videos_for_ids = mocker.patch(
-        "edx_video_api.views.get_videos_for_ids",
-        return_value=iter([mock_video_result])
-    )
     patched_create_video = mocker.patch(
         "edx_video_api.views.create_video",
         return_value=123
     )
     return EdxvalApi(
         get_videos_for_course=patched_get_videos,
-        get_videos_for_ids=patched_get_videos_for_ids,
         create_video=patched_create_video,
     )
 
 
 @pytest.fixture()
 def patched_valid_hls(mocker):
-    """Fixture that patches is_valid_hls_url"""
+    """Fixture that patches validate_hls_url"""
     return mocker.patch(
-        "edx_video_api.views.is_valid_hls_url",
-        return_value=True
+        "edx_video_api.views.validate_hls_url",
+        return_value=ManifestResult()
     )
 
 
@@ -125,6 +140,22 @@ def test_json_serialize_video():
     }
 
 
+@pytest.mark.django_db
+def test_json_serialize_video_instance():
+    """
+    json_serialize_video_instance should give the same result as running json_serialize_video on the
+    edxval-serialized video
+    """
+    video = create_course_video(COURSE_ID, duration=12.5)
+    assert json_serialize_video_instance(video) == json_serialize_video(VideoSerializer(video).data)
+
+
+@pytest.mark.parametrize('edx_video_id', ["abc-123_DEF", u"vid\xe9o"])
+def test_get_video_url_builder(edx_video_id):
+    """get_video_url_builder should return a function that gives the same URLs as Video.get_absolute_url"""
+    assert get_video_url_builder()(edx_video_id) == Video(edx_video_id=edx_video_id).get_absolute_url()
+
+
 @pytest.mark.parametrize('mock_request', [
     pytest.lazy_fixture('get_request'),
     pytest.lazy_fixture('post_request'),
@@ -132,7 +163,7 @@ def test_json_serialize_video():
 def test_view_bad_course_key_fail(mocker, view, mock_request):
     """A request to the video API with an invalid course id/key should fail"""
     patched_course_key_parser = mocker.patch(
-        "edx_video_api.views.CourseKey.from_string",
+        "edx_video_api.courses.CourseKey.from_string",
         side_effect=InvalidKeyError(mocker.Mock(), {})
     )
     response = view(mock_request, course_id=COURSE_ID).render()
@@ -148,7 +179,7 @@ def test_view_bad_course_key_fail(mocker, view, mock_request):
 def test_view_nonexistent_course_fail(mocker, view, mock_request):
     """A request to the video API with a course key that does not have a matching course should fail"""
     patched_course_key_parser = mocker.patch(
-        "edx_video_api.views.CourseOverview.get_from_id_if_exists",
+        "edx_video_api.utils.DummyCourseOverview.get_from_id_if_exists",
         return_value=None
     )
     response = view(mock_request, course_id=COURSE_ID).render()
@@ -157,6 +188,7 @@ def test_view_nonexistent_course_fail(mocker, view, mock_request):
     assert "not found" in json.loads(response.content)["error"]
 
 
+@pytest.mark.django_db
 def test_view_get_success(mocker, view, get_request, edxval_api):
     """A successful GET request to the video API should return JSON-serialized videos"""
     mock_serialized_video = {"serialized": "video"}
@@ -170,10 +202,440 @@ def test_view_get_success(mocker, view, get_request, edxval_api):
     assert json.loads(response.content) == [mock_serialized_video]
 
 
+@pytest.mark.django_db
+def test_view_get_paginated(view):
+    """A GET request with a page size should return a page of videos and a link to the next page"""
+    videos = [create_course_video(COURSE_ID) for _ in range(5)]
+    create_course_video("course-v1:MIT+Other+Course")
+    factory = APIRequestFactory()
+    seen_ids = []
+    url = "/{}/?page_size=2".format(COURSE_ID)
+    while url:
+        response = view(factory.get(url), course_id=COURSE_ID).render()
+        assert response.status_code == status.HTTP_200_OK
+        content = json.loads(response.content)
+        assert len(content["results"]) <= 2
+        seen_ids.extend(result["edx_video_id"] for result in content["results"])
+        url = content["next"]
+    assert seen_ids == [video.edx_video_id for video in videos]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_string', [
+    "page_size=0",
+    "page_size=abc",
+    "cursor=not-a-cursor",
+])
+def test_view_get_paginated_bad_params(view, query_string):
+    """A GET request with an invalid page size or cursor should fail"""
+    factory = APIRequestFactory()
+    response = view(factory.get("/{}/?{}".format(COURSE_ID, query_string)), course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('stream_format,content_type', [
+    ("json", "application/json"),
+    ("ndjson", "application/x-ndjson"),
+])
+def test_view_get_streamed(settings, view, stream_format, content_type):
+    """A streamed GET request should return every video for the course, fetched in chunks"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, STREAM_CHUNK_SIZE=2)
+    videos = [create_course_video(COURSE_ID) for _ in range(5)]
+    factory = APIRequestFactory()
+    response = view(factory.get("/{}/?stream={}".format(COURSE_ID, stream_format)), course_id=COURSE_ID)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == content_type
+    body = b"".join(response.streaming_content)
+    if stream_format == "json":
+        results = json.loads(body)
+    else:
+        results = [json.loads(line) for line in body.splitlines()]
+    assert results == [json_serialize_video_instance(video) for video in videos]
+
+
+@pytest.mark.django_db
+def test_view_get_streamed_bad_format(view):
+    """A streamed GET request with an unknown format should fail"""
+    factory = APIRequestFactory()
+    response = view(factory.get("/{}/?stream=xml".format(COURSE_ID)), course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_string', ["", "&page_size=2", "&stream=json"])
+@pytest.mark.parametrize('fields_query,expected_fields', [
+    ("fields=edx_video_id,status", ["edx_video_id", "status"]),
+    ("fields=edx_video_id&expand=encoded_videos", ["edx_video_id", "encoded_videos"]),
+    ("fields=url,duration,client_video_id", ["url", "duration", "client_video_id"]),
+])
+def test_view_get_fields(
+        django_assert_num_queries, view, edxval_api, query_string, fields_query, expected_fields
+):
+    """
+    A GET request with ?fields= should return only the requested fields, with the same values as a full listing, and
+    only fetch encoded videos if they're requested
+    """
+    videos = [create_course_video(COURSE_ID) for _ in range(3)]
+    factory = APIRequestFactory()
+    # One query for the listing's ETag, one for the videos, and one for their encoded videos if they were requested
+    with django_assert_num_queries(3 if "encoded_videos" in expected_fields else 2):
+        response = view(factory.get("/{}/?{}{}".format(COURSE_ID, fields_query, query_string)), course_id=COURSE_ID)
+        if "stream" in query_string:
+            results = json.loads(b"".join(response.streaming_content))
+        else:
+            content = json.loads(response.render().content)
+            results = content["results"] if "page_size" in query_string else content
+    assert response.status_code == status.HTTP_200_OK
+    edxval_api.get_videos_for_course.assert_not_called()
+    expected_results = [
+        {field: json_serialize_video_instance(video)[field] for field in expected_fields} for video in videos
+    ]
+    assert results == (expected_results[:2] if "page_size" in query_string else expected_results)
+
+
+@pytest.fixture()
+def filterable_videos():
+    """Fixture for videos in a course with different statuses, client video ids and profiles"""
+    def encoded_video(profile):
+        """Returns the data for an encoded video with a profile"""
+        return {"profile": profile, "url": u"https://example.com/video.mp4", "bitrate": 0, "file_size": 0}
+
+    return [
+        create_course_video(COURSE_ID, edx_video_id=u"video-a", client_video_id=u"Lecture 2", duration=30),
+        create_course_video(
+            COURSE_ID, edx_video_id=u"video-b", client_video_id=u"Lecture 1", duration=10, status=u"ingest",
+        ),
+        create_course_video(
+            COURSE_ID,
+            edx_video_id=u"video-c",
+            client_video_id=u"Intro, part 1",
+            duration=20,
+            encoded_videos=[encoded_video(u"desktop_mp4"), encoded_video(u"youtube")],
+        ),
+        create_course_video(COURSE_ID, edx_video_id=u"video-d", client_video_id=u"Lecture 3", duration=20),
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("filterable_videos")
+@pytest.mark.parametrize('query_string', ["", "&fields=edx_video_id", "&page_size=10", "&stream=json"])
+@pytest.mark.parametrize('filter_query,expected_ids', [
+    ("status=file_complete", [u"video-a", u"video-c", u"video-d"]),
+    ("status=ingest,invalid_token", [u"video-b"]),
+    ("profile=desktop_mp4,youtube", [u"video-c"]),
+    ("profile=hls&status=file_complete", [u"video-a", u"video-d"]),
+    ("client_video_id=Intro,%20part%201", [u"video-c"]),
+    ("client_video_id__startswith=Lecture", [u"video-a", u"video-b", u"video-d"]),
+    ("ordering=duration", [u"video-b", u"video-c", u"video-d", u"video-a"]),
+    ("ordering=-duration,-client_video_id", [u"video-a", u"video-d", u"video-c", u"video-b"]),
+    ("status=file_complete&ordering=client_video_id", [u"video-c", u"video-a", u"video-d"]),
+])
+def test_view_get_filtered(view, edxval_api, query_string, filter_query, expected_ids):
+    """A GET request with filters and an ordering should return the matching videos in order, for every listing"""
+    factory = APIRequestFactory()
+    response = view(factory.get("/{}/?{}{}".format(COURSE_ID, filter_query, query_string)), course_id=COURSE_ID)
+    if "stream" in query_string:
+        results = json.loads(b"".join(response.streaming_content))
+    else:
+        content = json.loads(response.render().content)
+        results = content["results"] if "page_size" in query_string else content
+    assert response.status_code == status.HTTP_200_OK
+    assert [video["edx_video_id"] for video in results] == expected_ids
+    edxval_api.get_videos_for_course.assert_not_called()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('fields_query', ["", "&fields=edx_video_id"])
+def test_view_get_ordering_paginated(view, filterable_videos, fields_query):
+    """A paginated listing should page through the videos in the requested order, breaking ties by edx_video_id"""
+    factory = APIRequestFactory()
+    url = "/{}/?ordering=-duration&page_size=2{}".format(COURSE_ID, fields_query)
+    video_ids = []
+    while url:
+        content = json.loads(view(factory.get(url), course_id=COURSE_ID).render().content)
+        video_ids.extend(video["edx_video_id"] for video in content["results"])
+        url = content["next"]
+    assert video_ids == [video.edx_video_id for video in sorted(
+        filterable_videos, key=lambda video: (-video.duration, video.edx_video_id)
+    )]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_string', ["ordering=size", "ordering=status,-status", "status=", "profile=,"])
+def test_view_get_filters_bad_params(view, query_string):
+    """A GET request with an unknown ordering field or an empty filter should fail"""
+    factory = APIRequestFactory()
+    response = view(factory.get("/{}/?{}".format(COURSE_ID, query_string)), course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_string', ["fields=edx_video_id,size", "fields=", "fields=url&expand=courses"])
+def test_view_get_fields_bad_params(view, query_string):
+    """A GET request for unknown fields should fail"""
+    factory = APIRequestFactory()
+    response = view(factory.get("/{}/?{}".format(COURSE_ID, query_string)), course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_view_get_changes(settings, view):
+    """
+    A GET request with a change token should return the videos that changed since the token was issued, the ids of
+    videos that were removed, and a new token
+    """
+    settings.VIDEO_API = dict(settings.VIDEO_API, CHANGE_TOKEN_SETTLE_TIME=0)
+    factory = APIRequestFactory()
+
+    def get_changes(query_string):
+        """Returns the course's changes"""
+        response = view(factory.get("/{}/?{}".format(COURSE_ID, query_string)), course_id=COURSE_ID).render()
+        assert response.status_code == status.HTTP_200_OK
+        return json.loads(response.content)
+
+    unchanged_video = create_course_video(COURSE_ID)
+    changed_video = create_course_video(COURSE_ID)
+    removed_video = create_course_video(COURSE_ID)
+    create_course_video("course-v1:MIT+Other+Course")
+    content = get_changes("change_token=0")
+    assert [result["edx_video_id"] for result in content["results"]] == [
+        unchanged_video.edx_video_id, changed_video.edx_video_id, removed_video.edx_video_id
+    ]
+    assert content["removed"] == []
+
+    changed_video.status = u"invalid_token"
+    changed_video.save()
+    removed_video.courses.update(is_hidden=True)
+    removed_video.courses.get().save()
+    content = get_changes("change_token={}".format(content["change_token"]))
+    assert content["results"] == [json_serialize_video_instance(changed_video)]
+    assert content["removed"] == [removed_video.edx_video_id]
+
+    content = get_changes("change_token={}&fields=edx_video_id".format(content["change_token"]))
+    assert content["results"] == []
+    assert content["removed"] == []
+
+
+@pytest.mark.django_db
+def test_view_get_modified_since(view):
+    """A GET request with a timestamp should return the videos created or changed after it"""
+    old_video = create_course_video(COURSE_ID)
+    modified_since = now_in_utc()
+    new_video = create_course_video(COURSE_ID)
+    factory = APIRequestFactory()
+    response = view(
+        factory.get("/{}/".format(COURSE_ID), {"modified_since": modified_since.isoformat()}),
+        course_id=COURSE_ID
+    ).render()
+    assert response.status_code == status.HTTP_200_OK
+    content = json.loads(response.content)
+    assert [result["edx_video_id"] for result in content["results"]] == [new_video.edx_video_id]
+    assert old_video.edx_video_id not in content["removed"]
+    assert content["change_token"] == "0"
+
+
+@pytest.mark.django_db
+def test_view_get_changes_not_cached(mocker, settings, view):
+    """
+    A GET request with a change token should be sent a new token once more changes settle, even though the course's
+    version (and so its ETag) hasn't changed
+    """
+    create_course_video(COURSE_ID)
+    patched_set_cached_listing = mocker.patch("edx_video_api.views.set_cached_listing")
+    factory = APIRequestFactory()
+    response = view(factory.get("/{}/?change_token=0".format(COURSE_ID)), course_id=COURSE_ID).render()
+    assert json.loads(response.content)["change_token"] == "0"
+    assert "ETag" not in response
+
+    settings.VIDEO_API = dict(settings.VIDEO_API, CHANGE_TOKEN_SETTLE_TIME=0)
+    response = view(factory.get("/{}/?change_token=0".format(COURSE_ID)), course_id=COURSE_ID).render()
+    assert json.loads(response.content)["change_token"] == unicode(VideoChange.objects.latest("id").id)
+    patched_set_cached_listing.assert_not_called()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_string', ["change_token=0", "modified_since=2000-01-01T00:00:00Z"])
+def test_view_get_changes_expired(settings, view, query_string):
+    """A GET request for changes that may have been pruned from the change feed should say a resync is required"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, CHANGE_TOKEN_SETTLE_TIME=0)
+    for _ in range(2):
+        create_course_video(COURSE_ID)
+    VideoChange.objects.order_by("id").first().delete()
+    response = view(APIRequestFactory().get("/{}/?{}".format(COURSE_ID, query_string)), course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_410_GONE
+    assert json.loads(response.content)["resync_required"] is True
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_string', ["change_token=abc", "change_token=-1", "modified_since=yesterday"])
+def test_view_get_changes_bad_params(view, query_string):
+    """A GET request with an invalid change token or timestamp should fail"""
+    factory = APIRequestFactory()
+    response = view(factory.get("/{}/?{}".format(COURSE_ID, query_string)), course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_string', ["?fields=edx_video_id,url,status", "?page_size=10"])
+def test_view_get_msgpack(mocker, view, query_string):
+    """
+    A GET request that accepts MessagePack should get the same values as the JSON listing, with a different ETag, and
+    shouldn't be cached
+    """
+    create_course_video(COURSE_ID)
+    factory = APIRequestFactory()
+    url = "/{}/{}".format(COURSE_ID, query_string)
+    patched_set_cached_listing = mocker.patch("edx_video_api.views.set_cached_listing", return_value=None)
+    msgpack_response = view(factory.get(url, HTTP_ACCEPT="application/msgpack"), course_id=COURSE_ID).render()
+    assert msgpack_response.status_code == status.HTTP_200_OK
+    assert msgpack_response["Content-Type"] == "application/msgpack"
+    assert msgpack_response["Vary"] == "Accept"
+    patched_set_cached_listing.assert_not_called()
+    json_response = view(factory.get(url), course_id=COURSE_ID).render()
+    assert msgpack.unpackb(msgpack_response.content, raw=False) == json.loads(json_response.content)
+    assert msgpack_response["ETag"] != json_response["ETag"]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_string', ["", "?page_size=10", "?stream=json"])
+def test_view_get_conditional(view, query_string):
+    """
+    GET responses should include an ETag and Last-Modified, and a matching conditional request should get a 304
+    response
+    """
+    create_course_video(COURSE_ID)
+    factory = APIRequestFactory()
+    url = "/{}/{}".format(COURSE_ID, query_string)
+    response = view(factory.get(url), course_id=COURSE_ID)
+    assert response.status_code == status.HTTP_200_OK
+    etag = response["ETag"]
+    last_modified = response["Last-Modified"]
+
+    response = view(factory.get(url, HTTP_IF_NONE_MATCH=etag), course_id=COURSE_ID)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == etag
+    response = view(factory.get(url, HTTP_IF_MODIFIED_SINCE=last_modified), course_id=COURSE_ID)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    response = view(factory.get(url, HTTP_IF_NONE_MATCH='"something-else"'), course_id=COURSE_ID)
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_view_get_conditional_skips_serialization(mocker, view, edxval_api):
+    """A 304 response should not load or serialize any videos"""
+    factory = APIRequestFactory()
+    etag = view(factory.get("/{}/".format(COURSE_ID)), course_id=COURSE_ID)["ETag"]
+    edxval_api.get_videos_for_course.reset_mock()
+    patched_serializer = mocker.patch("edx_video_api.views.json_serialize_video")
+    response = view(factory.get("/{}/".format(COURSE_ID), HTTP_IF_NONE_MATCH=etag), course_id=COURSE_ID)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    edxval_api.get_videos_for_course.assert_not_called()
+    patched_serializer.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_view_get_etag_changes(view):
+    """The ETag should change when a video is added, or when a video's fields change"""
+    video = create_course_video(COURSE_ID)
+    factory = APIRequestFactory()
+
+    def get_etag():
+        """Returns the ETag for the course's listing"""
+        return view(factory.get("/{}/".format(COURSE_ID)), course_id=COURSE_ID)["ETag"]
+
+    etags = [get_etag()]
+    assert get_etag() == etags[0]
+    create_course_video(COURSE_ID)
+    etags.append(get_etag())
+    video.status = u"invalid_token"
+    video.save()
+    etags.append(get_etag())
+    assert len(set(etags)) == 3
+
+
+@pytest.mark.django_db
+def test_view_get_cached(mocker, view, edxval_api):
+    """A repeated GET request should be answered from the listing cache without loading or serializing videos"""
+    factory = APIRequestFactory()
+    first_response = view(factory.get("/{}/".format(COURSE_ID)), course_id=COURSE_ID).render()
+    edxval_api.get_videos_for_course.reset_mock()
+    patched_serializer = mocker.patch("edx_video_api.views.json_serialize_video")
+    response = view(factory.get("/{}/".format(COURSE_ID)), course_id=COURSE_ID)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == first_response.content
+    assert response["Content-Type"] == first_response["Content-Type"]
+    assert response["ETag"] == first_response["ETag"]
+    edxval_api.get_videos_for_course.assert_not_called()
+    patched_serializer.assert_not_called()
+
+    # Other query parameters are cached separately
+    view(factory.get("/{}/?page_size=10".format(COURSE_ID)), course_id=COURSE_ID).render()
+    edxval_api.get_videos_for_course.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_view_get_cache_invalidated_by_create(view, post_request, patched_valid_hls, edxval_api):
+    """Creating a video should invalidate the course's cached listing"""
+    factory = APIRequestFactory()
+    view(factory.get("/{}/".format(COURSE_ID)), course_id=COURSE_ID).render()
+    view(post_request, course_id=COURSE_ID).render()
+    patched_valid_hls.assert_called_once()
+    edxval_api.get_videos_for_course.reset_mock()
+    edxval_api.get_videos_for_course.return_value = (iter([]), None)
+    response = view(factory.get("/{}/".format(COURSE_ID)), course_id=COURSE_ID).render()
+    assert json.loads(response.content) == []
+    edxval_api.get_videos_for_course.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_view_get_server_timing(mocker, settings, view):
+    """
+    With timing on, a GET response should have a Server-Timing header, and the timings should be passed to the
+    metrics callback
+    """
+    metrics_callback = mocker.Mock()
+    settings.VIDEO_API = dict(settings.VIDEO_API, SERVER_TIMING_ENABLED=True, METRICS_CALLBACK=metrics_callback)
+    create_course_video(COURSE_ID)
+    response = view(APIRequestFactory().get("/{}/?page_size=10".format(COURSE_ID)), course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_200_OK
+    phases = [metric.split(";")[0] for metric in response["Server-Timing"].split(", ")]
+    assert phases == ["auth", "course", "cache", "validators", "query", "serialize", "render", "rows"]
+    assert 'rows;desc="1"' in response["Server-Timing"]
+    metrics_callback.assert_called_once()
+    metrics = metrics_callback.call_args[1]
+    assert metrics["view"] == "CourseVideoListView"
+    assert metrics["method"] == "GET"
+    assert metrics["status_code"] == status.HTTP_200_OK
+    assert set(metrics["durations"]) == set(phases) - {"rows"}
+    assert metrics["query_counts"]["query"] == 2
+    assert metrics["counts"] == {"rows": 1}
+
+
+@pytest.mark.django_db
+def test_view_server_timing_error(mocker, settings, view):
+    """If a request with timing on raises an error, the query log should still be turned back off"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, SERVER_TIMING_ENABLED=True)
+    mocker.patch("edx_video_api.views.CourseVideoListView.list", side_effect=RuntimeError)
+    previous_force_debug_cursor = connection.force_debug_cursor
+    with pytest.raises(RuntimeError):
+        view(APIRequestFactory().get("/{}/".format(COURSE_ID)), course_id=COURSE_ID)
+    assert connection.force_debug_cursor == previous_force_debug_cursor
+
+
+@pytest.mark.django_db
+def test_view_get_no_server_timing(view):
+    """With timing off, a GET response should not have a Server-Timing header"""
+    response = view(APIRequestFactory().get("/{}/".format(COURSE_ID)), course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_200_OK
+    assert "Server-Timing" not in response
+
+
 @pytest.mark.parametrize('filename,hls_url', [
     (None, HLS_URL),
     (FILENAME, None)
 ])
+@pytest.mark.django_db
 def test_create_missing_data_fail(view, filename, hls_url):
     """A POST request to the video API without required values in the body should fail"""
     factory = APIRequestFactory()
@@ -188,6 +650,31 @@ def test_create_missing_data_fail(view, filename, hls_url):
     assert response.status_code == status.HTTP_400_BAD_REQUEST
 
 
+@pytest.mark.django_db
+def test_create_invalid_hls_url_fail(view, post_request, patched_valid_hls, edxval_api):
+    """A POST request to the video API with an invalid HLS URL should fail and give the reason"""
+    patched_valid_hls.return_value = ManifestResult(ManifestFailure.timeout)
+    response = view(post_request, course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert json.loads(response.content)["error"] == u"Request does not contain a valid HLS URL (reason: timeout)"
+    edxval_api.create_video.assert_not_called()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('failure', [ManifestFailure.host_busy, ManifestFailure.host_unavailable])
+def test_create_manifest_host_rejected(view, post_request, patched_valid_hls, edxval_api, failure):
+    """A POST request whose manifest's host is overloaded or failing should get a 503 response to retry later"""
+    patched_valid_hls.return_value = ManifestResult(failure)
+    response = view(post_request, course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response["Retry-After"] == "30"
+    assert json.loads(response.content)["error"] == (
+        u"The HLS URL's host can't be reached right now (reason: {})".format(failure.value)
+    )
+    edxval_api.create_video.assert_not_called()
+
+
+@pytest.mark.django_db
 def test_create_video_fail(view, post_request, patched_valid_hls, edxval_api):  # pylint: disable=unused-argument
     """A POST request to the video API that causes an edxval API failure should return a meaningful response"""
     edxval_api.create_video.side_effect = ValCannotCreateError
@@ -196,6 +683,7 @@ def test_create_video_fail(view, post_request, patched_valid_hls, edxval_api):
     assert "Could not create video" in json.loads(response.content)["error"]
 
 
+@pytest.mark.django_db
 def test_create_video_success(view, post_request, patched_valid_hls, edxval_api):
     """A successful POST request to the video API should create a video object and return the serialized version"""
     response = view(post_request, course_id=COURSE_ID).render()
@@ -215,5 +703,461 @@ def test_create_video_success(view, post_request, patched_valid_hls, edxval_api)
         }],
         "courses": [COURSE_ID]
     }, create_video_call_arg)
+    assert json.loads(response.content)["edx_video_id"] == create_video_call_arg["edx_video_id"]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('filename', [FILENAME, u"  Padded \u2603 name  ", 42])
+def test_create_video_response_matches_stored_video(view, patched_valid_hls, edxval_api, filename):
+    """
+    The response to a POST request should be byte-for-byte identical to serializing the stored video with edxval
+    """
+    edxval_api.create_video.side_effect = create_video
+    request = APIRequestFactory().post("/{}/".format(COURSE_ID), {"filename": filename, "hls_url": HLS_URL})
+    response = view(request, course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_200_OK
+    patched_valid_hls.assert_called_once()
+    stored_video = next(get_videos_for_ids([json.loads(response.content)["edx_video_id"]]))
+    expected_response = Response(json_serialize_video(stored_video))
+    expected_response.accepted_renderer = JSONRenderer()
+    expected_response.accepted_media_type = "application/json"
+    expected_response.renderer_context = {}
+    assert response.content == expected_response.render().content
+
+
+@pytest.mark.django_db
+def test_create_video_manifest_metadata(view, patched_valid_hls, edxval_api):
+    """A POST request should store the duration and bitrate found in the video's manifest"""
+    edxval_api.create_video.side_effect = create_video
+    patched_valid_hls.return_value = ManifestResult(duration=61.5, bitrate=2560000)
+    request = APIRequestFactory().post("/{}/".format(COURSE_ID), {"filename": FILENAME, "hls_url": HLS_URL})
+    response = view(request, course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_200_OK
+    video = json.loads(response.content)
+    assert video["duration"] == 61.5
+    assert video["encoded_videos"][0]["bitrate"] == 2560000
+    stored_video = next(get_videos_for_ids([video["edx_video_id"]]))
+    assert stored_video["duration"] == 61.5
+    assert stored_video["encoded_videos"][0]["bitrate"] == 2560000
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_string', ["", "?async=1"])
+def test_create_video_existing_hls_url(mocker, view, patched_valid_hls, edxval_api, query_string):
+    """
+    A POST request for an HLS URL that a visible video in the course was created from should return that video
+    without validating the manifest or creating anything
+    """
+    mocker.patch("edx_video_api.views.schedule_manifest_validation")
+    edxval_api.create_video.side_effect = create_video
+    url = "/{}/{}".format(COURSE_ID, query_string)
+    first_response = view(
+        APIRequestFactory().post(url, {"filename": FILENAME, "hls_url": HLS_URL}), course_id=COURSE_ID
+    )
+    patched_valid_hls.reset_mock()
+    response = view(
+        APIRequestFactory().post(url, {"filename": "Another name", "hls_url": HLS_URL}), course_id=COURSE_ID
+    ).render()
+    assert response.status_code == status.HTTP_200_OK
+    video = json.loads(response.content)
+    assert video["edx_video_id"] == first_response.data["edx_video_id"]
+    assert video["client_video_id"] == FILENAME
+    patched_valid_hls.assert_not_called()
+    edxval_api.create_video.assert_called_once()
+
+    Video.objects.get(edx_video_id=video["edx_video_id"]).courses.update(is_hidden=True)
+    response = view(APIRequestFactory().post(url, {"filename": FILENAME, "hls_url": HLS_URL}), course_id=COURSE_ID)
+    assert response.data["edx_video_id"] != video["edx_video_id"]
+    assert edxval_api.create_video.call_count == 2
+
+
+@pytest.mark.django_db
+def test_create_video_concurrent_duplicate(
+        mocker, view, post_request, patched_valid_hls, edxval_api
+):  # pylint: disable=unused-argument
+    """
+    If a concurrent request creates a video from the same HLS URL first, a POST request should roll back its own
+    video and return the other one
+    """
+    edxval_api.create_video.side_effect = create_video
+    existing_video = create_course_video(COURSE_ID)
+    record_video_source(COURSE_ID, HLS_URL, existing_video.edx_video_id)
+    mocker.patch(
+        "edx_video_api.views.get_videos_by_hls_url",
+        side_effect=[{}, get_videos_by_hls_url(COURSE_ID, [HLS_URL])],
+    )
+    response = view(post_request, course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_200_OK
+    assert json.loads(response.content)["edx_video_id"] == existing_video.edx_video_id
+    edxval_api.create_video.assert_called_once()
+    assert list(Video.objects.values_list("edx_video_id", flat=True)) == [existing_video.edx_video_id]
+
+
+@pytest.mark.django_db
+def test_create_video_concurrent_duplicate_not_visible(
+        mocker, view, post_request, patched_valid_hls, patched_valid_hls_urls, edxval_api
+):  # pylint: disable=unused-argument,too-many-arguments
+    """
+    If a concurrent request creates a video from the same HLS URL first, but this request's transaction can't see it
+    yet, a POST request should return a 409 response that asks the client to retry
+    """
+    edxval_api.create_video.side_effect = create_video
+    existing_video = create_course_video(COURSE_ID)
+    record_video_source(COURSE_ID, HLS_URL, existing_video.edx_video_id)
+    mocker.patch("edx_video_api.views.get_videos_by_hls_url", return_value={})
+    response = view(post_request, course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response["Retry-After"] == "1"
+    assert json.loads(response.content) == {"error": CONCURRENT_CREATE_ERROR}
+
+    bulk_response = view(
+        APIRequestFactory().post(
+            "/{}/".format(COURSE_ID), [{"filename": FILENAME, "hls_url": HLS_URL}], format="json"
+        ),
+        course_id=COURSE_ID,
+    ).render()
+    assert bulk_response.status_code == status.HTTP_200_OK
+    assert json.loads(bulk_response.content) == [{"error": CONCURRENT_CREATE_ERROR}]
+    assert list(Video.objects.values_list("edx_video_id", flat=True)) == [existing_video.edx_video_id]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query_string', ["?async=1", "?async=true"])
+def test_create_video_async(mocker, view, patched_valid_hls, edxval_api, query_string):
+    """
+    An async POST request should create a pending video without validating its manifest, schedule validation,
+    and return a 202 response
+    """
+    patched_schedule = mocker.patch("edx_video_api.views.schedule_manifest_validation")
+    request = APIRequestFactory().post(
+        "/{}/{}".format(COURSE_ID, query_string),
+        {"filename": FILENAME, "hls_url": HLS_URL},
+    )
+    response = view(request, course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    patched_valid_hls.assert_not_called()
+    assert edxval_api.create_video.call_args[0][0]["status"] == "ingest"
     new_video_id = edxval_api.create_video.return_value
-    edxval_api.get_videos_for_ids.assert_called_once_with([new_video_id])
+    patched_schedule.assert_called_once_with(new_video_id, HLS_URL)
+    assert json.loads(response.content)["status"] == "ingest"
+
+
+@pytest.fixture()
+def patched_valid_hls_urls(mocker):
+    """Fixture that patches validate_hls_urls to find every manifest valid"""
+    return mocker.patch(
+        "edx_video_api.views.validate_hls_urls",
+        side_effect=lambda hls_urls, max_workers: {hls_url: ManifestResult() for hls_url in hls_urls}
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_create_videos(view, patched_valid_hls_urls, edxval_api):
+    """
+    A POST request with a list of videos should validate their manifests together, create the valid videos,
+    and return a result for each one
+    """
+    bad_hls_url = "http://example.com/bad.m3u8"
+    patched_valid_hls_urls.side_effect = lambda hls_urls, max_workers: {
+        hls_url: ManifestResult(ManifestFailure.no_variants if hls_url == bad_hls_url else None)
+        for hls_url in hls_urls
+    }
+    edxval_api.create_video.side_effect = [
+        "video-1",
+        ValCannotCreateError("bad data"),
+        "video-2",
+    ]
+    items = [
+        {"filename": "one", "hls_url": HLS_URL},
+        {"filename": "two", "hls_url": bad_hls_url},
+        {"filename": "three", "hls_url": "http://example.com/three.m3u8"},
+        {"hls_url": HLS_URL},
+        {"filename": "four", "hls_url": "http://example.com/four.m3u8"},
+        "not an object",
+    ]
+    request = APIRequestFactory().post("/{}/".format(COURSE_ID), items, format="json")
+    response = view(request, course_id=COURSE_ID).render()
+
+    assert response.status_code == status.HTTP_200_OK
+    results = json.loads(response.content)
+    created_video_data = [call[0][0] for call in edxval_api.create_video.call_args_list]
+    assert results[0]["video"]["edx_video_id"] == created_video_data[0]["edx_video_id"]
+    assert results[0]["video"]["client_video_id"] == "one"
+    assert results[0]["video"]["duration"] == 0
+    assert results[1] == {"error": u"Request does not contain a valid HLS URL (reason: no_variants)"}
+    assert "Could not create video" in results[2]["error"]
+    assert results[3] == {"error": u"Request does not contain file name"}
+    assert results[4]["video"]["edx_video_id"] == created_video_data[2]["edx_video_id"]
+    assert results[5] == {"error": u"Video data must be an object"}
+    patched_valid_hls_urls.assert_called_once()
+    assert sorted(patched_valid_hls_urls.call_args[0][0]) == [
+        bad_hls_url, "http://example.com/four.m3u8", "http://example.com/three.m3u8", HLS_URL
+    ]
+    assert [video_data["client_video_id"] for video_data in created_video_data] == ["one", "three", "four"]
+
+
+@pytest.mark.django_db
+def test_bulk_create_videos_async(mocker, view, patched_valid_hls_urls, edxval_api):
+    """
+    An async POST request with a list of videos should create pending videos without validating their manifests,
+    schedule validation for each one, and return a 202 response
+    """
+    patched_schedule = mocker.patch("edx_video_api.views.schedule_manifest_validation")
+    edxval_api.create_video.side_effect = ["video-1", "video-2"]
+    items = [
+        {"filename": "one", "hls_url": HLS_URL},
+        {"filename": "two", "hls_url": "http://example.com/two.m3u8"},
+        {"hls_url": HLS_URL},
+    ]
+    request = APIRequestFactory().post("/{}/?async=1".format(COURSE_ID), items, format="json")
+    response = view(request, course_id=COURSE_ID).render()
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    results = json.loads(response.content)
+    assert [result["video"]["status"] for result in results[:2]] == ["ingest", "ingest"]
+    assert results[2] == {"error": u"Request does not contain file name"}
+    patched_valid_hls_urls.assert_not_called()
+    assert [call[0][0]["status"] for call in edxval_api.create_video.call_args_list] == ["ingest", "ingest"]
+    assert patched_schedule.call_args_list == [
+        mocker.call("video-1", HLS_URL), mocker.call("video-2", "http://example.com/two.m3u8")
+    ]
+
+
+@pytest.mark.django_db
+def test_bulk_create_videos_existing_hls_urls(view, patched_valid_hls_urls, edxval_api):
+    """
+    A bulk POST request should return the existing videos for HLS URLs that videos were already created from,
+    including earlier items in the same request, and only validate and create the others
+    """
+    edxval_api.create_video.side_effect = create_video
+    existing_video = create_course_video(COURSE_ID)
+    record_video_source(COURSE_ID, HLS_URL, existing_video.edx_video_id)
+    new_hls_url = "http://example.com/new.m3u8"
+    items = [
+        {"filename": "one", "hls_url": HLS_URL},
+        {"filename": "two", "hls_url": new_hls_url},
+        {"filename": "three", "hls_url": new_hls_url},
+    ]
+    request = APIRequestFactory().post("/{}/".format(COURSE_ID), items, format="json")
+    results = json.loads(view(request, course_id=COURSE_ID).render().content)
+    assert results[0]["video"]["edx_video_id"] == existing_video.edx_video_id
+    assert results[1]["video"]["client_video_id"] == "two"
+    assert results[2] == results[1]
+    assert sorted(patched_valid_hls_urls.call_args[0][0]) == [new_hls_url]
+    edxval_api.create_video.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_bulk_create_videos_in_one_transaction(
+        mocker, view, patched_valid_hls_urls, edxval_api
+):  # pylint: disable=unused-argument
+    """Videos created in a bulk request should be written in a single transaction"""
+    edxval_api.create_video.side_effect = ["video-1", "video-2"]
+    patched_atomic = mocker.patch("edx_video_api.views.transaction.atomic")
+    items = [{"filename": "one", "hls_url": HLS_URL}, {"filename": "two", "hls_url": "http://example.com/two.m3u8"}]
+    request = APIRequestFactory().post("/{}/".format(COURSE_ID), items, format="json")
+    view(request, course_id=COURSE_ID).render()
+    # One outer transaction, plus a savepoint for each video (ignoring the ones that saving a model uses internally)
+    assert patched_atomic.call_args_list.count(mocker.call()) == 3
+
+
+@pytest.mark.parametrize('items', [[], [{"filename": "one", "hls_url": HLS_URL}] * 3])
+def test_bulk_create_videos_size_limit(settings, view, patched_valid_hls_urls, items):
+    """A bulk POST request with no videos or too many videos should fail"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, BULK_CREATE_MAX_ITEMS=2)
+    request = APIRequestFactory().post("/{}/".format(COURSE_ID), items, format="json")
+    response = view(request, course_id=COURSE_ID).render()
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    patched_valid_hls_urls.assert_not_called()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('method', ["get", "post"])
+def test_batch_list(mocker, django_assert_num_queries, method):
+    """
+    The batch view should list the videos for several courses with one course lookup and one video query, and
+    report an error for each course that doesn't exist
+    """
+    other_course_id = "course-v1:MIT+Other+Course"
+    missing_course_id = "course-v1:MIT+Missing+Course"
+    videos = [create_course_video(COURSE_ID) for _ in range(2)]
+    shared_video = create_course_video(other_course_id, courses=[other_course_id, COURSE_ID])
+    hidden_video = create_course_video(other_course_id)
+    hidden_video.courses.update(is_hidden=True)
+    patched_get_many = mocker.patch(
+        "edx_video_api.utils.DummyCourseOverview.get_from_ids_if_exists",
+        side_effect=lambda course_keys: {
+            course_key: True for course_key in course_keys if unicode(course_key) != missing_course_id
+        }
+    )
+    course_ids = [other_course_id, COURSE_ID, missing_course_id, "not a course key"]
+    factory = APIRequestFactory()
+    if method == "get":
+        request = factory.get("/batch/", {"course_id": course_ids})
+    else:
+        request = factory.post("/batch/", {"course_ids": course_ids}, format="json")
+    # One query for the course videos and their videos, and one for the encoded videos
+    with django_assert_num_queries(2):
+        response = CourseVideoBatchView.as_view()(request).render()
+    assert response.status_code == status.HTTP_200_OK
+    patched_get_many.assert_called_once()
+    content = json.loads(response.content)
+    assert list(content["results"]) == [other_course_id, COURSE_ID]
+    assert content["results"][COURSE_ID] == [
+        json_serialize_video_instance(video) for video in videos + [shared_video]
+    ]
+    assert content["results"][other_course_id] == [json_serialize_video_instance(shared_video)]
+    assert content["errors"] == {
+        missing_course_id: u"Course with id '{}' not found".format(missing_course_id),
+        "not a course key": u"Invalid course key ('not a course key')",
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('recently_changed', [True, False])
+def test_view_get_read_replica(settings, view, recently_changed):
+    """
+    A GET request should read from the read replica (which is never written to in the tests), unless the course's
+    videos changed within the sticky timeout
+    """
+    settings.VIDEO_API = dict(settings.VIDEO_API, READ_REPLICA_ALIAS="replica")
+    video = create_course_video(COURSE_ID)
+    if not recently_changed:
+        caches["default"].delete(course_recently_changed_key(COURSE_ID))
+    factory = APIRequestFactory()
+    response = view(factory.get("/{}/?stream=json".format(COURSE_ID)), course_id=COURSE_ID)
+    assert response.status_code == status.HTTP_200_OK
+    results = json.loads(b"".join(response.streaming_content))
+    assert results == ([json_serialize_video_instance(video)] if recently_changed else [])
+
+
+@pytest.mark.django_db
+def test_view_get_snapshot(mocker, settings, view, edxval_api):
+    """
+    If snapshots are enabled, a GET request for the default listing that accepts gzip should be sent the course's
+    compressed snapshot, without reading any videos
+    """
+    settings.VIDEO_API = dict(settings.VIDEO_API, SNAPSHOTS_ENABLED=True)
+    videos = [create_course_video(COURSE_ID) for _ in range(2)]
+    patched_schedule = mocker.patch("edx_video_api.views.schedule_snapshot_rebuilds")
+    factory = APIRequestFactory()
+    response = view(factory.get("/{}/".format(COURSE_ID), HTTP_ACCEPT_ENCODING="gzip"), course_id=COURSE_ID).render()
+    # The course has no snapshot yet, so the listing is rendered as usual and the snapshot is built in the background
+    assert response.status_code == status.HTTP_200_OK
+    assert not response.has_header("Content-Encoding")
+    assert "Accept-Encoding" in response["Vary"]
+    patched_schedule.assert_called_once_with([COURSE_ID])
+    edxval_api.get_videos_for_course.assert_called_once()
+
+    rebuild_course_snapshot(COURSE_ID)
+    response = view(factory.get("/{}/".format(COURSE_ID), HTTP_ACCEPT_ENCODING="gzip"), course_id=COURSE_ID)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Encoding"] == "gzip"
+    assert response["Content-Type"] == "application/json"
+    assert "Accept-Encoding" in response["Vary"]
+    assert json.loads(zlib.decompress(response.content, 16 + zlib.MAX_WBITS)) == [
+        json_serialize_video_instance(video) for video in videos
+    ]
+    edxval_api.get_videos_for_course.assert_called_once()
+
+    not_modified_response = view(
+        factory.get("/{}/".format(COURSE_ID), HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]),
+        course_id=COURSE_ID,
+    )
+    assert not_modified_response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # Clients that don't accept gzip, and listings with query parameters, aren't sent the snapshot. The first of
+    # these is served from the listing cache as a plain HttpResponse, so the responses aren't rendered here.
+    for request in (
+            factory.get("/{}/".format(COURSE_ID)),
+            factory.get("/{}/?page_size=10".format(COURSE_ID), HTTP_ACCEPT_ENCODING="gzip"),
+    ):
+        response = view(request, course_id=COURSE_ID)
+        assert response.status_code == status.HTTP_200_OK
+        assert not response.has_header("Content-Encoding")
+
+
+@pytest.mark.django_db
+def test_batch_list_course_id_case(mocker):
+    """
+    The batch view should list a course's videos under the requested course id, even if the database (e.g.: MySQL,
+    which compares course ids without regard to case) returns them with a course id in a different case
+    """
+    video = create_course_video(COURSE_ID)
+    requested_course_id = COURSE_ID.replace("MIT", "mit")
+    course_videos = list(batch_course_videos([COURSE_ID]))
+    mocker.patch("edx_video_api.views.batch_course_videos", return_value=course_videos)
+    response = CourseVideoBatchView.as_view()(
+        APIRequestFactory().get("/batch/", {"course_id": [requested_course_id]})
+    ).render()
+    assert response.status_code == status.HTTP_200_OK
+    assert json.loads(response.content)["results"] == {requested_course_id: [json_serialize_video_instance(video)]}
+
+
+@pytest.mark.django_db
+def test_batch_list_max_videos(settings):
+    """
+    If the courses have more than BATCH_MAX_VIDEOS videos between them, the batch view should list the courses that
+    fit, in order, and report an error for the others
+    """
+    settings.VIDEO_API = dict(settings.VIDEO_API, BATCH_MAX_VIDEOS=3)
+    other_course_id = "course-v1:MIT+Other+Course"
+    third_course_id = "course-v1:MIT+Third+Course"
+    videos = {
+        course_id: [create_course_video(course_id) for _ in range(video_count)]
+        for course_id, video_count in ((COURSE_ID, 2), (other_course_id, 2), (third_course_id, 1))
+    }
+    request = APIRequestFactory().get("/batch/", {"course_id": [COURSE_ID, other_course_id, third_course_id]})
+    response = CourseVideoBatchView.as_view()(request).render()
+    assert response.status_code == status.HTTP_200_OK
+    content = json.loads(response.content)
+    assert content["results"] == {
+        course_id: [json_serialize_video_instance(video) for video in videos[course_id]]
+        for course_id in (COURSE_ID, third_course_id)
+    }
+    assert list(content["errors"]) == [other_course_id]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('recently_changed', [True, False])
+def test_batch_list_read_replica(mocker, settings, recently_changed):
+    """The batch view should read from the read replica, unless any of the courses' videos changed recently"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, READ_REPLICA_ALIAS="replica")
+    video = create_course_video(COURSE_ID)
+    if not recently_changed:
+        caches["default"].delete(course_recently_changed_key(COURSE_ID))
+    mocker.patch(
+        "edx_video_api.utils.DummyCourseOverview.get_from_ids_if_exists",
+        side_effect=lambda course_keys: {course_key: True for course_key in course_keys}
+    )
+    request = APIRequestFactory().get("/batch/", {"course_id": [COURSE_ID]})
+    response = CourseVideoBatchView.as_view()(request).render()
+    assert response.status_code == status.HTTP_200_OK
+    assert json.loads(response.content)["results"][COURSE_ID] == (
+        [json_serialize_video_instance(video)] if recently_changed else []
+    )
+
+
+@pytest.mark.parametrize('data', [{}, {"course_ids": []}, {"course_ids": "abc"}, {"course_ids": [1]}, ["abc"]])
+def test_batch_list_bad_request(settings, data):
+    """A batch request without a list of course ids, or with too many course ids, should fail"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, BATCH_MAX_COURSES=2)
+    factory = APIRequestFactory()
+    response = CourseVideoBatchView.as_view()(factory.post("/batch/", data, format="json")).render()
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = CourseVideoBatchView.as_view()(factory.get("/batch/", {"course_id": ["a", "b", "c"]})).render()
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize("timeout", [None, 60])
+def test_authentication_cache(settings, timeout):
+    """Authenticators should only be wrapped to cache their results if AUTHENTICATION_CACHE_TIMEOUT is set"""
+    settings.VIDEO_API = dict(settings.VIDEO_API, AUTHENTICATION_CACHE_TIMEOUT=timeout)
+    authenticators = CourseVideoListView().get_authenticators()
+    assert len(authenticators) == 1
+    if timeout:
+        assert isinstance(authenticators[0], CachedTokenAuthentication)
+        assert authenticators[0].timeout == timeout
+        assert isinstance(authenticators[0].authenticator, DummyOAuth2Authentication)
+    else:
+        assert isinstance(authenticators[0], DummyOAuth2Authentication)